@@ -0,0 +1,249 @@
+import asyncio
+import math
+import re
+import time
+from collections import OrderedDict
+from starlette.responses import JSONResponse
+from app.config import settings
+from app.metrics import ADMISSION_REJECTED, UPLOAD_BYTES_IN_FLIGHT
+from app.reports.scheduler import report_scheduler
+
+from app.logger_config import app_logger
+
+logger = app_logger.getChild(__name__)
+
+
+def check_rate(rate: float, burst: int):
+    """Проверка параметров корзины: при нулевой скорости время ожидания токенов не определено"""
+    if rate <= 0:
+        raise ValueError(f"Скорость корзины токенов должна быть больше 0, получено {rate}")
+    if burst < 1:
+        raise ValueError(f"Ёмкость корзины токенов должна быть не меньше 1, получено {burst}")
+
+
+class TokenBucket:
+    """
+    Корзина токенов: rate токенов в секунду, не больше burst про запас
+
+    :param rate: Скорость пополнения, токенов в секунду
+    :param burst: Ёмкость корзины
+    """
+
+    def __init__(self, rate: float, burst: int):
+        check_rate(rate, burst)
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, cost: float = 1.0) -> float:
+        """
+        Списание токенов
+
+        :param cost: Стоимость запроса
+        :return: float: 0, если токенов хватило, иначе секунды до их появления
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Корзины токенов по клиентам (API-ключ или адрес)
+
+    Хранится не больше max_clients корзин: давно не обращавшиеся клиенты
+    вытесняются, а их новая корзина начинается полной.
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int):
+        # Корзины создаются при первом запросе клиента, а ошибка настроек нужна при старте
+        check_rate(rate, burst)
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def check(self, client: str) -> float:
+        """
+        :param client: Ключ клиента
+        :return: float: 0, если запрос разрешён, иначе секунды до повтора
+        """
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket.take()
+
+
+class UploadBudget:
+    """Общий для процесса лимит байт загружаемых в данный момент архивов"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+
+    def reserve(self, size: int) -> bool:
+        # Единственная загрузка допускается даже сверх лимита, иначе большой архив не пройдёт никогда
+        if self.in_flight and self.in_flight + size > self.max_bytes:
+            return False
+        self.in_flight += size
+        UPLOAD_BYTES_IN_FLIGHT.set(self.in_flight)
+        return True
+
+    def release(self, size: int):
+        self.in_flight -= size
+        UPLOAD_BYTES_IN_FLIGHT.set(self.in_flight)
+
+
+class BacklogProbe:
+    """Число задач в очереди генерации, запрашиваемое из БД не чаще раза в interval секунд"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.pending = 0
+        self._checked = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> int:
+        if time.monotonic() - self._checked < self.interval:
+            return self.pending
+        async with self._lock:
+            if time.monotonic() - self._checked >= self.interval:
+                try:
+                    self.pending = (await report_scheduler.queue_depth())["PENDING"]
+                except Exception as e:
+                    # При недоступной БД запросы не отклоняются из-за очереди
+                    logger.warning("Не удалось получить размер очереди отчётов: %s", e)
+                self._checked = time.monotonic()
+        return self.pending
+
+
+# (метод, шаблон пути, группа лимита, занимает байты, создаёт задачу)
+ROUTES = (
+    ("POST", re.compile(r"^/upload/?$"), "uploads", True, True),
+    ("POST", re.compile(r"^/upload-from-github/?$"), "uploads", False, True),
+    ("POST", re.compile(r"^/batch/upload-from-github/?$"), "uploads", False, True),
+    ("POST", re.compile(r"^/uploads/?$"), "uploads", False, True),
+    ("PUT", re.compile(r"^/uploads/[^/]+/parts/\d+$"), None, True, False),
+    ("POST", re.compile(r"^/uploads/[^/]+/complete$"), "uploads", False, False),
+    ("GET", re.compile(r"^/reports(/|$)"), "reports", False, False),
+)
+
+
+class AdmissionMiddleware:
+    """
+    ASGI-middleware допуска запросов при перегрузке
+
+    Проверки выполняются до чтения тела запроса, поэтому отклонённая загрузка
+    не успевает занять диск, память или соединение с БД:
+
+    - корзина токенов на клиента отдельно для загрузок и чтения отчётов (429);
+    - общий лимит байт одновременно загружаемых архивов по Content-Length (503);
+    - новые задачи не принимаются, пока в очереди генерации больше
+      ADMISSION_MAX_BACKLOG отчётов (503).
+
+    Лимиты действуют в пределах процесса; очередь общая для всех реплик.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.limiters = {
+            "uploads": RateLimiter(
+                settings.RATE_LIMIT_UPLOADS, settings.RATE_LIMIT_UPLOADS_BURST, settings.RATE_LIMIT_MAX_CLIENTS
+            ),
+            "reports": RateLimiter(
+                settings.RATE_LIMIT_REPORTS, settings.RATE_LIMIT_REPORTS_BURST, settings.RATE_LIMIT_MAX_CLIENTS
+            ),
+        }
+        self.api_keys = frozenset(settings.RATE_LIMIT_API_KEYS)
+        self.budget = UploadBudget(settings.ADMISSION_MAX_UPLOAD_BYTES)
+        self.backlog = BacklogProbe(settings.ADMISSION_BACKLOG_CHECK_INTERVAL)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMISSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        policy = self._match(scope)
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+        group, counts_bytes, creates_task = policy
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+
+        if group is not None:
+            retry_after = self.limiters[group].check(self._client(scope, headers))
+            if retry_after:
+                await self._reject(scope, receive, send, 429, "rate_limit", "Слишком много запросов", retry_after)
+                return
+
+        if creates_task and await self.backlog.get() > settings.ADMISSION_MAX_BACKLOG:
+            await self._reject(
+                scope, receive, send, 503, "backlog",
+                "Очередь генерации отчётов переполнена, повторите позже", settings.ADMISSION_RETRY_AFTER,
+            )
+            return
+
+        if not counts_bytes:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            size = int(headers["content-length"])
+        except (KeyError, ValueError):
+            await self._reject(scope, receive, send, 411, "length_required", "Требуется заголовок Content-Length")
+            return
+        if not self.budget.reserve(size):
+            await self._reject(
+                scope, receive, send, 503, "upload_bytes",
+                "Превышен объём одновременно загружаемых архивов, повторите позже", settings.ADMISSION_RETRY_AFTER,
+            )
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.budget.release(size)
+
+    @staticmethod
+    def _match(scope) -> tuple[str | None, bool, bool] | None:
+        for method, pattern, group, counts_bytes, creates_task in ROUTES:
+            if scope["method"] == method and pattern.match(scope["path"]):
+                return group, counts_bytes, creates_task
+        return None
+
+    def _client(self, scope, headers: dict[str, str]) -> str:
+        """
+        Ключ корзины клиента
+
+        API-ключ учитывается, только если он есть в RATE_LIMIT_API_KEYS: иначе
+        клиент обходил бы лимит, присылая новый ключ в каждом запросе. За
+        доверенным прокси берётся последний адрес X-Forwarded-For — его добавил
+        сам прокси, остальные клиент может подставить.
+
+        :param scope: ASGI scope запроса
+        :param headers: Заголовки запроса (имена в нижнем регистре)
+        :return: str: Ключ клиента
+        """
+        api_key = headers.get(settings.RATE_LIMIT_API_KEY_HEADER.lower())
+        if api_key and api_key in self.api_keys:
+            return f"key:{api_key}"
+        if settings.RATE_LIMIT_TRUST_FORWARDED:
+            hops = [hop.strip() for hop in headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+            if hops:
+                return hops[-1]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    async def _reject(scope, receive, send, status_code: int, reason: str, detail: str, retry_after: float = None):
+        ADMISSION_REJECTED.labels(reason).inc()
+        logger.warning("Запрос %s %s отклонён: %s", scope["method"], scope["path"], reason)
+        headers = {"Retry-After": str(math.ceil(retry_after))} if retry_after else None
+        await JSONResponse({"detail": detail}, status_code=status_code, headers=headers)(scope, receive, send)
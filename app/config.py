@@ -9,6 +9,15 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "zip_db"
     POSTGRES_URL: str = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 256
+    DB_APPLICATION_NAME: str = "waveaccess"
+
     MINIO_ROOT_USER: str = "minio"
     MINIO_ROOT_PASSWORD: str = "minio123"
     MINIO_HOST: str = "minio"
@@ -16,8 +25,109 @@ class Settings(BaseSettings):
     MINIO_SECURE: bool = False
     MINIO_BUCKET_NAME: str = "minio-bucket"
     MINIO_ENDPOINT: str = "minio:9000"
+    MINIO_MAX_WORKERS: int = 8
+    MINIO_STREAM_WORKERS: int = 4  # одновременные потоковые загрузки, отдельно от MINIO_MAX_WORKERS
+    MINIO_PART_SIZE: int = 16 * 1024 * 1024  # = 16MB
+    MINIO_PARALLEL_UPLOADS: int = 4
+    MINIO_POOL_MAXSIZE: int = 32
+    MINIO_CONNECT_TIMEOUT: float = 10.0
+    MINIO_READ_TIMEOUT: float = 300.0
+
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_TIMEOUT: float = 300.0
+
+    GITHUB_ARCHIVE_URL: str = "https://github.com"
+    GITHUB_API_URL: str = "https://api.github.com"
+    GITHUB_API_TIMEOUT: float = 10.0
+    GITHUB_TOKEN: str = ""
+    GITHUB_RESOLVE_COMMITS: bool = True
+    GITHUB_MAX_ARCHIVE_SIZE: int = 1024 * 1024 * 1024 * 4  # = 4GB
+    STREAM_CHUNK_SIZE: int = 1024 * 1024  # = 1MB
+    STREAM_QUEUE_SIZE: int = 16
+    UPLOAD_PROGRESS_INTERVAL: float = 1.0
+    UPLOAD_PART_SIZE: int = 16 * 1024 * 1024  # = 16MB
+    UPLOAD_MAX_SIZE: int = 1024 * 1024 * 1024 * 16  # = 16GB
+    UPLOAD_SESSION_TTL: int = 24 * 60 * 60
+    UPLOAD_COMPLETE_LEASE: int = 60 * 60  # сборка, проверка и хэширование архива до 16GB
+
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_UPLOAD_BYTES: int = 1024 * 1024 * 1024 * 8  # = 8GB
+    ADMISSION_MAX_BACKLOG: int = 1000
+    ADMISSION_BACKLOG_CHECK_INTERVAL: float = 2.0
+    ADMISSION_RETRY_AFTER: int = 10
+    RATE_LIMIT_UPLOADS: float = 1.0  # запросов в секунду на клиента
+    RATE_LIMIT_UPLOADS_BURST: int = 10
+    RATE_LIMIT_REPORTS: float = 20.0
+    RATE_LIMIT_REPORTS_BURST: int = 100
+    RATE_LIMIT_MAX_CLIENTS: int = 10_000
+    RATE_LIMIT_API_KEY_HEADER: str = "X-API-Key"
+    RATE_LIMIT_API_KEYS: list[str] = []  # известные ключи; с другими клиент определяется по адресу
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+
+    RETENTION_ENABLED: bool = True
+    RETENTION_INTERVAL: float = 60 * 60  # = 1 час
+    RETENTION_BATCH_SIZE: int = 500
+    RETENTION_TTLS: dict[str, int] = {
+        "SUCCESS": 30 * 24 * 60 * 60,
+        "PARTIAL": 30 * 24 * 60 * 60,
+        "ERROR": 7 * 24 * 60 * 60,
+        "UPLOADING": 24 * 60 * 60,  # зависшие загрузки не удаляются, а переводятся в ERROR
+    }
+    RETENTION_ARCHIVE_RESULTS: bool = True
+    RETENTION_ARCHIVE_PREFIX: str = "archive/reports"
+
+    BATCH_MAX_ITEMS: int = 100
+    BATCH_DOWNLOAD_CONCURRENCY: int = 4
+
+    ZIP_VERIFY_CRC: bool = False
+    ZIP_MAX_ENTRIES: int = 500_000
+    ZIP_MAX_UNCOMPRESSED_SIZE: int = 1024 * 1024 * 1024 * 16  # = 16GB
+    ZIP_MAX_COMPRESSION_RATIO: float = 100.0
+
+    REPORT_WORKERS: int = 4
+    REPORT_POLL_INTERVAL: float = 2.0
+    REPORT_LEASE_TIMEOUT: float = 120.0
+    REPORT_MAX_ATTEMPTS: int = 3
+    REPORT_RETRY_BACKOFF: float = 5.0
+    REPORT_RETRY_BACKOFF_MAX: float = 300.0
+    REPORT_SHUTDOWN_TIMEOUT: float = 30.0
+    REPORT_MAX_WAIT: float = 60.0
+    REPORT_EVENTS_KEEPALIVE: float = 15.0
+    REPORT_EVENTS_QUEUE_SIZE: int = 16
+    REPORT_EVENTS_RECONNECT_INTERVAL: float = 5.0
+    REPORT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # = 256MB
+    REPORT_CACHE_TTL: float = 600.0
+    REPORT_RESULTS_COMPRESSION: bool = True
+    REPORT_RESULTS_COMPRESS_THRESHOLD: int = 64 * 1024  # = 64KB
+    REPORT_RESULTS_COMPRESSION_LEVEL: int = 3
+    REPORT_SEARCH_MAX_LIMIT: int = 500
+    REPORT_REUSE_TTL: int = 24 * 60 * 60  # = 1 день
+    PROCESS_POOL_WORKERS: int = 0  # 0 = число ядер; общий для разбора архивов и cpu_bound-анализаторов
+    ANALYZER_DEFAULT_CONCURRENCY: int = 8
+    ANALYZER_DEFAULT_TIMEOUT: float = 60.0
+    ANALYZER_DEFAULT_RETRIES: int = 0
+    ANALYZER_RETRY_BACKOFF: float = 1.0
+    ANALYZER_ENTRY_POINTS: bool = True
+    # Подключение и параметры анализаторов, например:
+    # {"sonarqube": {"concurrency": 2, "timeout": 120}, "lint": {"path": "pkg.lint:run", "cpu_bound": true}}
+    ANALYZERS: dict[str, dict] = {}
+    INSPECTION_BATCH_SIZE: int = 64 * 1024 * 1024  # = 64MB распакованных данных на процесс
+    INSPECTION_MAX_FILES: int = 10_000
+    INSPECTION_TIMEOUT: float = 600.0
+    INSPECTION_FILES_PREFIX: str = "inspection"  # Списки файлов архивов в бакете (GET /reports/{id}/files)
+    SCRATCH_DIR: str = ""  # Каталог временных файлов (по умолчанию системный)
+    EXTRACTION_CACHE_DIR: str = ""  # По умолчанию <SCRATCH_DIR>/waveaccess-extraction
+    EXTRACTION_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024 * 20  # = 20GB
+    MOCK_DELAY_SCALE: float = 1.0  # Множитель задержек моков внешних сервисов
 
+    # Уровень по умолчанию и уровни отдельных логгеров:
+    # "INFO,sqlalchemy.engine=INFO,uvicorn.access=WARNING"
     LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json | text
+    LOG_QUEUE_SIZE: int = 10_000
+    LOG_DEBUG_SAMPLE_RATE: float = 0.1
 
 
 settings = Settings()
@@ -3,15 +3,31 @@ from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, Asyn
 from sqlalchemy.orm import DeclarativeBase, declared_attr
 
 from app.config import settings
+from app.metrics import instrument_engine
+from app.serialization import dumps_str, loads
 
 DATABASE_URL = settings.POSTGRES_URL
 
 engine = create_async_engine(
     url=settings.POSTGRES_URL,
     future=True,
-    echo=True
+    echo=settings.DB_ECHO,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    json_serializer=dumps_str,
+    json_deserializer=loads,
+    connect_args={
+        # Кэш подготовленных выражений asyncpg (0 при работе через pgbouncer)
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "server_settings": {"application_name": settings.DB_APPLICATION_NAME},
+    },
 )
 
+instrument_engine(engine)
+
 async_session_maker = async_sessionmaker(
     bind=engine,
     autoflush=False,
@@ -1,11 +1,12 @@
 import asyncio
 import random
 from typing import Dict
+from app.config import settings
 
 
 async def generate_second_service_report(task_id: str) -> Dict:
     delay = random.uniform(3.0, 10.0)
-    await asyncio.sleep(delay)
+    await asyncio.sleep(delay * settings.MOCK_DELAY_SCALE)
 
     random.seed(hash(task_id) + 1)  # Different seed
 
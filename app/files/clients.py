@@ -0,0 +1,72 @@
+import asyncio
+from typing import Callable
+import httpx
+from app.config import settings
+from app.files.github_client import GitHubClient
+from app.files.minio_client import MinioClient
+
+from app.logger_config import app_logger
+
+logger = app_logger.getChild(__name__)
+
+
+class ClientRegistry:
+    """Общие клиенты хранилища и HTTP, живущие всё время работы приложения"""
+
+    def __init__(self, minio_factory: Callable[..., MinioClient] = MinioClient):
+        # Фабрику хранилища можно подменить (например, на in-memory в бенчмарках)
+        self.minio_factory = minio_factory
+        self._minio: MinioClient | None = None
+        self._http: httpx.AsyncClient | None = None
+        self._github: GitHubClient | None = None
+
+    async def startup(self):
+        """Создать клиенты и один раз проверить наличие бакета"""
+        self._minio = self.minio_factory(bucket_name=settings.MINIO_BUCKET_NAME)
+        await self._minio.create_bucket()
+
+        self._http = httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=settings.HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        self._github = GitHubClient(http_client=self._http)
+        logger.info("Клиенты MinIO и HTTP инициализированы")
+
+    async def shutdown(self):
+        """Закрыть соединения и дождаться завершения фоновых операций"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._github = None
+        if self._minio is not None:
+            await asyncio.to_thread(self._minio.close)
+            self._minio = None
+        logger.info("Клиенты MinIO и HTTP закрыты")
+
+    @property
+    def minio(self) -> MinioClient:
+        if self._minio is None:
+            raise RuntimeError("Клиент MinIO не инициализирован")
+        return self._minio
+
+    @property
+    def github(self) -> GitHubClient:
+        if self._github is None:
+            raise RuntimeError("Клиент GitHub не инициализирован")
+        return self._github
+
+
+clients = ClientRegistry()
+
+
+def get_minio_client() -> MinioClient:
+    return clients.minio
+
+
+def get_github_client() -> GitHubClient:
+    return clients.github
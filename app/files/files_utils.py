@@ -1,6 +1,50 @@
+import asyncio
+import hashlib
 import zipfile
-from fastapi import FastAPI, UploadFile, HTTPException
-from io import BytesIO
+import zlib
+from typing import AsyncIterator, BinaryIO
+from fastapi import UploadFile
+
+from app.config import settings
+from app.metrics import ZIP_VALIDATION_SECONDS
+
+
+ZIP_SIGNATURE = b'PK\x03\x04'
+
+
+def check_zip_structure(fileobj: BinaryIO, verify_crc: bool = False) -> bool:
+    """
+    Проверка структуры ZIP-архива без чтения его целиком в память.
+
+    zipfile читает с диска только запись end-of-central-directory и центральный
+    каталог, поэтому расход памяти зависит от числа файлов, а не от размера архива.
+    Проверка CRC (если включена) распаковывает файлы потоково, блоками по 1 MB.
+
+    :param fileobj: Файловый объект с поддержкой seek
+    :param verify_crc: Проверять контрольные суммы всех файлов архива
+    :return: bool: True, если архив корректен
+    """
+    try:
+        with zipfile.ZipFile(fileobj) as z:
+            entries = z.infolist()
+            if not entries or len(entries) > settings.ZIP_MAX_ENTRIES:
+                return False
+
+            # Защита от zip-бомб по данным центрального каталога
+            compressed_size = sum(entry.compress_size for entry in entries)
+            uncompressed_size = sum(entry.file_size for entry in entries)
+            if uncompressed_size > settings.ZIP_MAX_UNCOMPRESSED_SIZE:
+                return False
+            if compressed_size and uncompressed_size / compressed_size > settings.ZIP_MAX_COMPRESSION_RATIO:
+                return False
+
+            if verify_crc and z.testzip() is not None:
+                return False
+        return True
+    except (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError, RuntimeError):
+        return False
+    finally:
+        fileobj.seek(0)
 
 
 async def is_valid_zip(file: UploadFile) -> bool:
@@ -11,16 +55,42 @@ async def is_valid_zip(file: UploadFile) -> bool:
     # Проверка сигнатуры
     header = await file.read(4)
     await file.seek(0)
-    if header != b'PK\x03\x04':
+    if header != ZIP_SIGNATURE:
         return False
 
-    # Проверка структуры
+    # Проверка структуры (в потоке, чтобы не блокировать event loop)
+    with ZIP_VALIDATION_SECONDS.time():
+        return await asyncio.to_thread(check_zip_structure, file.file, settings.ZIP_VERIFY_CRC)
+
+
+def hash_file(fileobj: BinaryIO) -> str:
+    """
+    SHA-256 содержимого файла, читаемого блоками
+
+    :param fileobj: Файловый объект с поддержкой seek
+    :return: str: Хэш в шестнадцатеричном виде
+    """
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    while chunk := fileobj.read(settings.STREAM_CHUNK_SIZE):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+async def hash_chunks(chunks: AsyncIterator[bytes], digest) -> AsyncIterator[bytes]:
+    """
+    Пропускает поток блоков, обновляя по ходу хэш
+
+    :param chunks: Асинхронный источник блоков
+    :param digest: Объект hashlib, который обновляется каждым блоком
+    :return: AsyncIterator[bytes]: Те же блоки
+    """
     try:
-        content = await file.read()
-        with zipfile.ZipFile(BytesIO(content)) as z:
-            if not z.namelist():
-                return False
-        await file.seek(0)
-        return True
-    except zipfile.BadZipFile:
-        return False
\ No newline at end of file
+        async for chunk in chunks:
+            digest.update(chunk)
+            yield chunk
+    finally:
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
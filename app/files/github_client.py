@@ -1,46 +1,134 @@
-from fastapi import HTTPException
+import time
+from typing import AsyncIterator
+from fastapi import HTTPException, status
 from urllib.parse import urlparse
-from io import BytesIO
 import httpx
 
+from app.config import settings
+from app.metrics import GITHUB_DOWNLOAD_BYTES, GITHUB_DOWNLOAD_SECONDS
 
 from app.logger_config import app_logger
 
 logger = app_logger.getChild(__name__)
 
 class GitHubClient:
-    async def download_repo_zip(self, repo_url: str, branch: str = "main") -> BytesIO:
+    def __init__(self, http_client: httpx.AsyncClient):
         """
-        Скачивает репозиторий GitHub в формате ZIP
+        Инициализация клиента GitHub
+
+        :param http_client: Общий HTTP-клиент с пулом соединений
+        """
+        self.http_client = http_client
+
+    def repo_name(self, repo_url: str) -> str:
+        """
+        Имя репозитория в виде owner/repo
+
+        :param repo_url: URL репозитория GitHub
+        :return: str: owner/repo
+        """
+        parsed_url = urlparse(repo_url)
+        if parsed_url.netloc != "github.com":
+            error_msg = "Поддерживаются только репозитории с GitHub."
+            logger.error(error_msg)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error_msg)
+
+        path_parts = parsed_url.path.strip("/").split("/")
+        if len(path_parts) < 2:
+            error_msg = "Некорректный URL репозитория."
+            logger.error(error_msg)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error_msg)
+
+        user, repo = path_parts[0], path_parts[1]
+        repo = repo.replace(".git", "")
+        return f"{user}/{repo}"
+
+    def build_zip_url(self, repo_url: str, branch: str = "main", commit_sha: str = None) -> str:
+        """
+        Формирует URL ZIP-архива ветки репозитория
 
         :param repo_url: URL репозитория GitHub
         :param branch: Имя ветки (по умолчанию "main")
-        :return: BytesIO: ZIP-архив
+        :param commit_sha: SHA коммита: архив коммита неизменен, в отличие от архива ветки
+        :return: str: URL ZIP-архива
+        """
+        repo = self.repo_name(repo_url)
+        if commit_sha is not None:
+            return f"{settings.GITHUB_ARCHIVE_URL}/{repo}/archive/{commit_sha}.zip"
+        return f"{settings.GITHUB_ARCHIVE_URL}/{repo}/archive/refs/heads/{branch}.zip"
+
+    async def resolve_commit(self, repo_url: str, branch: str, etag: str = None) -> tuple[str | None, str | None]:
         """
+        SHA головного коммита ветки через GitHub API
+
+        Запрос условный: с ETag прошлого ответа GitHub отвечает 304, если ветка
+        не сдвинулась (такие ответы не расходуют лимит запросов API).
+
+        :param repo_url: URL репозитория GitHub
+        :param branch: Имя ветки
+        :param etag: ETag прошлого ответа
+        :return: tuple[str | None, str | None]: SHA коммита (None, если ветка не изменилась) и ETag
+        """
+        url = f"{settings.GITHUB_API_URL}/repos/{self.repo_name(repo_url)}/commits/{branch}"
+        headers = {"Accept": "application/vnd.github.sha"}
+        if etag:
+            headers["If-None-Match"] = etag
+        if settings.GITHUB_TOKEN:
+            headers["Authorization"] = f"Bearer {settings.GITHUB_TOKEN}"
+
+        response = await self.http_client.get(url, headers=headers, timeout=settings.GITHUB_API_TIMEOUT)
+        if response.status_code == status.HTTP_304_NOT_MODIFIED:
+            return None, etag
+        response.raise_for_status()
+        return response.text.strip(), response.headers.get("ETag")
+
+    async def stream_repo_zip(
+            self,
+            repo_url: str,
+            branch: str = "main",
+            commit_sha: str = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Потоково скачивает репозиторий GitHub в формате ZIP
+
+        Архив не буферизуется в памяти: данные отдаются блоками по
+        STREAM_CHUNK_SIZE, а размер проверяется по ходу скачивания.
+
+        :param repo_url: URL репозитория GitHub
+        :param branch: Имя ветки (по умолчанию "main")
+        :param commit_sha: SHA коммита ветки, если он уже известен
+        :return: AsyncIterator[bytes]: Блоки ZIP-архива
+        """
+        zip_url = self.build_zip_url(repo_url, branch, commit_sha)
+        max_size = settings.GITHUB_MAX_ARCHIVE_SIZE
         try:
-            logger.info(f"Скачивание репозитория {repo_url} (ветка: {branch})")
-            parsed_url = urlparse(repo_url)
-            if parsed_url.netloc != "github.com":
-                error_msg = "Поддерживаются только репозитории с GitHub."
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-
-            path_parts = parsed_url.path.strip("/").split("/")
-            if len(path_parts) < 2:
-                error_msg = "Некорректный URL репозитория."
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-
-            user, repo = path_parts[0], path_parts[1]
-            repo = repo.replace(".git", "")
-            zip_url = f"https://github.com/{user}/{repo}/archive/refs/heads/{branch}.zip"
-
-            async with httpx.AsyncClient(follow_redirects=True) as client:
-                response = await client.get(zip_url)
+            logger.info("Скачивание репозитория %s (ветка: %s)", repo_url, branch)
+            started = time.perf_counter()
+            async with self.http_client.stream("GET", zip_url) as response:
                 response.raise_for_status()
-                logger.info(f"Репозиторий {repo_url} скачан")
-                return BytesIO(response.content)
+
+                content_length = response.headers.get("Content-Length")
+                if content_length is not None and int(content_length) > max_size:
+                    raise self._too_large(max_size)
+
+                downloaded = 0
+                async for chunk in response.aiter_bytes(settings.STREAM_CHUNK_SIZE):
+                    downloaded += len(chunk)
+                    if downloaded > max_size:
+                        raise self._too_large(max_size)
+                    GITHUB_DOWNLOAD_BYTES.inc(len(chunk))
+                    yield chunk
+
+            GITHUB_DOWNLOAD_SECONDS.observe(time.perf_counter() - started)
+            logger.info("Репозиторий %s скачан (%s байт)", repo_url, downloaded)
+        except HTTPException:
+            raise
         except Exception as e:
             error_msg = f"Ошибка при скачивании репозитория: {e}"
             logger.error(error_msg)
-            raise HTTPException(status_code=500, detail=error_msg)
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=error_msg)
+
+    def _too_large(self, max_size: int) -> HTTPException:
+        error_msg = f"Превышен максимально допустимый размер архива репозитория: {max_size} байт"
+        logger.error(error_msg)
+        return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=error_msg)
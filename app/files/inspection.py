@@ -0,0 +1,119 @@
+import hashlib
+import zipfile
+from collections import defaultdict
+from pathlib import PurePosixPath
+from typing import Dict
+
+# Чтение файлов архива блоками, чтобы память не зависела от размера файла
+READ_CHUNK_SIZE = 1024 * 1024  # = 1MB
+# По наличию нулевого байта в начале файла он считается бинарным
+BINARY_SNIFF_SIZE = 8192
+
+LANGUAGES = {
+    ".py": "Python", ".pyi": "Python",
+    ".js": "JavaScript", ".mjs": "JavaScript", ".cjs": "JavaScript", ".jsx": "JavaScript",
+    ".ts": "TypeScript", ".tsx": "TypeScript",
+    ".java": "Java", ".kt": "Kotlin", ".kts": "Kotlin", ".scala": "Scala", ".groovy": "Groovy",
+    ".c": "C", ".h": "C", ".cc": "C++", ".cpp": "C++", ".cxx": "C++", ".hpp": "C++", ".hh": "C++",
+    ".cs": "C#", ".go": "Go", ".rs": "Rust", ".swift": "Swift", ".m": "Objective-C",
+    ".rb": "Ruby", ".php": "PHP", ".pl": "Perl", ".lua": "Lua", ".r": "R", ".dart": "Dart",
+    ".sh": "Shell", ".bash": "Shell", ".ps1": "PowerShell",
+    ".sql": "SQL", ".html": "HTML", ".htm": "HTML", ".css": "CSS", ".scss": "SCSS", ".vue": "Vue",
+    ".json": "JSON", ".yaml": "YAML", ".yml": "YAML", ".toml": "TOML", ".xml": "XML",
+    ".md": "Markdown", ".rst": "reStructuredText",
+}
+FILENAMES = {"Dockerfile": "Dockerfile", "Makefile": "Makefile", "CMakeLists.txt": "CMake"}
+
+
+def detect_language(name: str) -> str | None:
+    path = PurePosixPath(name)
+    return FILENAMES.get(path.name) or LANGUAGES.get(path.suffix.lower())
+
+
+def plan_batches(path: str, batch_size: int) -> list[list[str]]:
+    """
+    Разбиение файлов архива на пачки примерно по batch_size распакованных байт
+
+    :param path: Путь к ZIP-архиву
+    :param batch_size: Объём пачки в байтах
+    :return: list[list[str]]: Имена файлов по пачкам
+    """
+    batches, current, current_size = [], [], 0
+    with zipfile.ZipFile(path) as archive:
+        for entry in archive.infolist():
+            if entry.is_dir():
+                continue
+            current.append(entry.filename)
+            current_size += entry.file_size
+            if current_size >= batch_size:
+                batches.append(current)
+                current, current_size = [], 0
+    if current:
+        batches.append(current)
+    return batches
+
+
+def inspect_entries(path: str, names: list[str]) -> list[Dict]:
+    """
+    Метаданные файлов архива: размеры, язык, число строк и SHA-256
+
+    Выполняется в процессе пула: каждый процесс открывает архив сам
+    и распаковывает только свою пачку файлов.
+
+    :param path: Путь к ZIP-архиву
+    :param names: Имена файлов пачки
+    :return: list[Dict]: Метаданные файлов
+    """
+    files = []
+    with zipfile.ZipFile(path) as archive:
+        for name in names:
+            entry = archive.getinfo(name)
+            digest = hashlib.sha256()
+            lines = 0
+            binary = False
+            last = b""
+            with archive.open(entry) as source:
+                while chunk := source.read(READ_CHUNK_SIZE):
+                    if not last and b"\0" in chunk[:BINARY_SNIFF_SIZE]:
+                        binary = True
+                    digest.update(chunk)
+                    lines += chunk.count(b"\n")
+                    last = chunk[-1:]
+            if last and last != b"\n":
+                lines += 1
+
+            files.append({
+                "path": name,
+                "size": entry.file_size,
+                "compressed_size": entry.compress_size,
+                "language": None if binary else detect_language(name),
+                "lines": None if binary else lines,
+                "sha256": digest.hexdigest(),
+            })
+    return files
+
+
+def summarize(files: list[Dict]) -> Dict:
+    """
+    Сводка по языкам и общему объёму
+
+    :param files: Метаданные файлов
+    :return: Dict: Итоги по архиву и по языкам
+    """
+    languages = defaultdict(lambda: {"files": 0, "lines": 0, "bytes": 0})
+    for item in files:
+        if item["language"] is None:
+            continue
+        stats = languages[item["language"]]
+        stats["files"] += 1
+        stats["lines"] += item["lines"]
+        stats["bytes"] += item["size"]
+
+    return {
+        "files": len(files),
+        "bytes": sum(item["size"] for item in files),
+        "compressed_bytes": sum(item["compressed_size"] for item in files),
+        "lines": sum(item["lines"] or 0 for item in files),
+        "binary_files": sum(1 for item in files if item["lines"] is None),
+        "languages": dict(sorted(languages.items(), key=lambda item: item[1]["lines"], reverse=True)),
+    }
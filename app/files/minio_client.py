@@ -1,49 +1,432 @@
+import asyncio
+import hashlib
 import io
-from typing import BinaryIO
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable
+from urllib.parse import quote
 from fastapi import HTTPException, status
+import certifi
+import urllib3
 from minio import Minio
+from minio.datatypes import Part
+from minio.deleteobjects import DeleteObject
+from minio.error import S3Error
 from app.config import settings
+from app.metrics import STORAGE_UPLOAD_BYTES, STORAGE_UPLOAD_SECONDS, STORAGE_UPLOAD_THROUGHPUT
 
 from app.logger_config import app_logger
 
 logger = app_logger.getChild(__name__)
 
+
+class _QueueReader:
+    """
+    Файловый объект для SDK MinIO, читающий блоки из asyncio.Queue
+
+    Вызывается из потока пула: блоки забираются из очереди event loop'а,
+    ограниченный размер очереди обеспечивает обратное давление на источник.
+    """
+
+    _EOF = None
+
+    def __init__(self, queue: asyncio.Queue, loop: asyncio.AbstractEventLoop):
+        self._queue = queue
+        self._loop = loop
+        self._buffer = bytearray()
+        self._eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            item = asyncio.run_coroutine_threadsafe(self._queue.get(), self._loop).result()
+            if item is self._EOF:
+                self._eof = True
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                self._buffer += item
+
+        if size < 0 or size > len(self._buffer):
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+class _RangeReader(io.RawIOBase):
+    """
+    Файловый объект только для чтения поверх ranged GET
+
+    Позволяет zipfile прочитать центральный каталог объекта, не скачивая его
+    целиком. Вызывается из потока пула: данные читаются блоками не меньше
+    block_size с упреждением.
+    """
+
+    def __init__(self, client: Minio, bucket_name: str, object_name: str, size: int, block_size: int):
+        self._client = client
+        self._bucket_name = bucket_name
+        self._object_name = object_name
+        self._size = size
+        self._block_size = block_size
+        self._position = 0
+        self._buffer = b""
+        self._buffer_start = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(offset, 0)
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        if self._position >= self._size:
+            return 0
+        wanted = min(len(buffer), self._size - self._position)
+        start = self._position - self._buffer_start
+        if start < 0 or start + wanted > len(self._buffer):
+            self._fetch(max(wanted, self._block_size))
+            start = 0
+        buffer[:wanted] = self._buffer[start:start + wanted]
+        self._position += wanted
+        return wanted
+
+    def _fetch(self, length: int):
+        response = self._client.get_object(
+            self._bucket_name, self._object_name, offset=self._position, length=length
+        )
+        try:
+            self._buffer = response.read()
+        finally:
+            response.close()
+            response.release_conn()
+        self._buffer_start = self._position
+
+
 class MinioClient:
     def __init__(self, bucket_name: str):
         """Инициализация MinIO клиента"""
+        # Общий пул соединений с keep-alive на всё время жизни приложения
+        self._http = urllib3.PoolManager(
+            maxsize=settings.MINIO_POOL_MAXSIZE,
+            timeout=urllib3.Timeout(
+                connect=settings.MINIO_CONNECT_TIMEOUT,
+                read=settings.MINIO_READ_TIMEOUT,
+            ),
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+            retries=urllib3.Retry(
+                total=5,
+                backoff_factor=0.2,
+                status_forcelist=[500, 502, 503, 504],
+            ),
+        )
         self.client = Minio(
             endpoint=settings.MINIO_ENDPOINT,
             access_key=settings.MINIO_ROOT_USER,
             secret_key=settings.MINIO_ROOT_PASSWORD,
             secure=settings.MINIO_SECURE,
+            http_client=self._http,
         )
         self.bucket_name = bucket_name
-        logger.info(f"Инициализирован клиент MinIO для бакета: {self.bucket_name}")
+        self._bucket_ready = False
+        # Синхронный SDK вызывается только из ограниченного пула потоков,
+        # чтобы сетевые операции не блокировали event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.MINIO_MAX_WORKERS,
+            thread_name_prefix="minio",
+        )
+        # Потоковая загрузка занимает поток на всё время скачивания источника,
+        # поэтому у неё свой пул и не больше MINIO_STREAM_WORKERS загрузок сразу
+        self._stream_executor = ThreadPoolExecutor(
+            max_workers=settings.MINIO_STREAM_WORKERS,
+            thread_name_prefix="minio-stream",
+        )
+        self._stream_slots = asyncio.Semaphore(settings.MINIO_STREAM_WORKERS)
+        logger.info("Инициализирован клиент MinIO для бакета: %s", self.bucket_name)
+
+    async def _run(self, func, *args, **kwargs):
+        """Выполнить блокирующий вызов SDK в пуле потоков"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
 
     async def create_bucket(self):
-        """Создать бакет, если не существует"""
+        """Создать бакет, если не существует (результат проверки кэшируется)"""
+        if self._bucket_ready:
+            return
         bucket_name = self.bucket_name
-        if not self.client.bucket_exists(bucket_name):
-            self.client.make_bucket(bucket_name)
-            logger.info(f"Бакет {self.bucket_name} создан")
+        if not await self._run(self.client.bucket_exists, bucket_name):
+            await self._run(self.client.make_bucket, bucket_name)
+            logger.info("Бакет %s создан", self.bucket_name)
         else:
-            logger.info(f"Бакет {self.bucket_name} уже существует.")
+            logger.info("Бакет %s уже существует.", self.bucket_name)
+        self._bucket_ready = True
 
-    async def upload_file(self, file: io.IOBase | BinaryIO, file_name: str, metadata: dict = None):
+    async def upload_file(self, file: io.IOBase | BinaryIO, file_name: str, metadata: dict = None) -> int:
         """
         Загружает файл в хранилище MinIO
+
+        Части multipart-загрузки отправляются параллельно
+        (MINIO_PART_SIZE, MINIO_PARALLEL_UPLOADS).
+
+        :param file: Файловый объект с поддержкой seek
+        :param file_name: Имя объекта в бакете
+        :param metadata: Метаданные объекта
+        :return: int: Размер загруженного файла в байтах
         """
+        length = file.seek(0, os.SEEK_END)
         file.seek(0)
-        logger.info(f"Загрузка файла {file_name} в бакет {self.bucket_name}")
-        self.client.put_object(
+        logger.info("Загрузка файла %s (%s байт) в бакет %s", file_name, length, self.bucket_name)
+
+        started = time.perf_counter()
+        await self._run(
+            self.client.put_object,
             self.bucket_name,
             file_name,
             file,
+            length=length,
+            part_size=settings.MINIO_PART_SIZE,
+            metadata=metadata,
+            num_parallel_uploads=settings.MINIO_PARALLEL_UPLOADS,
+        )
+        elapsed = time.perf_counter() - started
+        self._observe_upload("file", length, elapsed)
+
+        throughput = length / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+        logger.info("Файл %s успешно загружен за %.2f с (%.1f MB/s)", file_name, elapsed, throughput)
+        return length
+
+    async def upload_stream(
+            self,
+            chunks: AsyncIterator[bytes],
+            file_name: str,
+            metadata: dict = None,
+            on_progress: Callable[[int], Awaitable[None]] = None,
+    ) -> int:
+        """
+        Потоково загружает данные в хранилище MinIO без буферизации целиком
+
+        Блоки передаются в multipart-загрузку через ограниченную очередь
+        (STREAM_QUEUE_SIZE), поэтому скачивание и загрузка идут одновременно,
+        а расход памяти не зависит от размера данных. Загрузка выполняется в
+        отдельном пуле потоков; сверх MINIO_STREAM_WORKERS загрузки ждут
+        очереди, не начиная читать источник.
+
+        :param chunks: Асинхронный источник блоков данных
+        :param file_name: Имя объекта в бакете
+        :param metadata: Метаданные объекта
+        :param on_progress: Колбэк с числом переданных байт (не чаще UPLOAD_PROGRESS_INTERVAL)
+        :return: int: Размер загруженного объекта в байтах
+        """
+        async with self._stream_slots:
+            return await self._upload_stream(chunks, file_name, metadata, on_progress)
+
+    async def _upload_stream(
+            self,
+            chunks: AsyncIterator[bytes],
+            file_name: str,
+            metadata: dict | None,
+            on_progress: Callable[[int], Awaitable[None]] | None,
+    ) -> int:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.STREAM_QUEUE_SIZE)
+        reader = _QueueReader(queue, loop)
+        logger.info("Потоковая загрузка файла %s в бакет %s", file_name, self.bucket_name)
+
+        started = time.perf_counter()
+        upload = loop.run_in_executor(self._stream_executor, partial(
+            self.client.put_object,
+            self.bucket_name,
+            file_name,
+            reader,
             length=-1,
-            part_size=10*1024*1024,
-            metadata=metadata
+            part_size=settings.MINIO_PART_SIZE,
+            metadata=metadata,
+            num_parallel_uploads=settings.MINIO_PARALLEL_UPLOADS,
+        ))
+
+        transferred = 0
+        reported_at = started
+        try:
+            async for chunk in chunks:
+                put = asyncio.ensure_future(queue.put(chunk))
+                await asyncio.wait({put, upload}, return_when=asyncio.FIRST_COMPLETED)
+                if not put.done():
+                    # Загрузка прервалась раньше источника, ошибку вернёт await upload
+                    put.cancel()
+                    break
+                transferred += len(chunk)
+
+                now = time.perf_counter()
+                if on_progress is not None and now - reported_at >= settings.UPLOAD_PROGRESS_INTERVAL:
+                    reported_at = now
+                    await on_progress(transferred)
+            else:
+                await queue.put(_QueueReader._EOF)
+        except BaseException as e:
+            if not upload.done():
+                await queue.put(e)
+            await asyncio.gather(upload, return_exceptions=True)
+            raise
+        finally:
+            aclose = getattr(chunks, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+        await upload
+        elapsed = time.perf_counter() - started
+        self._observe_upload("stream", transferred, elapsed)
+        if on_progress is not None:
+            await on_progress(transferred)
+
+        throughput = transferred / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+        logger.info(
+            "Файл %s (%s байт) успешно загружен за %.2f с (%.1f MB/s)", file_name, transferred, elapsed, throughput
+        )
+        return transferred
+
+    @staticmethod
+    def _observe_upload(mode: str, size: int, elapsed: float):
+        STORAGE_UPLOAD_SECONDS.labels(mode).observe(elapsed)
+        STORAGE_UPLOAD_BYTES.labels(mode).inc(size)
+        if elapsed > 0:
+            STORAGE_UPLOAD_THROUGHPUT.labels(mode).observe(size / elapsed)
+
+    async def download_file(self, file_name: str, path: str):
+        """
+        Скачивает объект из бакета в локальный файл
+
+        :param file_name: Имя объекта в бакете
+        :param path: Путь к локальному файлу
+        """
+        started = time.perf_counter()
+        await self._run(self.client.fget_object, self.bucket_name, file_name, path)
+        logger.info("Файл %s скачан за %.2f с", file_name, time.perf_counter() - started)
+
+    async def read_object(self, file_name: str) -> bytes:
+        """
+        Содержимое небольшого объекта целиком
+
+        :param file_name: Имя объекта
+        :return: bytes: Данные объекта
+        """
+        def read() -> bytes:
+            response = self.client.get_object(self.bucket_name, file_name)
+            try:
+                return response.read()
+            finally:
+                response.close()
+                response.release_conn()
+
+        return await self._run(read)
+
+    async def object_size(self, file_name: str) -> int:
+        """
+        Размер объекта в бакете
+
+        :param file_name: Имя объекта
+        :return: int: Размер в байтах
+        """
+        stat = await self._run(self.client.stat_object, self.bucket_name, file_name)
+        return stat.size
+
+    def open_ranged(self, file_name: str, size: int) -> _RangeReader:
+        """
+        Файловый объект для чтения объекта по диапазонам (использовать в потоке)
+
+        :param file_name: Имя объекта
+        :param size: Размер объекта
+        :return: _RangeReader: Файловый объект с поддержкой seek
+        """
+        return _RangeReader(self.client, self.bucket_name, file_name, size, settings.STREAM_CHUNK_SIZE)
+
+    async def hash_object(self, file_name: str) -> str:
+        """
+        SHA-256 объекта, читаемого потоком из бакета
+
+        :param file_name: Имя объекта
+        :return: str: Хэш в шестнадцатеричном виде
+        """
+        def digest() -> str:
+            sha256 = hashlib.sha256()
+            response = self.client.get_object(self.bucket_name, file_name)
+            try:
+                for chunk in response.stream(settings.STREAM_CHUNK_SIZE):
+                    sha256.update(chunk)
+            finally:
+                response.close()
+                response.release_conn()
+            return sha256.hexdigest()
+
+        return await self._run(digest)
+
+    async def create_multipart_upload(self, file_name: str, filename: str) -> str:
+        """
+        Начинает multipart-загрузку объекта
+
+        :param file_name: Имя объекта в бакете
+        :param filename: Исходное имя файла (сохраняется в метаданных)
+        :return: str: ID multipart-загрузки
+        """
+        headers = {
+            "Content-Type": "application/zip",
+            "x-amz-meta-original_filename": quote(filename),
+        }
+        return await self._run(self.client._create_multipart_upload, self.bucket_name, file_name, headers)
+
+    async def upload_part(self, file_name: str, upload_id: str, part_number: int, data: bytes) -> str:
+        """
+        Загружает одну часть multipart-загрузки
+
+        :param file_name: Имя объекта в бакете
+        :param upload_id: ID multipart-загрузки
+        :param part_number: Номер части (с 1)
+        :param data: Содержимое части
+        :return: str: ETag части
+        """
+        return await self._run(
+            self.client._upload_part, self.bucket_name, file_name, data, None, upload_id, part_number
+        )
+
+    async def complete_multipart_upload(self, file_name: str, upload_id: str, parts: list[tuple[int, str]]):
+        """
+        Собирает объект из загруженных частей
+
+        :param file_name: Имя объекта в бакете
+        :param upload_id: ID multipart-загрузки
+        :param parts: Номера и ETag частей по порядку
+        """
+        await self._run(
+            self.client._complete_multipart_upload,
+            self.bucket_name,
+            file_name,
+            upload_id,
+            [Part(part_number, etag) for part_number, etag in parts],
         )
-        logger.info(f"Файл {file_name} успешно загружен")
+
+    async def abort_multipart_upload(self, file_name: str, upload_id: str):
+        """
+        Отменяет multipart-загрузку и освобождает загруженные части
+
+        :param file_name: Имя объекта в бакете
+        :param upload_id: ID multipart-загрузки
+        """
+        try:
+            await self._run(self.client._abort_multipart_upload, self.bucket_name, file_name, upload_id)
+        except S3Error as e:
+            logger.warning("Не удалось отменить загрузку %s: %s", file_name, e)
 
     async def file_exists(self, file_name: str) -> bool:
         """
@@ -54,15 +437,52 @@ class MinioClient:
         :return: bool: True, если файл существует, иначе False
         """
         try:
-            await self.client.stat_object(self.bucket_name, file_name)
+            await self._run(self.client.stat_object, self.bucket_name, file_name)
             return True
-        except Exception as e:
-            logger.warning(f"Файл {file_name} не найден: {e}")
+        except S3Error as e:
+            logger.warning("Файл %s не найден: %s", file_name, e)
             return False
 
+    async def remove_object(self, file_name: str):
+        """
+        Удаляет объект из бакета
+
+        :param file_name: Имя объекта
+        """
+        await self._run(self.client.remove_object, self.bucket_name, file_name)
+        logger.info("Файл %s удалён из бакета %s", file_name, self.bucket_name)
+
+    async def remove_objects(self, file_names: list[str]) -> int:
+        """
+        Пакетно удаляет объекты из бакета (DeleteObjects, до 1000 за запрос)
+
+        :param file_names: Имена объектов
+        :return: int: Число объектов, которые не удалось удалить
+        """
+        def remove() -> int:
+            errors = self.client.remove_objects(
+                self.bucket_name,
+                (DeleteObject(file_name) for file_name in file_names),
+            )
+            failed = 0
+            for error in errors:
+                failed += 1
+                logger.error("Не удалось удалить файл %s: %s", error.name, error.message)
+            return failed
+
+        failed = await self._run(remove)
+        logger.info("Удалено файлов из бакета %s: %s", self.bucket_name, len(file_names) - failed)
+        return failed
+
+    def close(self):
+        """Дождаться завершения операций, остановить пул потоков и закрыть соединения"""
+        self._executor.shutdown(wait=True)
+        self._stream_executor.shutdown(wait=True)
+        self._http.clear()
+
     def _exception(self, detail: str):
         logger.error(detail)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=detail
-        )
\ No newline at end of file
+        )
@@ -1,40 +1,156 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
-from pathlib import Path
+import queue
+import random
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from app.config import settings
+from app.metrics import register_counter
+
+# ID задачи, к которой относятся записи текущего контекста (запрос, воркер отчётов)
+task_id_var: ContextVar[str | None] = ContextVar("task_id", default=None)
+
+# Стандартные атрибуты LogRecord: всё остальное считается полями из extra
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "task_id", "taskName"}
+
+_listener: "_Listener | None" = None
+_queue_handler: "NonBlockingQueueHandler | None" = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирование записи в одну строку JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.task_id is not None:
+            entry["task_id"] = record.task_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Пропускает только долю DEBUG-записей, остальные уровни — без ограничений"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Передача записей в поток QueueListener
+
+    В вызывающем коде к записи только добавляется task_id; подстановка
+    аргументов, форматирование и запись в поток выполняются в потоке
+    слушателя. При переполнении очереди запись отбрасывается, а не
+    блокирует event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.task_id = task_id_var.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # При остановке ждём место в очереди, чтобы не потерять хвост записей
+        self.queue.put(self._sentinel)
+
+
+def _parse_levels(spec: str) -> tuple[str, dict[str, str]]:
+    """
+    Разбор LOG_LEVEL вида "INFO,sqlalchemy.engine=WARNING"
+
+    :param spec: Уровень по умолчанию и уровни отдельных логгеров через запятую
+    :return: tuple[str, dict[str, str]]: Уровень по умолчанию и уровни логгеров
+    """
+    default, levels = "INFO", {}
+    for part in filter(None, (part.strip() for part in spec.split(","))):
+        if "=" in part:
+            name, level = part.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+        else:
+            default = part.upper()
+    return default, levels
 
 
 def setup_logging():
-    """Настройка логирования с единым форматом даты"""
-    import logging
-    from logging.handlers import RotatingFileHandler
+    """Настройка асинхронного логирования через очередь и поток QueueListener"""
+    global _listener, _queue_handler
+    stop_logging()
 
     # Удаляем все обработчики у корневого логгера
     root_logger = logging.getLogger()
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
 
-    # Создаем логгер приложения
-    app_logger = logging.getLogger("app")
-    app_logger.setLevel(logging.INFO)
+    if settings.LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - [%(task_id)s] %(message)s")
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(DebugSampler(settings.LOG_DEBUG_SAMPLE_RATE))
+    root_logger.addHandler(_queue_handler)
 
-    # Формат с локальным временем и миллисекундами
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S,%f"  # Пример: 2025-03-27 13:06:51,629
-    )
+    default, levels = _parse_levels(settings.LOG_LEVEL)
+    root_logger.setLevel(default)
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
 
-    # Консольный обработчик (только если его нет)
-    if not app_logger.handlers:
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        app_logger.addHandler(console_handler)
+    # Логгер приложения пишет через обработчик корневого
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(levels.get("app", default))
+    app_logger.propagate = True
 
-    # Отключаем передачу родительским логгерам
-    app_logger.propagate = False
+    _listener = _Listener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
 
     return app_logger
 
 
+def stop_logging():
+    """Остановка потока логирования с записью оставшихся в очереди записей"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
 # Инициализация при импорте
-app_logger = setup_logging()
\ No newline at end of file
+app_logger = setup_logging()
+atexit.register(stop_logging)
+register_counter(
+    "log_records_dropped",
+    "Записи лога, отброшенные при переполнении очереди",
+    lambda: _queue_handler.dropped,
+)
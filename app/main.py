@@ -1,39 +1,89 @@
 import asyncio
-import json
-from fastapi import FastAPI, HTTPException, UploadFile, Depends, Path
+import hashlib
+import re
+from contextlib import aclosing, asynccontextmanager
+from datetime import datetime
+from functools import partial
+from fastapi import FastAPI, HTTPException, UploadFile, Depends, Header, Path, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from uuid import uuid4
+from app.admission import AdmissionMiddleware
 from app.config import settings
-from app.database import get_db
-from app.files.files_utils import is_valid_zip
+from app.database import async_session_maker, engine, get_db
+from app.files.clients import clients, get_github_client, get_minio_client
+from app.files.files_utils import hash_chunks, hash_file, is_valid_zip
 from app.files.github_client import GitHubClient
-from app.reports.models import Report
 from app.files.minio_client import MinioClient
-from app.reports.reports_service import reports_service
-from app.logger_config import setup_logging
+from app.metrics import REPORT_QUEUE_DEPTH, MetricsMiddleware
+from app.reports.cache import report_cache
+from app.reports.models import ReportStatus
+from app.reports.events import report_events
+from app.reports.github_archives import github_archives
+from app.reports.reports_service import TERMINAL_STATUSES, reports_service
+from app.reports.report_metrics import report_metrics
+from app.reports.schemas import BatchGitHubUpload, UploadInit
+from app.reports.retention import retention_service
+from app.reports.scheduler import report_scheduler
+from app.reports.uploads import uploads_service
+from app.serialization import dumps
+from app.logger_config import app_logger, task_id_var
 
-
-logger = setup_logging()
+logger = app_logger.getChild(__name__)
 
 MAX_FILE_SIZE = 1024 * 1024 * 1024 * 4  # = 4GB
+UUID_PATTERN = r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await clients.startup()
+    await report_events.start()
+    await report_scheduler.start()
+    await retention_service.start()
+    try:
+        yield
+    finally:
+        await retention_service.stop()
+        await report_scheduler.stop()
+        await report_events.stop()
+        await clients.shutdown()
+        await engine.dispose()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+# Добавленный последним middleware выполняется первым: отклонённые запросы тоже попадают в метрики
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics():
+    """Метрики Prometheus"""
+    for status, count in (await report_scheduler.queue_depth()).items():
+        REPORT_QUEUE_DEPTH.labels(status).set(count)
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
 @app.post('/upload/',
           summary="Загрузка ZIP-файла",
           description="Загрузить ZIP-файл для анализа (Максимальный размер архива: 4 GB)",
           response_description="ID задачи для отслеживания")
-async def upload_file(file: UploadFile, db: AsyncSession = Depends(get_db)):
+async def upload_file(
+        file: UploadFile,
+        db: AsyncSession = Depends(get_db),
+        minio_client: MinioClient = Depends(get_minio_client),
+):
     """
     Загрузка ZIP-архива с кодом для анализа
 
     :param file: ZIP-архив с кодом для анализа
     :param db: Сессия БД
+    :param minio_client: Общий клиент MinIO
     :return: ID задачи для отслеживания статуса
     """
-    logger.info(f"РАЗМЕР ФАЙЛА: {file.size}, МАКСИМАЛЬНЫЙ РАЗМЕР ФАЙЛА: {MAX_FILE_SIZE}")
+    logger.info("РАЗМЕР ФАЙЛА: %s, МАКСИМАЛЬНЫЙ РАЗМЕР ФАЙЛА: %s", file.size, MAX_FILE_SIZE)
     if file.size > MAX_FILE_SIZE:
         error_msg = "Превышен максимально допустимый размер ZIP-архива для загрузки: 4 GB"
         logger.error(error_msg)
@@ -47,21 +97,33 @@ async def upload_file(file: UploadFile, db: AsyncSession = Depends(get_db)):
 
     try:
         task_id = str(uuid4())
-        logger.info(f"Начало загрузки для задачи {task_id}")
-
-        minio_client = MinioClient(bucket_name=settings.MINIO_BUCKET_NAME)
-        await minio_client.create_bucket()
-        await minio_client.upload_file(
-            file=file.file,
-            file_name=str(f"{task_id}.zip"),
-            metadata={"original_filename": file.filename}
-        )
+        task_id_var.set(task_id)
+        logger.info("Начало загрузки для задачи %s", task_id)
 
+        content_hash = await asyncio.to_thread(hash_file, file.file)
+        cached = await reports_service.find_reusable_report(content_hash, db)
+        if cached is not None:
+            await reports_service.create_cached_report(task_id, cached, db)
+            return {"task_id": task_id}
 
-        await reports_service.create_new_report(task_id, db)
-        asyncio.create_task(reports_service.run_report_generation(task_id))
+        object_name = await reports_service.find_stored_object(content_hash, db, minio_client)
+        uploaded_bytes = file.size
+        if object_name is None:
+            object_name = f"{task_id}.zip"
+            uploaded_bytes = await minio_client.upload_file(
+                file=file.file,
+                file_name=object_name,
+                metadata={"original_filename": file.filename}
+            )
+        else:
+            logger.info("Архив задачи %s уже есть в хранилище: %s", task_id, object_name)
 
-        logger.info(f"Загрузка задачи {task_id} завершена")
+        await reports_service.create_new_report(
+            task_id, db, content_hash=content_hash, object_name=object_name, uploaded_bytes=uploaded_bytes
+        )
+        report_scheduler.notify()
+
+        logger.info("Загрузка задачи %s завершена", task_id)
         return {"task_id": task_id}
 
     except Exception as e:
@@ -70,98 +132,540 @@ async def upload_file(file: UploadFile, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=500, detail=error_msg)
 
 
+def _github_zip_name(repo_url: str, branch: str) -> str:
+    repo_path = repo_url.strip("/").split("github.com/")[-1]
+    user, repo = repo_path.split("/")[:2]
+    repo = repo.replace(".git", "")
+    return f"{user}-{repo}-{branch}.zip"
+
+
+async def _import_github_archive(
+        task_id: str,
+        repo_url: str,
+        branch: str,
+        db: AsyncSession,
+        minio_client: MinioClient,
+        github_client: GitHubClient,
+):
+    """
+    Потоковая загрузка архива репозитория в MinIO для уже созданной задачи
+
+    Ветка разрешается в SHA коммита; если архив этого коммита уже загружался
+    и лежит в бакете, он не скачивается повторно. При ошибке задача
+    переводится в ERROR, а исключение пробрасывается.
+
+    :param task_id: ID задачи в статусе UPLOADING
+    :param repo_url: URL репозитория GitHub
+    :param branch: Имя ветки
+    :param db: Сессия БД
+    :param minio_client: Общий клиент MinIO
+    :param github_client: Общий клиент GitHub
+    """
+    task_id_var.set(task_id)
+    try:
+        commit_sha = await github_archives.resolve_commit(repo_url, branch, db, github_client)
+        archive = None
+        if commit_sha is not None:
+            archive = await github_archives.find(repo_url, commit_sha, db, github_client, minio_client)
+
+        uploaded = archive is None
+        if not uploaded:
+            logger.info("Архив коммита %s уже загружен, скачивание пропущено", commit_sha)
+            uploaded_bytes, content_hash = archive.size, archive.content_hash
+        else:
+            digest = hashlib.sha256()
+            uploaded_bytes = await minio_client.upload_stream(
+                chunks=hash_chunks(github_client.stream_repo_zip(repo_url, branch, commit_sha), digest),
+                file_name=str(f"{task_id}.zip"),
+                metadata={"original_filename": _github_zip_name(repo_url, branch)},
+                on_progress=partial(reports_service.update_upload_progress, task_id),
+            )
+            content_hash = digest.hexdigest()
+            if commit_sha is not None:
+                await github_archives.remember(repo_url, commit_sha, content_hash, uploaded_bytes, db, github_client)
+
+        cached = await reports_service.finish_upload(
+            task_id, uploaded_bytes, content_hash, db, minio_client, uploaded=uploaded
+        )
+        if cached is None:
+            report_scheduler.notify()
+    except Exception:
+        await reports_service.fail_upload(task_id, db)
+        raise
+
+
 @app.post('/upload-from-github/',
           summary="Загрузка репозитория из GitHub",
           description="Загрузка репозитория GitHub для анализа кода",
           response_description="Статус загрузки и ID задачи для отслеживания")
-async def upload_from_github(repo_url: str, branch: str = "main", db:AsyncSession = Depends(get_db)):
+async def upload_from_github(
+        repo_url: str,
+        branch: str = "main",
+        db: AsyncSession = Depends(get_db),
+        minio_client: MinioClient = Depends(get_minio_client),
+        github_client: GitHubClient = Depends(get_github_client),
+):
     """
     Загрузка и анализ репозиторий GitHub
 
     :param repo_url: URL репозитория GitHub
     :param branch: Имя ветки (по умолчанию "main")
     :param db: Сессия БД
+    :param minio_client: Общий клиент MinIO
+    :param github_client: Общий клиент GitHub
     :return: Статус загрузки и ID задачи
     """
-    try:
-        logger.info(f"Начало загрузки из GitHub: {repo_url} (ветка: {branch})")
-
-        minio_client = MinioClient(bucket_name=settings.MINIO_BUCKET_NAME)
-        github_client = GitHubClient()
-
-        zip_file = await github_client.download_repo_zip(repo_url, branch)
+    logger.info("Начало загрузки из GitHub: %s (ветка: %s)", repo_url, branch)
+    github_client.build_zip_url(repo_url, branch)
+    zip_name = _github_zip_name(repo_url, branch)
 
-        repo_path = repo_url.strip("/").split("github.com/")[-1]
-        user, repo = repo_path.split("/")[:2]
-        repo = repo.replace(".git", "")
-        zip_name = f"{user}-{repo}-{branch}.zip"
-
-        task_id = str(uuid4())
-
-        await minio_client.create_bucket()
-        await minio_client.upload_file(
-            file=zip_file,
-            file_name=str(f"{task_id}.zip"),
-            metadata={"original_filename": zip_name}
-        )
-
-        await reports_service.create_new_report(task_id, db)
-        asyncio.create_task(reports_service.run_report_generation(task_id))
+    task_id = str(uuid4())
+    try:
+        await reports_service.create_new_report(task_id, db, status=ReportStatus.UPLOADING)
+        await _import_github_archive(task_id, repo_url, branch, db, minio_client, github_client)
 
-        logger.info(f"Загрузка из GitHub завершена, ID задачи: {task_id}")
+        logger.info("Загрузка из GitHub завершена, ID задачи: %s", task_id)
         return {
             "message": f"Файлы из репозитория '{repo_url}' (ветка '{branch}') успешно загружены в MinIO.",
             "object_name": zip_name,
             "bucket": settings.MINIO_BUCKET_NAME,
             "task_id": task_id,
         }
+    except HTTPException:
+        raise
     except Exception as e:
         error_msg = f"Ошибка при загрузке из GitHub: {e}"
         logger.error(error_msg)
         raise HTTPException(status_code=500, detail=error_msg)
 
 
+@app.post('/batch/upload-from-github',
+          summary="Пакетная загрузка репозиториев из GitHub",
+          description="Загрузка нескольких репозиториев GitHub для анализа кода одним запросом",
+          response_description="Статус загрузки и ID задачи для каждого репозитория")
+async def batch_upload_from_github(
+        batch: BatchGitHubUpload,
+        db: AsyncSession = Depends(get_db),
+        minio_client: MinioClient = Depends(get_minio_client),
+        github_client: GitHubClient = Depends(get_github_client),
+):
+    """
+    Пакетная загрузка и анализ репозиториев GitHub
+
+    Записи отчётов создаются одним INSERT, архивы скачиваются параллельно
+    (не более BATCH_DOWNLOAD_CONCURRENCY одновременно). Ошибка одного
+    репозитория не прерывает остальные.
+
+    :param batch: Список репозиториев и веток
+    :param db: Сессия БД
+    :param minio_client: Общий клиент MinIO
+    :param github_client: Общий клиент GitHub
+    :return: Статус загрузки и ID задачи для каждого репозитория
+    """
+    logger.info("Начало пакетной загрузки из GitHub: %s репозиториев", len(batch.items))
+    tasks = []
+    for item in batch.items:
+        task = {"repo_url": item.repo_url, "branch": item.branch, "task_id": None, "status": None}
+        try:
+            github_client.build_zip_url(item.repo_url, item.branch)
+            task["task_id"] = str(uuid4())
+        except HTTPException as e:
+            task.update(status="ERROR", error=e.detail)
+        tasks.append(task)
+
+    accepted = [task for task in tasks if task["task_id"]]
+    try:
+        await reports_service.create_new_reports([task["task_id"] for task in accepted], db, status=ReportStatus.UPLOADING)
+    except Exception as e:
+        error_msg = f"Ошибка при пакетной загрузке из GitHub: {e}"
+        logger.error(error_msg)
+        raise HTTPException(status_code=500, detail=error_msg)
+
+    semaphore = asyncio.Semaphore(settings.BATCH_DOWNLOAD_CONCURRENCY)
+
+    async def import_one(task: dict):
+        async with semaphore, async_session_maker() as task_db:
+            try:
+                await _import_github_archive(
+                    task["task_id"], task["repo_url"], task["branch"], task_db, minio_client, github_client
+                )
+                task["status"] = "UPLOADED"
+            except Exception as e:
+                logger.error("Ошибка загрузки %s в пакете: %s", task['repo_url'], e)
+                task.update(status="ERROR", error=getattr(e, "detail", str(e)))
+
+    await asyncio.gather(*(import_one(task) for task in accepted))
+
+    logger.info("Пакетная загрузка из GitHub завершена: %s задач", len(accepted))
+    return {"bucket": settings.MINIO_BUCKET_NAME, "tasks": tasks}
+
+
+@app.post('/uploads',
+          summary="Начать загрузку частями",
+          description="Начать возобновляемую загрузку ZIP-архива частями (Максимальный размер архива: 16 GB)",
+          response_description="ID загрузки (совпадает с ID задачи), размер и число частей")
+async def init_upload(
+        upload: UploadInit,
+        db: AsyncSession = Depends(get_db),
+        minio_client: MinioClient = Depends(get_minio_client),
+):
+    """
+    Создание задачи и загрузки частями
+
+    Архив передаётся частями по part_size байт (последняя может быть меньше)
+    запросами PUT /uploads/{upload_id}/parts/{part_number} в любом порядке и
+    параллельно, затем собирается запросом POST /uploads/{upload_id}/complete.
+
+    :param upload: Имя и размер архива
+    :param db: Сессия БД
+    :param minio_client: Общий клиент MinIO
+    :return: Параметры загрузки
+    """
+    return await uploads_service.init(upload.filename, upload.size, db, minio_client)
+
+
+@app.get('/uploads/{upload_id}',
+         summary="Состояние загрузки частями",
+         description="Принятые и недостающие части: после обрыва досылаются только недостающие",
+         response_description="Параметры и прогресс загрузки")
+async def get_upload(
+        upload_id: str = Path(..., pattern=UUID_PATTERN, description="ID загрузки"),
+        db: AsyncSession = Depends(get_db),
+):
+    return await uploads_service.get(upload_id, db)
+
+
+@app.put('/uploads/{upload_id}/parts/{part_number}',
+         summary="Загрузить часть архива",
+         description="Тело запроса — байты части. Повторная отправка части заменяет прежнюю; "
+                     "после начала завершения загрузки части отклоняются с 409",
+         response_description="Размер и SHA-256 принятой части")
+async def put_upload_part(
+        request: Request,
+        upload_id: str = Path(..., pattern=UUID_PATTERN, description="ID загрузки"),
+        part_number: int = Path(..., ge=1, description="Номер части (с 1)"),
+        x_content_sha256: str | None = Header(None, description="SHA-256 части (hex) для проверки целостности"),
+        db: AsyncSession = Depends(get_db),
+        minio_client: MinioClient = Depends(get_minio_client),
+):
+    task_id_var.set(upload_id)
+    return await uploads_service.put_part(
+        upload_id, part_number, request.stream(), x_content_sha256, db, minio_client
+    )
+
+
+@app.post('/uploads/{upload_id}/complete',
+          summary="Завершить загрузку частями",
+          description="Собрать архив из частей, проверить его и поставить задачу в очередь",
+          response_description="ID задачи для отслеживания")
+async def complete_upload(
+        upload_id: str = Path(..., pattern=UUID_PATTERN, description="ID загрузки"),
+        db: AsyncSession = Depends(get_db),
+        minio_client: MinioClient = Depends(get_minio_client),
+):
+    task_id_var.set(upload_id)
+    result = await uploads_service.complete(upload_id, db, minio_client)
+    if not result["cached"]:
+        report_scheduler.notify()
+    return result
+
+
+@app.delete('/uploads/{upload_id}',
+            summary="Отменить загрузку частями",
+            description="Удалить принятые части; задача получает статус ERROR")
+async def abort_upload(
+        upload_id: str = Path(..., pattern=UUID_PATTERN, description="ID загрузки"),
+        db: AsyncSession = Depends(get_db),
+        minio_client: MinioClient = Depends(get_minio_client),
+):
+    await uploads_service.abort(upload_id, db, minio_client)
+    return {"task_id": upload_id, "status": ReportStatus.ERROR}
+
+
+@app.get('/reports',
+         summary="Получить статусы отчётов",
+         description="Получить статусы и результаты нескольких отчётов одним запросом",
+         response_description="Отчёты анализа кода")
+async def get_reports(
+        ids: str = Query(..., description="UUID отчётов через запятую"),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Получить отчёты анализа кода по списку ID задач.
+
+    :param ids: UUID отчётов через запятую
+    :param db: Сессия БД
+    :return: Найденные отчёты и список ненайденных ID
+    """
+    report_ids = list(dict.fromkeys(item.strip() for item in ids.split(",") if item.strip()))
+    if len(report_ids) > settings.BATCH_MAX_ITEMS:
+        error_msg = f"Слишком много ID в запросе (максимум {settings.BATCH_MAX_ITEMS})"
+        logger.error(error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+
+    invalid_ids = [report_id for report_id in report_ids if not re.match(UUID_PATTERN, report_id)]
+    report_ids = [report_id for report_id in report_ids if report_id not in invalid_ids]
+    try:
+        # Завершённые отчёты берутся из кэша готовыми байтами, из БД читаются только остальные
+        bodies = {report_id: report_cache.get(report_id) for report_id in report_ids}
+        states = await reports_service.get_report_states(
+            [report_id for report_id, body in bodies.items() if body is None], db
+        )
+        for report_id, state in states.items():
+            bodies[report_id] = dumps(state)
+            if state["status"] in TERMINAL_STATUSES:
+                report_cache.put(report_id, bodies[report_id])
+        found = [bodies[report_id] for report_id in report_ids if bodies[report_id] is not None]
+        not_found = [report_id for report_id in report_ids if bodies[report_id] is None] + invalid_ids
+
+        async def body():
+            # Ответ собирается из готовых отчётов по частям, без общего буфера
+            yield b'{"reports":['
+            for index, report in enumerate(found):
+                yield b"," + report if index else report
+            yield b'],"not_found":' + dumps(not_found) + b"}"
+
+        return StreamingResponse(body(), media_type="application/json")
+    except Exception as e:
+        error_msg = f"Ошибка при получении отчетов: {e}"
+        logger.error(error_msg)
+        raise HTTPException(status_code=500, detail=error_msg)
+
+
+@app.get('/reports/search',
+         summary="Поиск отчётов по показателям",
+         description="Завершённые отчёты с фильтрами по анализатору, покрытию и критическим проблемам",
+         response_description="Страница отчётов и курсор следующей страницы")
+async def search_reports(
+        analyzer: str | None = Query(None, description="Имя анализатора"),
+        status: ReportStatus | None = Query(None, description="Статус отчёта (SUCCESS или PARTIAL)"),
+        completed_from: datetime | None = Query(None, description="Завершён не раньше"),
+        completed_to: datetime | None = Query(None, description="Завершён раньше"),
+        min_coverage: float | None = Query(None, ge=0, le=100, description="Покрытие не меньше, %"),
+        max_coverage: float | None = Query(None, ge=0, le=100, description="Покрытие не больше, %"),
+        min_critical_bugs: int | None = Query(None, ge=0, description="Критических ошибок не меньше"),
+        min_critical_vulnerabilities: int | None = Query(None, ge=0, description="Критических уязвимостей не меньше"),
+        limit: int = Query(50, ge=1, le=settings.REPORT_SEARCH_MAX_LIMIT, description="Размер страницы"),
+        cursor: str | None = Query(None, description="Курсор следующей страницы"),
+        db: AsyncSession = Depends(get_db),
+):
+    """
+    Поиск отчётов по индексированным показателям анализаторов.
+
+    :return: Отчёты с показателями по анализаторам и next_cursor
+    """
+    return Response(
+        content=dumps(await report_metrics.search(
+            db,
+            analyzer=analyzer,
+            status=status,
+            completed_from=completed_from,
+            completed_to=completed_to,
+            min_coverage=min_coverage,
+            max_coverage=max_coverage,
+            min_critical_bugs=min_critical_bugs,
+            min_critical_vulnerabilities=min_critical_vulnerabilities,
+            limit=limit,
+            cursor=cursor,
+        )),
+        media_type="application/json",
+    )
+
+
+@app.get('/reports/stats',
+         summary="Сводная статистика отчётов",
+         description="Число отчётов, покрытие и проблемы по важности по каждому анализатору, "
+                     "при interval — с разбивкой по периодам",
+         response_description="Итоги и ряды по анализаторам")
+async def report_stats(
+        analyzer: str | None = Query(None, description="Имя анализатора"),
+        completed_from: datetime | None = Query(None, description="Завершён не раньше"),
+        completed_to: datetime | None = Query(None, description="Завершён раньше"),
+        interval: str | None = Query(None, pattern="^(day|week|month)$", description="Период: day, week или month"),
+        db: AsyncSession = Depends(get_db),
+):
+    """
+    Агрегаты по индексированным показателям анализаторов.
+
+    :return: Итоги по анализаторам и, при interval, ряды по периодам
+    """
+    return Response(
+        content=dumps(await report_metrics.aggregate(
+            db,
+            analyzer=analyzer,
+            completed_from=completed_from,
+            completed_to=completed_to,
+            interval=interval,
+        )),
+        media_type="application/json",
+    )
+
+
 @app.get('/reports/{report_id}',
          summary="Получить отчёт",
          description="Получить отчёт анализа кода по ID задачи",
          response_description="Отчёт анализа кода")
 async def get_report(
-        report_id: str = Path(..., regex=r'^[0-9a-f-]+$', description="UUID отчёта", example="5f8a3b7e-1234-11ec-b909-0242ac130002"),
+        report_id: str = Path(
+            ..., pattern=UUID_PATTERN, description="UUID отчёта", examples=["5f8a3b7e-1234-11ec-b909-0242ac130002"]
+        ),
+        wait: float = Query(0, ge=0, le=settings.REPORT_MAX_WAIT, description="Ожидать изменения статуса (секунды)"),
         db: AsyncSession = Depends(get_db)
 ):
     """
     Получить отчёт анализа кода по ID задачи.
 
+    При wait > 0 незавершённый отчёт возвращается после ближайшего изменения
+    статуса или по истечении wait секунд (long-polling).
+
     :param report_id: UUID отчёта
+    :param wait: Максимальное время ожидания изменения статуса
     :param db: Сессия БД
     :return: Статус и результаты анализа кода (если готовы)
     """
+    cached = report_cache.get(report_id)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    queue = report_events.subscribe(report_id) if wait else None
     try:
-        logger.info(f"Запрос отчета {report_id}")
-        query = select(Report).where(Report.id == report_id)
-        result = await db.execute(query)
-        report = result.scalar_one_or_none()
+        logger.info("Запрос отчета %s", report_id)
+        state = await reports_service.get_report_state(report_id, db)
 
-        if not report:
+        if not state:
             error_msg = f"Отчет {report_id} не найден"
             logger.error(error_msg)
             raise HTTPException(status_code=404, detail=error_msg)
 
-        results_data = json.loads(report.results) if report.results else None
+        if queue is not None and state["status"] not in TERMINAL_STATUSES:
+            # Освобождаем соединение с БД на время ожидания
+            await db.rollback()
+            try:
+                await asyncio.wait_for(queue.get(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                state = await reports_service.get_report_state(report_id, db)
 
-        if report.status == "IN_PROGRESS":
-            return {
-                "task_id": report.id,
-                "status": "IN_PROGRESS",
-                "message": "Отчет в процессе генерации"
-            }
-        logger.info(f"Отчет {report_id} успешно получен")
-        return {
-            "task_id": report.id,
-            "status": report.status,
-            "results": results_data,
-        }
+        logger.info("Отчет %s успешно получен", report_id)
+        if state["status"] in TERMINAL_STATUSES:
+            body = dumps(state)
+            report_cache.put(report_id, body)
+            return Response(content=body, media_type="application/json")
+        return state
+    except HTTPException:
+        raise
     except Exception as e:
         error_msg = f"Ошибка при получении отчета: {e}"
         logger.error(error_msg)
-        raise HTTPException(status_code=500, detail=error_msg)
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=error_msg)
+    finally:
+        if queue is not None:
+            report_events.unsubscribe(report_id, queue)
+
+
+@app.get('/reports/{report_id}/files',
+         summary="Файлы архива отчёта",
+         description="Метаданные файлов архива, собранные анализатором inspection",
+         response_description="Список файлов (не больше INSPECTION_MAX_FILES)")
+async def get_report_files(
+        report_id: str = Path(..., pattern=UUID_PATTERN, description="UUID отчёта"),
+        db: AsyncSession = Depends(get_db),
+        minio_client: MinioClient = Depends(get_minio_client),
+):
+    """
+    Список файлов архива с размерами, языком, числом строк и SHA-256
+
+    :param report_id: UUID отчёта
+    :param db: Сессия БД
+    :param minio_client: Клиент MinIO
+    :return: Список файлов архива
+    """
+    files = await reports_service.get_report_files(report_id, db, minio_client)
+    if files is None:
+        raise HTTPException(status_code=404, detail=f"Список файлов отчета {report_id} не найден")
+    return Response(content=files, media_type="application/json")
+
+
+@app.get('/reports/{report_id}/events',
+         summary="Подписка на отчёт (SSE)",
+         description="Поток изменений статуса отчёта в формате Server-Sent Events",
+         response_description="Поток событий text/event-stream")
+async def stream_report_events(
+        report_id: str = Path(..., pattern=UUID_PATTERN, description="UUID отчёта"),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Подписка на изменения отчёта через Server-Sent Events.
+    Поток закрывается после перехода отчёта в финальный статус.
+
+    :param report_id: UUID отчёта
+    :param db: Сессия БД
+    :return: Поток событий с состоянием отчёта
+    """
+    if await reports_service.get_report_state(report_id, db) is None:
+        error_msg = f"Отчет {report_id} не найден"
+        logger.error(error_msg)
+        raise HTTPException(status_code=404, detail=error_msg)
+
+    async def event_stream():
+        async for state in reports_service.watch_report(report_id):
+            if state is None:
+                yield b": keep-alive\n\n"
+            else:
+                yield b"event: report\ndata: " + dumps(state) + b"\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket('/ws/reports/{report_id}')
+async def report_events_websocket(websocket: WebSocket, report_id: str):
+    """
+    Подписка на изменения отчёта через WebSocket.
+    Соединение закрывается после перехода отчёта в финальный статус.
+
+    Сообщения клиента не используются, но сокет читается постоянно:
+    только так отключение клиента замечается сразу, и подписка вместе
+    с опросом БД снимается, не дожидаясь следующей отправки.
+
+    :param websocket: Соединение WebSocket
+    :param report_id: UUID отчёта
+    """
+    await websocket.accept()
+    if not re.match(UUID_PATTERN, report_id):
+        await websocket.close(code=4404)
+        return
+
+    async def send_states() -> bool:
+        found = False
+        async with aclosing(reports_service.watch_report(report_id)) as states:
+            async for state in states:
+                found = True
+                if state is not None:
+                    await websocket.send_text(dumps(state).decode())
+        return found
+
+    async def wait_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    sender = asyncio.create_task(send_states())
+    receiver = asyncio.create_task(wait_disconnect())
+    try:
+        await asyncio.wait((sender, receiver), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (sender, receiver):
+            task.cancel()
+        await asyncio.gather(sender, receiver, return_exceptions=True)
+
+    if sender.cancelled() or isinstance(sender.exception(), WebSocketDisconnect) or not receiver.cancelled():
+        logger.info("Клиент отключился от событий отчета %s", report_id)
+    elif sender.exception() is not None:
+        logger.error("Ошибка подписки на отчет %s: %s", report_id, sender.exception())
+        await websocket.close(code=1011)
+    else:
+        await websocket.close(code=1000 if sender.result() else 4404)
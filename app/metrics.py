@@ -0,0 +1,161 @@
+import time
+from typing import Callable
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Границы бакетов для длительных операций (загрузка, анализ), секунды
+LONG_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Длительность обработки HTTP-запроса",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Число обрабатываемых HTTP-запросов",
+)
+ZIP_VALIDATION_SECONDS = Histogram(
+    "zip_validation_duration_seconds",
+    "Длительность проверки структуры ZIP-архива",
+    buckets=LONG_BUCKETS,
+)
+STORAGE_UPLOAD_SECONDS = Histogram(
+    "storage_upload_duration_seconds",
+    "Длительность загрузки объекта в MinIO",
+    ["mode"],
+    buckets=LONG_BUCKETS,
+)
+STORAGE_UPLOAD_BYTES = Counter(
+    "storage_upload_bytes_total",
+    "Объём данных, загруженных в MinIO",
+    ["mode"],
+)
+STORAGE_UPLOAD_THROUGHPUT = Histogram(
+    "storage_upload_throughput_bytes_per_second",
+    "Скорость загрузки объекта в MinIO",
+    ["mode"],
+    buckets=tuple(mb * 1024 * 1024 for mb in (1, 5, 10, 25, 50, 100, 250, 500, 1000)),
+)
+GITHUB_DOWNLOAD_SECONDS = Histogram(
+    "github_download_duration_seconds",
+    "Длительность скачивания архива репозитория GitHub",
+    buckets=LONG_BUCKETS,
+)
+GITHUB_DOWNLOAD_BYTES = Counter(
+    "github_download_bytes_total",
+    "Объём скачанных архивов репозиториев GitHub",
+)
+ANALYZER_SECONDS = Histogram(
+    "analyzer_duration_seconds",
+    "Длительность работы анализатора",
+    ["analyzer", "status"],
+    buckets=LONG_BUCKETS,
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "Длительность выполнения SQL-запроса",
+    ["operation"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+REPORT_JOBS_IN_FLIGHT = Gauge(
+    "report_jobs_in_flight",
+    "Число задач генерации отчётов, выполняемых в этом процессе",
+)
+REPORT_QUEUE_DEPTH = Gauge(
+    "report_queue_depth",
+    "Число незавершённых отчётов по статусам",
+    ["status"],
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_requests_total",
+    "Запросы, отклонённые контролем допуска",
+    ["reason"],
+)
+UPLOAD_BYTES_IN_FLIGHT = Gauge(
+    "upload_bytes_in_flight",
+    "Объём архивов, загружаемых в данный момент в этом процессе",
+)
+
+
+class _CallbackCollector:
+    """Счётчики, значения которых читаются из объектов приложения при сборе метрик"""
+
+    def __init__(self):
+        self._counters: list[tuple[str, str, Callable[[], float]]] = []
+
+    def add(self, name: str, documentation: str, func: Callable[[], float]):
+        self._counters.append((name, documentation, func))
+
+    def collect(self):
+        for name, documentation, func in self._counters:
+            yield CounterMetricFamily(name, documentation, value=func())
+
+
+_callbacks = _CallbackCollector()
+REGISTRY.register(_callbacks)
+
+
+def register_counter(name: str, documentation: str, func: Callable[[], float]):
+    """
+    Регистрация счётчика, значение которого берётся из функции при сборе метрик
+
+    :param name: Имя метрики (без суффикса _total)
+    :param documentation: Описание метрики
+    :param func: Функция, возвращающая текущее значение
+    """
+    _callbacks.add(name, documentation, func)
+
+
+def instrument_engine(engine: AsyncEngine):
+    """
+    Замер длительности SQL-запросов через события SQLAlchemy
+
+    :param engine: Асинхронный движок БД
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = context._query_started
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else "UNKNOWN"
+        DB_QUERY_SECONDS.labels(operation).observe(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """ASGI-middleware замера длительности HTTP-запросов по шаблону маршрута"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status),
+            ).observe(time.perf_counter() - started)
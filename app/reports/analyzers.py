@@ -0,0 +1,275 @@
+import asyncio
+import inspect
+import time
+from concurrent.futures import Future
+from importlib import import_module
+from importlib.metadata import entry_points
+from typing import Callable, Dict, Iterator
+from app.config import settings
+from app.ext_services.sonarqube_mock import generate_sonarqube_report
+from app.ext_services.second_service_mock import generate_second_service_report
+from app.ext_services.third_service_mock import generate_third_service_report
+from app.metrics import ANALYZER_SECONDS
+from app.reports.extraction import ExtractedArchive, extraction_cache
+from app.reports.inspection import inspect_archive
+from app.reports.models import AnalyzerStatus
+from app.reports.process_pool import process_pool
+
+from app.logger_config import app_logger
+
+logger = app_logger.getChild(__name__)
+
+# Группа entry points, через которую сторонние пакеты добавляют анализаторы
+ENTRY_POINT_GROUP = "waveaccess.analyzers"
+
+# Параметры анализатора, которые можно переопределить в settings.ANALYZERS
+OPTIONS = ("concurrency", "timeout", "retries", "cpu_bound", "archive")
+
+# Что анализатор получает вторым аргументом: путь к ZIP-файлу или каталог с распакованными файлами
+ARCHIVE_MODES = ("zip", "files")
+
+
+def _run_coroutine(func: Callable, *args) -> Dict:
+    """Запуск асинхронного анализатора в дочернем процессе"""
+    return asyncio.run(func(*args))
+
+
+class Analyzer:
+    """
+    Анализатор и политика его запуска
+
+    :param name: Имя анализатора (ключ в результатах отчёта)
+    :param func: Функция func(task_id) -> dict (или func(task_id, path) при archive), синхронная или асинхронная
+    :param concurrency: Максимум одновременных запусков в процессе
+    :param timeout: Таймаут одного запуска в секундах
+    :param retries: Число повторов после ошибки или таймаута
+    :param cpu_bound: Выполнять в пуле процессов (функция должна импортироваться по имени)
+    :param archive: "zip" — передавать путь к архиву задачи, "files" — каталог с распакованными файлами
+    """
+
+    def __init__(
+            self,
+            name: str,
+            func: Callable,
+            concurrency: int = None,
+            timeout: float = None,
+            retries: int = None,
+            cpu_bound: bool = False,
+            archive: str = None,
+    ):
+        self.name = name
+        self.func = func
+        self.concurrency = settings.ANALYZER_DEFAULT_CONCURRENCY if concurrency is None else concurrency
+        self.timeout = settings.ANALYZER_DEFAULT_TIMEOUT if timeout is None else timeout
+        self.retries = settings.ANALYZER_DEFAULT_RETRIES if retries is None else retries
+        self.cpu_bound = cpu_bound
+        self.archive = archive
+        if self.concurrency < 1:
+            raise ValueError(f"Анализатор {name}: concurrency должен быть не меньше 1")
+        if self.timeout <= 0:
+            raise ValueError(f"Анализатор {name}: timeout должен быть больше 0")
+        if self.retries < 0:
+            raise ValueError(f"Анализатор {name}: retries не может быть отрицательным")
+        if archive is not None and archive not in ARCHIVE_MODES:
+            raise ValueError(f"Анализатор {name}: archive должен быть одним из {ARCHIVE_MODES}")
+        self.limit = asyncio.Semaphore(self.concurrency)
+
+    def __repr__(self):
+        return (
+            f"Analyzer({self.name!r}, concurrency={self.concurrency}, timeout={self.timeout}, "
+            f"retries={self.retries}, cpu_bound={self.cpu_bound}, archive={self.archive!r})"
+        )
+
+
+class AnalyzerRegistry:
+    """
+    Реестр анализаторов отчёта
+
+    Встроенные анализаторы регистрируются в коде, сторонние подключаются через
+    entry points группы waveaccess.analyzers или через settings.ANALYZERS
+    ({"имя": {"path": "pkg.module:func", ...}}). Там же переопределяются
+    concurrency, timeout, retries, cpu_bound и archive любого анализатора, а
+    "enabled": false отключает его. Необязательные встроенные анализаторы
+    (register_optional) запускаются, только если упомянуты в settings.ANALYZERS.
+
+    У каждого анализатора свой семафор, поэтому медленный анализатор
+    упирается в собственный лимит и не занимает слоты остальных. Архив задачи
+    реестр берёт из extraction_cache в основном процессе и передаёт
+    анализатору путь к нему: в дочернем процессе пула кэша и клиентов нет.
+    """
+
+    def __init__(self):
+        self._analyzers: Dict[str, Analyzer] = {}
+        self._optional: Dict[str, Analyzer] = {}
+        self._loaded = False
+
+    def register(self, name: str, func: Callable, **options) -> Analyzer:
+        """
+        Регистрация анализатора (повторная регистрация заменяет прежний)
+
+        :param name: Имя анализатора
+        :param func: Функция генерации отчёта
+        :param options: Параметры Analyzer
+        :return: Analyzer: Зарегистрированный анализатор
+        """
+        analyzer = Analyzer(name, func, **options)
+        self._analyzers[name] = analyzer
+        return analyzer
+
+    def register_optional(self, name: str, func: Callable, **options) -> Analyzer:
+        """
+        Регистрация анализатора, выключенного по умолчанию
+
+        Включается записью в settings.ANALYZERS, например {"inspection": {}}.
+
+        :param name: Имя анализатора
+        :param func: Функция генерации отчёта
+        :param options: Параметры Analyzer
+        :return: Analyzer: Зарегистрированный анализатор
+        """
+        analyzer = Analyzer(name, func, **options)
+        self._optional[name] = analyzer
+        return analyzer
+
+    def analyzer(self, name: str, **options) -> Callable[[Callable], Callable]:
+        """Декоратор регистрации анализатора"""
+        def decorator(func: Callable) -> Callable:
+            self.register(name, func, **options)
+            return func
+        return decorator
+
+    def __iter__(self) -> Iterator[Analyzer]:
+        self._load()
+        return iter(list(self._analyzers.values()))
+
+    def get(self, name: str) -> Analyzer | None:
+        self._load()
+        return self._analyzers.get(name)
+
+    def _load(self):
+        """Однократная загрузка entry points и применение settings.ANALYZERS"""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        if settings.ANALYZER_ENTRY_POINTS:
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                try:
+                    loaded = entry_point.load()
+                except Exception as e:
+                    logger.error("Не удалось загрузить анализатор %s: %s", entry_point.name, e)
+                    continue
+                if isinstance(loaded, Analyzer):
+                    self._analyzers[loaded.name] = loaded
+                else:
+                    self.register(entry_point.name, loaded)
+
+        for name, config in settings.ANALYZERS.items():
+            current = self._analyzers.get(name) or self._optional.get(name)
+            if not config.get("enabled", True):
+                self._analyzers.pop(name, None)
+                continue
+
+            if "path" in config:
+                module_name, _, attribute = config["path"].partition(":")
+                func = getattr(import_module(module_name), attribute)
+            elif current is not None:
+                func = current.func
+            else:
+                logger.error("Анализатор %s не зарегистрирован и не задан path", name)
+                continue
+
+            options = {option: getattr(current, option) for option in OPTIONS} if current else {}
+            options.update({option: config[option] for option in OPTIONS if option in config})
+            self.register(name, func, **options)
+
+        logger.info("Анализаторы: %s", ", ".join(map(repr, self._analyzers.values())))
+
+    async def run(self, analyzer: Analyzer, task_id: str) -> Dict:
+        """
+        Запуск анализатора с его лимитом, таймаутом и повторами
+
+        Слот семафора занимается на каждую попытку и не удерживается во время
+        паузы перед повтором. Запуск cpu_bound-анализатора в пуле процессов
+        прервать нельзя: после таймаута он доработает в фоне, поэтому его слот
+        освобождается только по завершении задачи в пуле, и зависшие запуски
+        не занимают больше concurrency процессов. Архив задачи удерживается
+        в кэше так же — до завершения задачи в пуле.
+
+        :param analyzer: Анализатор
+        :param task_id: ID задачи
+        :return: Dict: Отчёт анализатора
+        """
+        for attempt in range(analyzer.retries + 1):
+            await analyzer.limit.acquire()
+            started = time.perf_counter()
+            status = AnalyzerStatus.ERROR
+            job = None
+            entry = None
+            try:
+                args = (task_id,)
+                if analyzer.archive is not None:
+                    entry = await extraction_cache.hold(task_id, extract=analyzer.archive == "files")
+                    args += (entry.files_path if analyzer.archive == "files" else entry.archive_path,)
+                if analyzer.cpu_bound:
+                    job = self._submit(analyzer, args)
+                    call = asyncio.wrap_future(job)
+                else:
+                    call = self._call(analyzer, args)
+                results = await asyncio.wait_for(call, timeout=analyzer.timeout)
+                status = AnalyzerStatus.SUCCESS
+                return results
+            except asyncio.TimeoutError:
+                status = AnalyzerStatus.TIMEOUT
+                if attempt == analyzer.retries:
+                    raise
+            except Exception:
+                if attempt == analyzer.retries:
+                    raise
+            finally:
+                ANALYZER_SECONDS.labels(analyzer.name, status.value).observe(time.perf_counter() - started)
+                await self._release(analyzer, job, entry)
+
+            delay = settings.ANALYZER_RETRY_BACKOFF * 2 ** attempt
+            logger.warning(
+                "Анализатор %s для задачи %s будет повторен через %.1f с", analyzer.name, task_id, delay
+            )
+            await asyncio.sleep(delay)
+
+    async def _call(self, analyzer: Analyzer, args: tuple) -> Dict:
+        if inspect.iscoroutinefunction(analyzer.func):
+            return await analyzer.func(*args)
+        return await asyncio.to_thread(analyzer.func, *args)
+
+    def _submit(self, analyzer: Analyzer, args: tuple) -> Future:
+        if inspect.iscoroutinefunction(analyzer.func):
+            return process_pool.get().submit(_run_coroutine, analyzer.func, *args)
+        return process_pool.get().submit(analyzer.func, *args)
+
+    @staticmethod
+    async def _release(analyzer: Analyzer, job: Future | None, entry: ExtractedArchive | None):
+        """Освобождение слота и архива анализатора; для работающей задачи пула — по её завершении"""
+        async def release():
+            analyzer.limit.release()
+            if entry is not None:
+                await extraction_cache.release(entry)
+
+        if job is None or job.done() or job.cancel():
+            await release()
+            return
+        loop = asyncio.get_running_loop()
+
+        def on_done(_):
+            if not loop.is_closed():
+                asyncio.run_coroutine_threadsafe(release(), loop)
+
+        job.add_done_callback(on_done)
+
+
+analyzer_registry = AnalyzerRegistry()
+analyzer_registry.register("sonarqube", generate_sonarqube_report, concurrency=4, timeout=90.0)
+analyzer_registry.register("second_service", generate_second_service_report)
+analyzer_registry.register("third_service", generate_third_service_report)
+analyzer_registry.register_optional(
+    "inspection", inspect_archive, concurrency=2, timeout=settings.INSPECTION_TIMEOUT, archive="zip"
+)
@@ -0,0 +1,98 @@
+import time
+from collections import OrderedDict
+from app.config import settings
+from app.metrics import register_counter
+from app.reports.events import report_events
+
+from app.logger_config import app_logger
+
+logger = app_logger.getChild(__name__)
+
+
+class ReportCache:
+    """
+    LRU/TTL-кэш сериализованных ответов для завершённых отчётов
+
+    Хранит готовые байты JSON-ответа, поэтому повторное чтение не обращается
+    к БД и не кодирует JSON заново. Записи сбрасываются по любому событию
+    report_events для отчёта, по истечении TTL и при превышении объёма.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, report_id: str) -> bytes | None:
+        """
+        Получение ответа из кэша
+
+        :param report_id: ID отчёта
+        :return: bytes | None: Сериализованный ответ
+        """
+        entry = self._entries.get(report_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, body = entry
+        if expires_at < time.monotonic():
+            self._remove(report_id)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(report_id)
+        self.hits += 1
+        return body
+
+    def put(self, report_id: str, body: bytes):
+        """
+        Сохранение ответа в кэш с вытеснением самых старых записей
+
+        :param report_id: ID отчёта
+        :param body: Сериализованный ответ
+        """
+        if len(body) > self._max_bytes:
+            return
+        self._remove(report_id)
+        self._entries[report_id] = (time.monotonic() + self._ttl, body)
+        self._size += len(body)
+
+        while self._size > self._max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, report_id: str):
+        self._remove(report_id)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, report_id: str):
+        entry = self._entries.pop(report_id, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+    def _on_event(self, event: dict):
+        self.invalidate(event["id"])
+
+
+report_cache = ReportCache(
+    max_bytes=settings.REPORT_CACHE_MAX_BYTES,
+    ttl=settings.REPORT_CACHE_TTL,
+)
+report_events.add_handler(report_cache._on_event)
+register_counter("report_cache_hits", "Попадания в кэш отчётов", lambda: report_cache.hits)
+register_counter("report_cache_misses", "Промахи кэша отчётов", lambda: report_cache.misses)
+register_counter("report_cache_evictions", "Вытеснения из кэша отчётов", lambda: report_cache.evictions)
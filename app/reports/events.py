@@ -0,0 +1,137 @@
+import asyncio
+import json
+from collections import defaultdict
+from typing import Callable, Dict
+import asyncpg
+from sqlalchemy import ARRAY, Text, bindparam, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+
+from app.logger_config import app_logger
+
+logger = app_logger.getChild(__name__)
+
+
+class ReportEvents:
+    """
+    Pub/sub изменений статуса отчётов
+
+    Событие публикуется через pg_notify в той же транзакции, что и изменение
+    статуса, поэтому доставляется только после коммита. Каждый процесс слушает
+    канал через LISTEN и раздаёт события локальным подписчикам (SSE, WebSocket,
+    long-polling) и обработчикам, так что подписка работает между репликами.
+    """
+
+    CHANNEL = "report_events"
+
+    def __init__(self):
+        self._subscribers: Dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._handlers: list[Callable[[dict], None]] = []
+        self._listener: asyncio.Task | None = None
+
+    async def start(self):
+        """Запуск фонового прослушивания канала Postgres"""
+        self._listener = asyncio.create_task(self._listen(), name="report-events-listener")
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    def add_handler(self, handler: Callable[[dict], None]):
+        """
+        Регистрация обработчика всех событий (вызывается в event loop)
+
+        :param handler: Функция, принимающая событие
+        """
+        self._handlers.append(handler)
+
+    def subscribe(self, report_id: str) -> asyncio.Queue:
+        """
+        Подписка на события отчёта
+
+        :param report_id: ID отчёта
+        :return: asyncio.Queue: Очередь событий (освобождается через unsubscribe)
+        """
+        queue = asyncio.Queue(maxsize=settings.REPORT_EVENTS_QUEUE_SIZE)
+        self._subscribers[report_id].add(queue)
+        return queue
+
+    def unsubscribe(self, report_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(report_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[report_id]
+
+    async def publish(self, db: AsyncSession, report_id: str, status: str, **extra):
+        """
+        Публикация события в текущей транзакции
+
+        :param db: Сессия БД с открытой транзакцией
+        :param report_id: ID отчёта
+        :param status: Новый статус отчёта или анализатора
+        :param extra: Дополнительные поля события (например, analyzer)
+        """
+        payload = json.dumps({"id": report_id, "status": status, **extra})
+        await db.execute(select(func.pg_notify(self.CHANNEL, payload)))
+
+    async def publish_many(self, db: AsyncSession, events: list[dict]):
+        """
+        Публикация нескольких событий одним запросом в текущей транзакции
+
+        :param db: Сессия БД с открытой транзакцией
+        :param events: События с полями id и status
+        """
+        if not events:
+            return
+        payload = func.unnest(
+            bindparam("payloads", [json.dumps(event) for event in events], type_=ARRAY(Text))
+        ).column_valued("payload")
+        await db.execute(select(func.pg_notify(self.CHANNEL, payload)))
+
+    def dispatch(self, event: dict):
+        """Раздача события локальным подписчикам и обработчикам"""
+        for handler in self._handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                logger.error("Ошибка обработчика событий отчетов: %s", e)
+
+        for queue in self._subscribers.get(event["id"], ()):
+            if queue.full():
+                # Медленному подписчику достаточно последнего события
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            self.dispatch(json.loads(payload))
+        except (ValueError, KeyError) as e:
+            logger.warning("Некорректное событие отчета: %s", e)
+
+    async def _listen(self):
+        """Поддержание LISTEN-соединения с переподключением при обрыве"""
+        dsn = settings.POSTGRES_URL.replace("postgresql+asyncpg://", "postgresql://")
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(self.CHANNEL, self._on_notify)
+                logger.info("Подписка на канал %s установлена", self.CHANNEL)
+                while not connection.is_closed():
+                    await asyncio.sleep(settings.REPORT_EVENTS_RECONNECT_INTERVAL)
+                logger.warning("Соединение с каналом %s потеряно", self.CHANNEL)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Ошибка подписки на канал %s: %s", self.CHANNEL, e)
+                await asyncio.sleep(settings.REPORT_EVENTS_RECONNECT_INTERVAL)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+
+report_events = ReportEvents()
@@ -0,0 +1,230 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from sqlalchemy import select
+from app.config import settings
+from app.database import async_session_maker
+from app.files.clients import clients
+from app.files.files_utils import check_zip_structure
+from app.metrics import register_counter
+from app.reports.models import Report
+
+from app.logger_config import app_logger
+
+logger = app_logger.getChild(__name__)
+
+
+class ExtractedArchive:
+    """
+    Архив в локальном каталоге кэша
+
+    :param archive_path: Путь к ZIP-файлу (только для чтения)
+    :param files_path: Каталог с распакованными файлами (None, пока не распакован)
+    """
+
+    def __init__(self, object_name: str, root: str):
+        self.object_name = object_name
+        self.root = root
+        self.archive_path = os.path.join(root, "archive.zip")
+        self.files_path: str | None = None
+        self.size = 0
+        self.refs = 0
+        self._extract_lock = asyncio.Lock()
+
+
+class ExtractionCache:
+    """
+    Общий для анализаторов кэш скачанных и распакованных архивов
+
+    Архив скачивается из MinIO один раз на объект (после дедупликации одинаковые
+    архивы разных задач — один объект) и при необходимости распаковывается один
+    раз; реестр анализаторов захватывает его через hold и передаёт анализаторам
+    с archive="zip" путь к архиву, а с archive="files" — каталог распакованных
+    файлов. Анализаторы работают с локальными файлами только на чтение. Пока архив используется (refs > 0), он не
+    удаляется; неиспользуемые архивы вытесняются в порядке LRU, когда общий
+    объём превышает EXTRACTION_CACHE_MAX_BYTES.
+
+    Кэш принадлежит процессу: каждый процесс ведёт свой подкаталог.
+    """
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, ExtractedArchive] = OrderedDict()
+        self._loading: dict[str, asyncio.Task] = {}
+        self._root: str | None = None
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_root(self) -> str:
+        if self._root is None:
+            base = settings.EXTRACTION_CACHE_DIR or os.path.join(
+                settings.SCRATCH_DIR or tempfile.gettempdir(), "waveaccess-extraction"
+            )
+            os.makedirs(base, exist_ok=True)
+            self._remove_stale(base)
+            self._root = os.path.join(base, str(os.getpid()))
+            os.makedirs(self._root, exist_ok=True)
+        return self._root
+
+    @staticmethod
+    def _remove_stale(base: str):
+        """Удаление каталогов завершившихся процессов"""
+        for name in os.listdir(base):
+            if not name.isdigit():
+                continue
+            try:
+                os.kill(int(name), 0)
+            except ProcessLookupError:
+                shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+            except PermissionError:
+                pass
+
+    @asynccontextmanager
+    async def acquire(self, task_id: str, extract: bool = True) -> AsyncIterator[ExtractedArchive]:
+        """
+        Архив задачи на время работы анализатора
+
+        :param task_id: ID задачи
+        :param extract: Распаковать архив в files_path
+        :return: ExtractedArchive: Локальная копия архива
+        """
+        entry = await self.hold(task_id, extract)
+        try:
+            yield entry
+        finally:
+            await self.release(entry)
+
+    async def hold(self, task_id: str, extract: bool = True) -> ExtractedArchive:
+        """
+        Захват архива задачи без контекстного менеджера
+
+        Нужен, когда архив должен пережить вызывающую корутину (задача в пуле
+        процессов после таймаута); каждый hold парный вызову release.
+
+        :param task_id: ID задачи
+        :param extract: Распаковать архив в files_path
+        :return: ExtractedArchive: Локальная копия архива
+        """
+        object_name = await self.object_name(task_id)
+        while True:
+            entry = await self._get(object_name)
+            # Пока задача ждала скачивания, архив мог быть уже вытеснен
+            if self._entries.get(object_name) is entry:
+                break
+        entry.refs += 1
+        try:
+            if extract:
+                await self._extract(entry)
+        except BaseException:
+            await self.release(entry)
+            raise
+        return entry
+
+    async def release(self, entry: ExtractedArchive):
+        """Освобождение архива, захваченного через hold"""
+        entry.refs -= 1
+        await self._evict()
+
+    async def object_name(self, task_id: str) -> str:
+        """
+        Имя объекта архива задачи в бакете
+
+        :param task_id: ID задачи
+        :return: str: Имя объекта (после дедупликации — общее для одинаковых архивов)
+        """
+        async with async_session_maker() as db:
+            object_name = (await db.execute(
+                select(Report.object_name).where(Report.id == task_id)
+            )).scalar()
+        return object_name or f"{task_id}.zip"
+
+    async def _get(self, object_name: str) -> ExtractedArchive:
+        entry = self._entries.get(object_name)
+        if entry is not None:
+            self._entries.move_to_end(object_name)
+            self.hits += 1
+            return entry
+
+        # Одновременные запросы одного архива ждут одно скачивание
+        loading = self._loading.get(object_name)
+        if loading is None:
+            self.misses += 1
+            loading = asyncio.create_task(self._download(object_name))
+            self._loading[object_name] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(object_name, None))
+        else:
+            self.hits += 1
+        return await asyncio.shield(loading)
+
+    async def _download(self, object_name: str) -> ExtractedArchive:
+        root = await asyncio.to_thread(tempfile.mkdtemp, dir=self._get_root())
+        entry = ExtractedArchive(object_name, root)
+        started = time.perf_counter()
+        try:
+            await clients.minio.download_file(object_name, entry.archive_path)
+        except BaseException:
+            await asyncio.to_thread(shutil.rmtree, root, True)
+            raise
+        entry.size = os.path.getsize(entry.archive_path)
+        self._entries[object_name] = entry
+        self._size += entry.size
+        logger.info("Архив %s загружен в кэш за %.2f с", object_name, time.perf_counter() - started)
+        return entry
+
+    async def _extract(self, entry: ExtractedArchive):
+        async with entry._extract_lock:
+            if entry.files_path is not None:
+                return
+            files_path = os.path.join(entry.root, "files")
+
+            def extract() -> int:
+                with open(entry.archive_path, "rb") as file:
+                    if not check_zip_structure(file):
+                        raise ValueError(f"Архив {entry.object_name} поврежден или превышает допустимые размеры")
+                    try:
+                        with zipfile.ZipFile(file) as archive:
+                            archive.extractall(files_path)
+                            return sum(item.file_size for item in archive.infolist())
+                    except BaseException:
+                        shutil.rmtree(files_path, ignore_errors=True)
+                        raise
+
+            extracted = await asyncio.to_thread(extract)
+            entry.files_path = files_path
+            entry.size += extracted
+            self._size += extracted
+
+    async def _evict(self):
+        """Удаление неиспользуемых архивов, пока объём кэша больше допустимого"""
+        for object_name in list(self._entries):
+            if self._size <= self._max_bytes:
+                break
+            entry = self._entries[object_name]
+            if entry.refs:
+                continue
+            del self._entries[object_name]
+            self._size -= entry.size
+            self.evictions += 1
+            await asyncio.to_thread(shutil.rmtree, entry.root, True)
+
+    def clear(self):
+        """Удаление всех архивов процесса (при остановке)"""
+        if self._root is not None:
+            shutil.rmtree(self._root, ignore_errors=True)
+            self._root = None
+        self._entries.clear()
+        self._size = 0
+
+
+extraction_cache = ExtractionCache(max_bytes=settings.EXTRACTION_CACHE_MAX_BYTES)
+register_counter("extraction_cache_hits", "Попадания в кэш распакованных архивов", lambda: extraction_cache.hits)
+register_counter("extraction_cache_misses", "Промахи кэша распакованных архивов", lambda: extraction_cache.misses)
+register_counter("extraction_cache_evictions", "Вытеснения из кэша распакованных архивов", lambda: extraction_cache.evictions)
@@ -0,0 +1,134 @@
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.files.github_client import GitHubClient
+from app.files.minio_client import MinioClient
+from app.metrics import register_counter
+from app.reports.models import GitHubArchive, GitHubRef
+from app.reports.reports_service import reports_service
+
+from app.logger_config import app_logger
+
+logger = app_logger.getChild(__name__)
+
+
+class GitHubArchiveCache:
+    """
+    Кэш архивов репозиториев GitHub по коммитам
+
+    Перед скачиванием ветка разрешается в SHA головного коммита условным
+    запросом к API (If-None-Match с ETag прошлого ответа). Архив коммита
+    неизменен, поэтому для уже загруженной пары репозиторий + SHA архив не
+    скачивается повторно: задача получает объект, уже лежащий в бакете.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    async def resolve_commit(
+            self,
+            repo_url: str,
+            branch: str,
+            db: AsyncSession,
+            github_client: GitHubClient,
+    ) -> str | None:
+        """
+        SHA головного коммита ветки с ревалидацией по ETag
+
+        :param repo_url: URL репозитория GitHub
+        :param branch: Имя ветки
+        :param db: Сессия БД
+        :param github_client: Клиент GitHub
+        :return: str | None: SHA коммита или None, если его не удалось получить
+        """
+        if not settings.GITHUB_RESOLVE_COMMITS:
+            return None
+        repo = self._key(github_client, repo_url)
+        known = await db.get(GitHubRef, (repo, branch))
+        try:
+            commit_sha, etag = await github_client.resolve_commit(repo_url, branch, known.etag if known else None)
+        except Exception as e:
+            # Без SHA архив скачивается по ветке, как раньше
+            logger.warning("Не удалось получить коммит ветки %s репозитория %s: %s", branch, repo, e)
+            await db.commit()
+            return None
+
+        if commit_sha is None:
+            self.not_modified += 1
+            commit_sha = known.commit_sha
+        values = dict(commit_sha=commit_sha, etag=etag, checked_at=func.now())
+        await db.execute(
+            pg_insert(GitHubRef)
+            .values(repo=repo, branch=branch, **values)
+            .on_conflict_do_update(index_elements=[GitHubRef.repo, GitHubRef.branch], set_=values)
+        )
+        await db.commit()
+        logger.info("Ветка %s репозитория %s: коммит %s", branch, repo, commit_sha)
+        return commit_sha
+
+    async def find(
+            self,
+            repo_url: str,
+            commit_sha: str,
+            db: AsyncSession,
+            github_client: GitHubClient,
+            minio_client: MinioClient,
+    ) -> GitHubArchive | None:
+        """
+        Архив коммита, объект которого ещё есть в бакете
+
+        :param repo_url: URL репозитория GitHub
+        :param commit_sha: SHA коммита
+        :param db: Сессия БД
+        :param github_client: Клиент GitHub
+        :param minio_client: Клиент MinIO
+        :return: GitHubArchive | None: Запись архива
+        """
+        archive = await db.get(GitHubArchive, (self._key(github_client, repo_url), commit_sha))
+        # Объект мог быть удалён очисткой устаревших отчётов
+        if archive is None or await reports_service.find_stored_object(archive.content_hash, db, minio_client) is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return archive
+
+    async def remember(
+            self,
+            repo_url: str,
+            commit_sha: str,
+            content_hash: str,
+            size: int,
+            db: AsyncSession,
+            github_client: GitHubClient,
+    ):
+        """
+        Запись архива коммита после загрузки в бакет
+
+        :param repo_url: URL репозитория GitHub
+        :param commit_sha: SHA коммита
+        :param content_hash: SHA-256 архива
+        :param size: Размер архива
+        :param db: Сессия БД
+        :param github_client: Клиент GitHub
+        """
+        values = dict(content_hash=content_hash, size=size, created_at=func.now())
+        await db.execute(
+            pg_insert(GitHubArchive)
+            .values(repo=self._key(github_client, repo_url), commit_sha=commit_sha, **values)
+            .on_conflict_do_update(index_elements=[GitHubArchive.repo, GitHubArchive.commit_sha], set_=values)
+        )
+        await db.commit()
+
+    @staticmethod
+    def _key(github_client: GitHubClient, repo_url: str) -> str:
+        # GitHub не различает регистр в именах владельца и репозитория
+        return github_client.repo_name(repo_url).lower()
+
+
+github_archives = GitHubArchiveCache()
+register_counter("github_archive_cache_hits", "Архивы коммитов GitHub, взятые из бакета", lambda: github_archives.hits)
+register_counter("github_archive_cache_misses", "Архивы коммитов GitHub, скачанные заново", lambda: github_archives.misses)
+register_counter("github_ref_not_modified", "Ответы 304 GitHub API на проверку ветки", lambda: github_archives.not_modified)
@@ -0,0 +1,84 @@
+import asyncio
+import gzip
+import io
+from typing import Dict
+from app.config import settings
+from app.files.clients import clients
+from app.files.files_utils import check_zip_structure
+from app.files.inspection import inspect_entries, plan_batches, summarize
+from app.reports.extraction import extraction_cache
+from app.reports.process_pool import process_pool
+from app.serialization import dumps
+
+from app.logger_config import app_logger
+
+logger = app_logger.getChild(__name__)
+
+
+def files_object_name(object_name: str) -> str:
+    """
+    Имя объекта со списком файлов архива
+
+    Список зависит только от содержимого архива, поэтому хранится по имени
+    объекта архива и общий у отчётов, переиспользующих этот архив.
+
+    :param object_name: Имя объекта архива в бакете
+    :return: str: Имя объекта JSON.gz со списком файлов
+    """
+    return f"{settings.INSPECTION_FILES_PREFIX}/{object_name}.json.gz"
+
+
+class ArchiveInspector:
+    """
+    Разбор содержимого архива задачи в пуле процессов
+
+    Архив из общего кэша extraction_cache передаёт реестр анализаторов, файлы делятся на пачки
+    по INSPECTION_BATCH_SIZE распакованных байт, и каждая пачка распаковывается
+    и обрабатывается в общем пуле процессов process_pool, так что разбор
+    занимает все ядра, а event loop только ждёт результатов.
+
+    В результаты отчёта попадает только сводка; список файлов сохраняется
+    в бакет отдельным объектом и отдаётся через GET /reports/{id}/files.
+    """
+
+    async def inspect(self, task_id: str, path: str) -> Dict:
+        """
+        Сводка по языкам; метаданные файлов сохраняются в бакет
+
+        :param task_id: ID задачи
+        :param path: Путь к архиву задачи в кэше
+        :return: Dict: Сводка и признак усечения списка файлов (не больше INSPECTION_MAX_FILES)
+        """
+        loop = asyncio.get_running_loop()
+        pool = process_pool.get()
+
+        with open(path, "rb") as archive:
+            if not await asyncio.to_thread(check_zip_structure, archive):
+                raise ValueError(f"Архив задачи {task_id} поврежден или превышает допустимые размеры")
+
+        batches = await loop.run_in_executor(pool, plan_batches, path, settings.INSPECTION_BATCH_SIZE)
+        inspected = await asyncio.gather(*(
+            loop.run_in_executor(pool, inspect_entries, path, batch)
+            for batch in batches
+        ))
+
+        files = [item for batch in inspected for item in batch]
+        summary = await asyncio.to_thread(summarize, files)
+        data = await asyncio.to_thread(lambda: gzip.compress(dumps(files[:settings.INSPECTION_MAX_FILES])))
+        object_name = await extraction_cache.object_name(task_id)
+        await clients.minio.upload_file(file=io.BytesIO(data), file_name=files_object_name(object_name))
+        logger.info(
+            "Архив задачи %s разобран: %s файлов в %s пачках", task_id, len(files), len(batches)
+        )
+        return {
+            "summary": summary,
+            "truncated": len(files) > settings.INSPECTION_MAX_FILES,
+        }
+
+
+archive_inspector = ArchiveInspector()
+
+
+async def inspect_archive(task_id: str, path: str) -> Dict:
+    """Анализатор "inspection": разбор содержимого архива задачи"""
+    return await archive_inspector.inspect(task_id, path)
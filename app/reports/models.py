@@ -1,9 +1,174 @@
-from sqlalchemy import JSON, String
+import enum
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Enum, Float, ForeignKey, Index, Integer, LargeBinary, String, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from app.database import Base
 
 
+class ReportStatus(str, enum.Enum):
+    UPLOADING = "UPLOADING"
+    PENDING = "PENDING"
+    IN_PROGRESS = "IN_PROGRESS"
+    SUCCESS = "SUCCESS"
+    PARTIAL = "PARTIAL"
+    ERROR = "ERROR"
+
+
+class AnalyzerStatus(str, enum.Enum):
+    IN_PROGRESS = "IN_PROGRESS"
+    SUCCESS = "SUCCESS"
+    ERROR = "ERROR"
+    TIMEOUT = "TIMEOUT"
+
+
 class Report(Base):
-    id: Mapped[str] = mapped_column(String, primary_key=True)
-    status: Mapped[str] = mapped_column(String, nullable=False)
-    results: Mapped[JSON] = mapped_column(JSON, nullable=True)
\ No newline at end of file
+    __table_args__ = (
+        # Выборка очереди генерации: status = PENDING ORDER BY next_run_at
+        Index("ix_reports_status_next_run_at", "status", "next_run_at"),
+        Index("ix_reports_status_created_at", "status", "created_at"),
+        Index("ix_reports_content_hash_completed_at", "content_hash", "completed_at"),
+    )
+
+    id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True)
+    status: Mapped[ReportStatus] = mapped_column(
+        Enum(ReportStatus, name="report_status"), nullable=False
+    )
+    results: Mapped[dict] = mapped_column(JSONB, nullable=True)
+    # Большие результаты: JSON, сжатый zstd (results при этом NULL)
+    results_blob: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
+    uploaded_bytes: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+    # Адресация архива по содержимому (SHA-256) для дедупликации
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=True)
+    object_name: Mapped[str] = mapped_column(String, nullable=True)
+    completed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Состояние задачи в очереди генерации
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    next_run_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    lease_expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+
+
+class AnalyzerResult(Base):
+    """Результат отдельного анализатора, сохраняемый сразу по его завершении"""
+    report_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), ForeignKey("reports.id", ondelete="CASCADE"), primary_key=True
+    )
+    analyzer: Mapped[str] = mapped_column(String, primary_key=True)
+    status: Mapped[AnalyzerStatus] = mapped_column(
+        Enum(AnalyzerStatus, name="analyzer_status"), nullable=False
+    )
+    results: Mapped[dict] = mapped_column(JSONB, nullable=True)
+    error: Mapped[str] = mapped_column(Text, nullable=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class UploadSession(Base):
+    """Возобновляемая загрузка архива частями, отображённая на multipart-загрузку S3"""
+    __table_args__ = (
+        Index("ix_uploadsessions_expires_at", "expires_at"),
+    )
+
+    # Совпадает с ID задачи (отчёт создаётся в статусе UPLOADING)
+    id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), ForeignKey("reports.id", ondelete="CASCADE"), primary_key=True
+    )
+    upload_id: Mapped[str] = mapped_column(String, nullable=False)
+    object_name: Mapped[str] = mapped_column(String, nullable=False)
+    filename: Mapped[str] = mapped_column(String, nullable=False)
+    total_size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    part_size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # Аренда завершения: пока она не истекла, загрузку собирает другой запрос
+    completing_until: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class UploadPart(Base):
+    """Принятая часть возобновляемой загрузки"""
+    session_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), ForeignKey("uploadsessions.id", ondelete="CASCADE"), primary_key=True
+    )
+    part_number: Mapped[int] = mapped_column(Integer, primary_key=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    etag: Mapped[str] = mapped_column(String, nullable=False)
+    uploaded_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class GitHubRef(Base):
+    """Последний известный головной коммит ветки и ETag ответа GitHub API"""
+    repo: Mapped[str] = mapped_column(String, primary_key=True)
+    branch: Mapped[str] = mapped_column(String, primary_key=True)
+    commit_sha: Mapped[str] = mapped_column(String(40), nullable=False)
+    etag: Mapped[str] = mapped_column(String, nullable=True)
+    checked_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class GitHubArchive(Base):
+    """Архив коммита репозитория, уже сохранённый в бакете (по содержимому)"""
+    repo: Mapped[str] = mapped_column(String, primary_key=True)
+    commit_sha: Mapped[str] = mapped_column(String(40), primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class ReportMetric(Base):
+    """
+    Сводные показатели анализатора по завершённому отчёту
+
+    Заполняется при сохранении результатов, чтобы фильтры и агрегаты по отчётам
+    выполнялись по индексированным колонкам, а не разбором results.
+    """
+    __table_args__ = (
+        Index("ix_reportmetrics_completed_at", "completed_at"),
+        Index("ix_reportmetrics_analyzer_completed_at", "analyzer", "completed_at"),
+        Index(
+            "ix_reportmetrics_vulnerabilities_critical",
+            "vulnerabilities_critical",
+            "completed_at",
+            postgresql_where=text("vulnerabilities_critical > 0"),
+        ),
+    )
+
+    report_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), ForeignKey("reports.id", ondelete="CASCADE"), primary_key=True
+    )
+    analyzer: Mapped[str] = mapped_column(String, primary_key=True)
+    status: Mapped[ReportStatus] = mapped_column(
+        Enum(ReportStatus, name="report_status"), nullable=False
+    )
+    completed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    coverage: Mapped[float] = mapped_column(Float, nullable=True)
+    bugs_total: Mapped[int] = mapped_column(Integer, nullable=True)
+    bugs_critical: Mapped[int] = mapped_column(Integer, nullable=True)
+    bugs_major: Mapped[int] = mapped_column(Integer, nullable=True)
+    bugs_minor: Mapped[int] = mapped_column(Integer, nullable=True)
+    vulnerabilities_total: Mapped[int] = mapped_column(Integer, nullable=True)
+    vulnerabilities_critical: Mapped[int] = mapped_column(Integer, nullable=True)
+    vulnerabilities_major: Mapped[int] = mapped_column(Integer, nullable=True)
+    vulnerabilities_minor: Mapped[int] = mapped_column(Integer, nullable=True)
+    code_smells_total: Mapped[int] = mapped_column(Integer, nullable=True)
+    code_smells_critical: Mapped[int] = mapped_column(Integer, nullable=True)
+    code_smells_major: Mapped[int] = mapped_column(Integer, nullable=True)
+    code_smells_minor: Mapped[int] = mapped_column(Integer, nullable=True)
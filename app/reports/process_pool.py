@@ -0,0 +1,33 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from app.config import settings
+
+
+class ProcessPool:
+    """
+    Общий пул процессов для CPU-bound работы (разбор архивов, cpu_bound-анализаторы)
+
+    Один пул на процесс приложения размером PROCESS_POOL_WORKERS, чтобы
+    разбор архивов и анализаторы вместе не занимали больше процессов, чем ядер.
+    """
+
+    def __init__(self):
+        self._pool: ProcessPoolExecutor | None = None
+
+    def get(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: дочерние процессы не наследуют потоки и соединения родителя
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.PROCESS_POOL_WORKERS or os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+process_pool = ProcessPool()
@@ -0,0 +1,256 @@
+import base64
+from datetime import datetime
+from typing import Dict
+from fastapi import HTTPException, status as http_status
+from sqlalchemy import delete, func, insert, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.reports.models import ReportMetric, ReportStatus
+from app.serialization import dumps, loads
+
+from app.logger_config import app_logger
+
+logger = app_logger.getChild(__name__)
+
+CATEGORIES = ("bugs", "vulnerabilities", "code_smells")
+SEVERITIES = ("total", "critical", "major", "minor")
+COUNT_COLUMNS = tuple(f"{category}_{severity}" for category in CATEGORIES for severity in SEVERITIES)
+
+
+class ReportMetricsService:
+    """
+    Индексированные показатели отчётов: покрытие и число проблем по важности
+
+    Строки reportmetrics (по одной на анализатор) пишутся в той же транзакции,
+    что и результаты отчёта, поэтому поиск и агрегаты не читают results.
+    """
+
+    @staticmethod
+    def extract(results: Dict | None) -> Dict[str, Dict]:
+        """
+        Показатели анализаторов из результатов отчёта
+
+        Анализаторы без покрытия и счётчиков проблем пропускаются.
+
+        :param results: Результаты в формате поля Report.results
+        :return: Dict[str, Dict]: Анализатор -> значения колонок ReportMetric
+        """
+        metrics = {}
+        for analyzer, data in ((results or {}).get("results") or {}).items():
+            if not isinstance(data, dict):
+                continue
+            values = {}
+            if isinstance(data.get("overall_coverage"), (int, float)):
+                values["coverage"] = float(data["overall_coverage"])
+            for category in CATEGORIES:
+                counts = data.get(category)
+                if not isinstance(counts, dict):
+                    continue
+                for severity in SEVERITIES:
+                    if isinstance(counts.get(severity), int):
+                        values[f"{category}_{severity}"] = counts[severity]
+            if values:
+                metrics[analyzer] = values
+        return metrics
+
+    async def save(self, task_id: str, status: ReportStatus, results: Dict | None, db: AsyncSession):
+        """
+        Замена показателей отчёта (без коммита: вызывается вместе с сохранением результатов)
+
+        :param task_id: ID задачи
+        :param status: Итоговый статус отчёта
+        :param results: Результаты отчёта
+        :param db: Сессия БД
+        """
+        await db.execute(delete(ReportMetric).where(ReportMetric.report_id == task_id))
+        metrics = self.extract(results)
+        if metrics:
+            # В многострочном INSERT у всех строк должен быть одинаковый набор колонок
+            empty = dict.fromkeys(("coverage", *COUNT_COLUMNS))
+            await db.execute(insert(ReportMetric).values([
+                dict(report_id=task_id, analyzer=analyzer, status=status, completed_at=func.now(), **{**empty, **values})
+                for analyzer, values in metrics.items()
+            ]))
+
+    async def copy(self, task_id: str, source_id: str, db: AsyncSession):
+        """
+        Показатели отчёта, взятого из кэша, копируются из исходного
+
+        :param task_id: ID новой задачи
+        :param source_id: ID исходного отчёта
+        :param db: Сессия БД
+        """
+        columns = ("analyzer", "status", "coverage", *COUNT_COLUMNS)
+        await db.execute(
+            insert(ReportMetric).from_select(
+                ["report_id", "completed_at", *columns],
+                select(
+                    literal(task_id, ReportMetric.report_id.type),
+                    func.now(),
+                    *(getattr(ReportMetric, column) for column in columns),
+                ).where(ReportMetric.report_id == source_id),
+            )
+        )
+
+    async def search(
+            self,
+            db: AsyncSession,
+            analyzer: str = None,
+            status: ReportStatus = None,
+            completed_from: datetime = None,
+            completed_to: datetime = None,
+            min_coverage: float = None,
+            max_coverage: float = None,
+            min_critical_bugs: int = None,
+            min_critical_vulnerabilities: int = None,
+            limit: int = 50,
+            cursor: str = None,
+    ) -> Dict:
+        """
+        Поиск завершённых отчётов по показателям анализаторов
+
+        Отчёт попадает в выборку, если условиям удовлетворяет хотя бы один его
+        анализатор (или заданный analyzer). Сортировка от новых к старым,
+        постраничный вывод по курсору (без OFFSET).
+
+        :param db: Сессия БД
+        :param analyzer: Имя анализатора
+        :param status: Статус отчёта (SUCCESS или PARTIAL)
+        :param completed_from: Завершён не раньше
+        :param completed_to: Завершён раньше
+        :param min_coverage: Покрытие не меньше
+        :param max_coverage: Покрытие не больше
+        :param min_critical_bugs: Критических ошибок не меньше
+        :param min_critical_vulnerabilities: Критических уязвимостей не меньше
+        :param limit: Размер страницы
+        :param cursor: Курсор следующей страницы из прошлого ответа
+        :return: Dict: Отчёты с показателями и курсор следующей страницы
+        """
+        conditions = self._period(completed_from, completed_to)
+        if analyzer is not None:
+            conditions.append(ReportMetric.analyzer == analyzer)
+        if status is not None:
+            conditions.append(ReportMetric.status == status)
+        if min_coverage is not None:
+            conditions.append(ReportMetric.coverage >= min_coverage)
+        if max_coverage is not None:
+            conditions.append(ReportMetric.coverage <= max_coverage)
+        if min_critical_bugs is not None:
+            conditions.append(ReportMetric.bugs_critical >= min_critical_bugs)
+        if min_critical_vulnerabilities is not None:
+            conditions.append(ReportMetric.vulnerabilities_critical >= min_critical_vulnerabilities)
+        if cursor is not None:
+            completed_at, report_id = self._decode_cursor(cursor)
+            conditions.append(tuple_(ReportMetric.completed_at, ReportMetric.report_id) < (completed_at, report_id))
+
+        page = (await db.execute(
+            select(ReportMetric.report_id, ReportMetric.completed_at)
+            .where(*conditions)
+            .group_by(ReportMetric.report_id, ReportMetric.completed_at)
+            .order_by(ReportMetric.completed_at.desc(), ReportMetric.report_id.desc())
+            .limit(limit + 1)
+        )).all()
+        next_cursor = self._encode_cursor(*page[limit - 1]) if len(page) > limit else None
+        page = page[:limit]
+
+        rows = (await db.execute(
+            select(ReportMetric).where(ReportMetric.report_id.in_([row.report_id for row in page]))
+        )).scalars()
+        items = {
+            row.report_id: {"task_id": row.report_id, "status": None, "completed_at": row.completed_at, "analyzers": {}}
+            for row in page
+        }
+        for metric in rows:
+            item = items[metric.report_id]
+            item["status"] = metric.status
+            item["analyzers"][metric.analyzer] = self._describe(metric)
+        return {"items": list(items.values()), "next_cursor": next_cursor}
+
+    async def aggregate(
+            self,
+            db: AsyncSession,
+            analyzer: str = None,
+            completed_from: datetime = None,
+            completed_to: datetime = None,
+            interval: str = None,
+    ) -> Dict:
+        """
+        Сводка по анализаторам: число отчётов, покрытие и сумма проблем по важности
+
+        :param db: Сессия БД
+        :param analyzer: Имя анализатора
+        :param completed_from: Завершён не раньше
+        :param completed_to: Завершён раньше
+        :param interval: Разбивка по периодам (day, week, month)
+        :return: Dict: Итоги по анализаторам и, при interval, ряды по периодам
+        """
+        conditions = self._period(completed_from, completed_to)
+        if analyzer is not None:
+            conditions.append(ReportMetric.analyzer == analyzer)
+        columns = [
+            func.count().label("reports"),
+            func.avg(ReportMetric.coverage).label("coverage_avg"),
+            func.min(ReportMetric.coverage).label("coverage_min"),
+            func.max(ReportMetric.coverage).label("coverage_max"),
+            *(func.coalesce(func.sum(getattr(ReportMetric, column)), 0).label(column) for column in COUNT_COLUMNS),
+        ]
+
+        totals = (await db.execute(
+            select(ReportMetric.analyzer, *columns).where(*conditions).group_by(ReportMetric.analyzer)
+        )).all()
+        result = {"analyzers": {row.analyzer: self._describe(row) for row in totals}}
+
+        if interval is not None:
+            period = func.date_trunc(interval, ReportMetric.completed_at).label("period")
+            series = (await db.execute(
+                select(ReportMetric.analyzer, period, *columns)
+                .where(*conditions)
+                .group_by(ReportMetric.analyzer, period)
+                .order_by(ReportMetric.analyzer, period)
+            )).all()
+            result["series"] = {}
+            for row in series:
+                result["series"].setdefault(row.analyzer, []).append({"period": row.period, **self._describe(row)})
+        return result
+
+    @staticmethod
+    def _period(completed_from: datetime | None, completed_to: datetime | None) -> list:
+        conditions = []
+        if completed_from is not None:
+            conditions.append(ReportMetric.completed_at >= completed_from)
+        if completed_to is not None:
+            conditions.append(ReportMetric.completed_at < completed_to)
+        return conditions
+
+    @staticmethod
+    def _describe(row) -> Dict:
+        """Показатели строки ReportMetric или агрегата в формате ответа API"""
+        described = {}
+        if hasattr(row, "reports"):
+            described["reports"] = row.reports
+            described["coverage"] = {
+                "avg": round(row.coverage_avg, 1) if row.coverage_avg is not None else None,
+                "min": row.coverage_min,
+                "max": row.coverage_max,
+            }
+        else:
+            described["coverage"] = row.coverage
+        for category in CATEGORIES:
+            described[category] = {severity: getattr(row, f"{category}_{severity}") for severity in SEVERITIES}
+        return described
+
+    @staticmethod
+    def _encode_cursor(report_id: str, completed_at: datetime) -> str:
+        return base64.urlsafe_b64encode(dumps([completed_at, report_id])).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+        try:
+            completed_at, report_id = loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(completed_at), report_id
+        except (TypeError, ValueError):
+            error_msg = "Некорректный курсор страницы"
+            logger.error(error_msg)
+            raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=error_msg)
+
+
+report_metrics = ReportMetricsService()
@@ -1,47 +1,133 @@
 import asyncio
-import json
-from typing import Dict
-from sqlalchemy import update, insert
+import gzip
+from datetime import timedelta
+from typing import AsyncIterator, Dict
+from minio.error import S3Error
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
 from app.database import async_session_maker
-from app.ext_services.sonarqube_mock import generate_sonarqube_report
-from app.ext_services.second_service_mock import generate_second_service_report
-from app.ext_services.third_service_mock import generate_third_service_report
 from app.files.minio_client import MinioClient
-from app.reports.models import Report
+from app.reports.analyzers import Analyzer, analyzer_registry
+from app.reports.events import report_events
+from app.reports.inspection import files_object_name
+from app.reports.models import AnalyzerResult, AnalyzerStatus, Report, ReportStatus
+from app.reports.report_metrics import report_metrics
+from app.serialization import encode_results, results_fragment
 
 from app.logger_config import app_logger
 
 logger = app_logger.getChild(__name__)
 
+TERMINAL_STATUSES = (ReportStatus.SUCCESS, ReportStatus.PARTIAL, ReportStatus.ERROR)
+# Колонки AnalyzerResult для состояния отчёта: без результатов, которые уже собраны в Report
+ANALYZER_STATE_COLUMNS = (
+    AnalyzerResult.report_id,
+    AnalyzerResult.analyzer,
+    AnalyzerResult.status,
+    AnalyzerResult.error,
+    AnalyzerResult.started_at,
+    AnalyzerResult.finished_at,
+)
+
 class ReportsService:
     def __init__(self):
-        """Инициализация сервиса отчётов с клиентом MinIO"""
-        self.minio_client = MinioClient(bucket_name=settings.MINIO_BUCKET_NAME)
+        """Инициализация сервиса отчётов"""
         logger.info("Сервис отчетов инициализирован")
 
-    async def _generate_all_reports(self, task_id: str) -> Dict:
+    async def _save_analyzer_result(self, task_id: str, name: str, **values):
+        """
+        Сохранение состояния анализатора в отдельной сессии с немедленным коммитом
+
+        :param task_id: ID задачи
+        :param name: Имя анализатора
+        :param values: Обновляемые поля AnalyzerResult
+        """
+        statement = pg_insert(AnalyzerResult).values(report_id=task_id, analyzer=name, **values)
+        async with async_session_maker() as db:
+            await db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[AnalyzerResult.report_id, AnalyzerResult.analyzer],
+                    set_=values,
+                )
+            )
+            await report_events.publish(
+                db, task_id, ReportStatus.IN_PROGRESS, analyzer=name, analyzer_status=values["status"]
+            )
+            await db.commit()
+
+    async def _generate_analyzer_report(self, task_id: str, analyzer: Analyzer):
+        """
+        Генерация отчёта одного анализатора с сохранением результата сразу по готовности
+
+        :param task_id: ID задачи
+        :param analyzer: Анализатор из реестра
         """
-        Параллельный запуск генерации всех отчётов
+        name = analyzer.name
+        await self._save_analyzer_result(
+            task_id, name, status=AnalyzerStatus.IN_PROGRESS, error=None, started_at=func.now(), finished_at=None
+        )
+        try:
+            results = await analyzer_registry.run(analyzer, task_id)
+        except asyncio.TimeoutError:
+            logger.error("Анализатор %s превысил таймаут для задачи %s", name, task_id)
+            await self._save_analyzer_result(
+                task_id, name, status=AnalyzerStatus.TIMEOUT, error="Превышен таймаут анализатора", finished_at=func.now()
+            )
+        except Exception as e:
+            logger.error("Ошибка анализатора %s для задачи %s: %s", name, task_id, e)
+            await self._save_analyzer_result(
+                task_id, name, status=AnalyzerStatus.ERROR, error=str(e), finished_at=func.now()
+            )
+        else:
+            await self._save_analyzer_result(
+                task_id, name, status=AnalyzerStatus.SUCCESS, results=results, finished_at=func.now()
+            )
+            logger.info("Анализатор %s завершил работу для задачи %s", name, task_id)
 
-        :param task_id: ID задачи для генерации отчётов
-        :return: Dict: Объединённые отчёты всех сервисов
+    async def get_analyzer_results(self, task_id: str, db: AsyncSession) -> list[AnalyzerResult]:
         """
+        Получение состояния всех анализаторов задачи
 
-        logger.info(f"Начало генерации отчетов для задачи {task_id}")
-        sonarqube, second, third = await asyncio.gather(
-            generate_sonarqube_report(task_id),
-            generate_second_service_report(task_id),
-            generate_third_service_report(task_id),
+        :param task_id: ID задачи
+        :param db: Сессия БД
+        :return: list[AnalyzerResult]: Результаты анализаторов
+        """
+        result = await db.execute(
+            select(AnalyzerResult).where(AnalyzerResult.report_id == task_id)
         )
+        return list(result.scalars())
+
+    async def get_analyzer_states(self, task_ids: list[str], db: AsyncSession) -> Dict[str, list]:
+        """
+        Состояние анализаторов задач без их результатов
+
+        :param task_ids: ID задач
+        :param db: Сессия БД
+        :return: Dict[str, list]: Строки ANALYZER_STATE_COLUMNS по ID задачи
+        """
+        by_report: Dict[str, list] = {}
+        if not task_ids:
+            return by_report
+        rows = await db.execute(select(*ANALYZER_STATE_COLUMNS).where(AnalyzerResult.report_id.in_(task_ids)))
+        for row in rows:
+            by_report.setdefault(row.report_id, []).append(row)
+        return by_report
+
+    @staticmethod
+    def collect_results(analyzer_results: list[AnalyzerResult]) -> Dict:
+        """
+        Объединение результатов успешно завершившихся анализаторов
 
-        logger.info(f"Генерация отчетов завершена для задачи {task_id}")
+        :param analyzer_results: Результаты анализаторов
+        :return: Dict: Отчёты сервисов в формате поля Report.results
+        """
         return {
             "results": {
-                "sonarqube": sonarqube,
-                "second_service": second,
-                "third_service": third,
+                item.analyzer: item.results
+                for item in analyzer_results
+                if item.status == AnalyzerStatus.SUCCESS
             }
         }
 
@@ -49,67 +135,509 @@ class ReportsService:
         """
         Генерация и сохранение в БД отчёта по ID задачи
 
+        Задача уже переведена в IN_PROGRESS планировщиком. Анализаторы
+        работают параллельно, каждый сохраняет результат сразу по готовности;
+        при повторной попытке перезапускаются только неуспешные. Если какой-то
+        анализатор не справился, ошибка пробрасывается планировщику.
+
         :param task_id: ID задачи для генерации отчёта
         :param db: Сессия БД
         """
-        try:
-            logger.info(f"Устанавливаем статус IN_PROGRESS для задачи {task_id}")
-            await db.execute(
-                update(Report)
-                .where(Report.id == task_id)
-                .values(status="IN_PROGRESS")
-            )
-            await db.commit()  # 💡 Этот коммит может не выполняться из-за ошибки
-            logger.info(f"Статус задачи {task_id} обновлён на IN_PROGRESS")
+        done = {
+            item.analyzer
+            for item in (await self.get_analyzer_states([task_id], db)).get(task_id, [])
+            if item.status == AnalyzerStatus.SUCCESS
+        }
+        pending = [analyzer for analyzer in analyzer_registry if analyzer.name not in done]
 
+        logger.info(
+            "Начало генерации отчетов для задачи %s: %s",
+            task_id, ', '.join(analyzer.name for analyzer in pending) or '-',
+        )
+        await asyncio.gather(*(self._generate_analyzer_report(task_id, analyzer) for analyzer in pending))
 
-            report_data = await self._generate_all_reports(task_id)
-            report_json = json.dumps(report_data)
+        analyzer_results = await self.get_analyzer_results(task_id, db)
+        failed = [item.analyzer for item in analyzer_results if item.status != AnalyzerStatus.SUCCESS]
+        if failed:
+            raise RuntimeError(f"Анализаторы завершились с ошибкой: {', '.join(failed)}")
 
-            await db.execute(
-                update(Report)
-                .where(Report.id == task_id)
-                .values(status="SUCCESS", results=report_json)
+        collected = self.collect_results(analyzer_results)
+        # Сжатие больших результатов не должно блокировать event loop
+        results = await asyncio.to_thread(encode_results, collected)
+        await db.execute(
+            update(Report)
+            .where(Report.id == task_id, Report.status == ReportStatus.IN_PROGRESS)
+            .values(
+                status=ReportStatus.SUCCESS,
+                **results,
+                completed_at=func.now(),
+                lease_expires_at=None,
+                last_error=None,
             )
-            await db.commit()
-            logger.info(f"Отчет для задачи {task_id} успешно сгенерирован")
+        )
+        await self._clear_analyzer_results(task_id, db)
+        await report_metrics.save(task_id, ReportStatus.SUCCESS, collected, db)
+        await report_events.publish(db, task_id, ReportStatus.SUCCESS)
+        await db.commit()
+        logger.info("Отчет для задачи %s успешно сгенерирован", task_id)
 
-        except Exception as e:
-            logger.error(f"Ошибка генерации отчета {task_id}: {e}")
-            await db.rollback()
-            await db.execute(
-                update(Report)
-                .where(Report.id == task_id)
-                .values(status="ERROR", results=None)
+    async def fail_report(self, task_id: str, error: str, db: AsyncSession):
+        """
+        Окончательное завершение задачи после исчерпания попыток
+
+        Результаты успешных анализаторов сохраняются со статусом PARTIAL;
+        если успешных нет, задача получает статус ERROR.
+
+        :param task_id: ID задачи
+        :param error: Текст последней ошибки
+        :param db: Сессия БД
+        """
+        collected = self.collect_results(await self.get_analyzer_results(task_id, db))
+        if collected["results"]:
+            results = await asyncio.to_thread(encode_results, collected)
+            values = dict(status=ReportStatus.PARTIAL, completed_at=func.now(), **results)
+        else:
+            values = dict(status=ReportStatus.ERROR, results=None, results_blob=None)
+
+        await db.execute(
+            update(Report)
+            .where(Report.id == task_id)
+            .values(lease_expires_at=None, last_error=error, **values)
+        )
+        await self._clear_analyzer_results(task_id, db)
+        if values["status"] == ReportStatus.PARTIAL:
+            await report_metrics.save(task_id, ReportStatus.PARTIAL, collected, db)
+        await report_events.publish(db, task_id, values["status"])
+        await db.commit()
+        logger.error("Задача %s завершена со статусом %s", task_id, values['status'])
+
+    @staticmethod
+    async def _clear_analyzer_results(task_id: str, db: AsyncSession):
+        """
+        Удаление результатов анализаторов, уже собранных в Report (в транзакции вызывающего кода)
+
+        :param task_id: ID задачи
+        :param db: Сессия БД
+        """
+        await db.execute(
+            update(AnalyzerResult)
+            .where(AnalyzerResult.report_id == task_id, AnalyzerResult.results.is_not(None))
+            .values(results=None)
+        )
+
+    def _build_state(self, report: Report, analyzer_results: list) -> Dict:
+        """
+        Состояние отчёта в формате ответа API
+
+        Для незавершённого отчёта нужны частичные результаты анализаторов
+        (AnalyzerResult целиком), для завершённого — только их состояние.
+
+        :param report: Запись отчёта
+        :param analyzer_results: Результаты или строки ANALYZER_STATE_COLUMNS анализаторов отчёта
+        :return: Dict: Статус и результаты
+        """
+        if report.status == ReportStatus.UPLOADING:
+            return {
+                "task_id": report.id,
+                "status": ReportStatus.UPLOADING,
+                "uploaded_bytes": report.uploaded_bytes or 0,
+                "message": "Архив загружается в хранилище"
+            }
+
+        services = {
+            item.analyzer: {
+                "status": item.status,
+                "error": item.error,
+                "started_at": item.started_at,
+                "finished_at": item.finished_at,
+            }
+            for item in analyzer_results
+        }
+        if report.status in (ReportStatus.PENDING, ReportStatus.IN_PROGRESS):
+            return {
+                "task_id": report.id,
+                "status": report.status,
+                "message": "Отчет в процессе генерации",
+                "results": self.collect_results(analyzer_results) if analyzer_results else None,
+                "services": services,
+            }
+
+        return {
+            "task_id": report.id,
+            "status": report.status,
+            "results": results_fragment(report.results, report.results_blob),
+            "services": services,
+        }
+
+    async def get_report_state(self, report_id: str, db: AsyncSession) -> Dict | None:
+        """
+        Текущее состояние отчёта в формате ответа API
+
+        :param report_id: ID отчёта
+        :param db: Сессия БД
+        :return: Dict | None: Статус и результаты (None, если отчёт не найден)
+        """
+        result = await db.execute(select(Report).where(Report.id == report_id))
+        report = result.scalar_one_or_none()
+        if not report:
+            return None
+        if report.status in (ReportStatus.PENDING, ReportStatus.IN_PROGRESS):
+            return self._build_state(report, await self.get_analyzer_results(report.id, db))
+        states = await self.get_analyzer_states([report.id], db)
+        return self._build_state(report, states.get(report.id, []))
+
+    async def get_report_states(self, report_ids: list[str], db: AsyncSession) -> Dict[str, Dict]:
+        """
+        Состояние нескольких отчётов не более чем тремя запросами к БД
+
+        :param report_ids: ID отчётов
+        :param db: Сессия БД
+        :return: Dict[str, Dict]: Состояния найденных отчётов по ID
+        """
+        if not report_ids:
+            return {}
+        reports = (await db.execute(select(Report).where(Report.id.in_(report_ids)))).scalars().all()
+        # Частичные результаты нужны только незавершённым отчётам
+        running = {
+            report.id for report in reports if report.status in (ReportStatus.PENDING, ReportStatus.IN_PROGRESS)
+        }
+        by_report = await self.get_analyzer_states(
+            [report.id for report in reports if report.id not in running], db
+        )
+        if running:
+            analyzer_results = await db.execute(
+                select(AnalyzerResult).where(AnalyzerResult.report_id.in_(list(running)))
             )
-            await db.commit()
+            for item in analyzer_results.scalars():
+                by_report.setdefault(item.report_id, []).append(item)
+
+        return {
+            report.id: self._build_state(report, by_report.get(report.id, []))
+            for report in reports
+        }
+
+    async def get_report_files(self, report_id: str, db: AsyncSession, minio_client: MinioClient) -> bytes | None:
+        """
+        Список файлов архива отчёта, сохранённый анализатором inspection
+
+        :param report_id: ID отчёта
+        :param db: Сессия БД
+        :param minio_client: Клиент MinIO
+        :return: bytes | None: JSON со списком файлов (None, если отчёта или списка нет)
+        """
+        object_name = (await db.execute(select(Report.object_name).where(Report.id == report_id))).scalar()
+        if object_name is None:
+            return None
+        try:
+            data = await minio_client.read_object(files_object_name(object_name))
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                return None
             raise
+        return await asyncio.to_thread(gzip.decompress, data)
+
+    async def watch_report(self, report_id: str) -> AsyncIterator[Dict | None]:
+        """
+        Поток состояний отчёта до его завершения
+
+        Состояние перечитывается по событию report_events, а также раз в
+        REPORT_EVENTS_KEEPALIVE секунд на случай потери события. Если за это
+        время ничего не изменилось, отдаётся None (keep-alive для клиента).
+
+        :param report_id: ID отчёта
+        :return: AsyncIterator[Dict | None]: Новые состояния отчёта
+        """
+        queue = report_events.subscribe(report_id)
+        try:
+            last_state = None
+            while True:
+                async with async_session_maker() as db:
+                    state = await self.get_report_state(report_id, db)
+                if state is None:
+                    return
+
+                yield state if state != last_state else None
+                last_state = state
+                if state["status"] in TERMINAL_STATUSES:
+                    return
+
+                try:
+                    await asyncio.wait_for(queue.get(), timeout=settings.REPORT_EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            report_events.unsubscribe(report_id, queue)
 
     async def run_report_generation(self, task_id: str):
         """
-        Запуск генерации отчётов в фоновом режиме
+        Запуск генерации отчётов в отдельной сессии БД
 
         :param task_id: ID задачи для генерации отчёта
         :return:
         """
-        logger.info(f"Запуск фоновой генерации отчета для задачи {task_id}")
+        logger.info("Запуск генерации отчета для задачи %s", task_id)
         async with async_session_maker() as new_db:
             await self.generate_report(task_id, new_db)
 
-    async def create_new_report(self, task_id: str, db: AsyncSession):
+    async def create_new_report(
+            self,
+            task_id: str,
+            db: AsyncSession,
+            status: ReportStatus = ReportStatus.PENDING,
+            content_hash: str = None,
+            object_name: str = None,
+            uploaded_bytes: int = None,
+    ):
         """
         Создание новой записи в БД
         :param task_id: ID новой задачи
         :param db: Сессия БД
+        :param status: Начальный статус (UPLOADING, если архив ещё загружается)
+        :param content_hash: SHA-256 архива
+        :param object_name: Имя объекта архива в бакете
+        :param uploaded_bytes: Размер архива
+        """
+        logger.info("Создание новой записи отчета для задачи %s", task_id)
+        await db.execute(
+            insert(Report)
+            .values(
+                id=task_id,
+                status=status,
+                content_hash=content_hash,
+                object_name=object_name,
+                uploaded_bytes=uploaded_bytes,
+            )
+        )
+        await report_events.publish(db, task_id, status)
+        await db.commit()
+        logger.info("Новая запись отчета создана для задачи %s", task_id)
+
+    async def create_new_reports(
+            self,
+            task_ids: list[str],
+            db: AsyncSession,
+            status: ReportStatus = ReportStatus.PENDING,
+    ):
+        """
+        Создание нескольких записей в БД одним INSERT
+        :param task_ids: ID новых задач
+        :param db: Сессия БД
+        :param status: Начальный статус
+        """
+        if not task_ids:
+            return
+        logger.info("Создание %s записей отчетов", len(task_ids))
+        await db.execute(
+            insert(Report)
+            .values([{"id": task_id, "status": status} for task_id in task_ids])
+        )
+        await report_events.publish_many(
+            db, [{"id": task_id, "status": status} for task_id in task_ids]
+        )
+        await db.commit()
+
+    async def find_reusable_report(self, content_hash: str, db: AsyncSession) -> Report | None:
+        """
+        Поиск готового отчёта для архива с тем же содержимым
+
+        Переиспользуются только отчёты, завершённые не раньше REPORT_REUSE_TTL
+        секунд назад; при REPORT_REUSE_TTL <= 0 переиспользование отключено.
+        Найденный отчёт блокируется FOR SHARE до конца транзакции вызывающего
+        кода, как в find_stored_object: очистка не удалит его вместе с архивом,
+        пока на его object_name не сослался новый отчёт.
+
+        :param content_hash: SHA-256 архива
+        :param db: Сессия БД
+        :return: Report | None: Последний подходящий отчёт
+        """
+        if settings.REPORT_REUSE_TTL <= 0:
+            return None
+        result = await db.execute(
+            select(Report)
+            .where(
+                Report.content_hash == content_hash,
+                Report.status == ReportStatus.SUCCESS,
+                Report.completed_at >= func.now() - timedelta(seconds=settings.REPORT_REUSE_TTL),
+            )
+            .order_by(Report.completed_at.desc())
+            .limit(1)
+            .with_for_update(read=True)
+        )
+        return result.scalar_one_or_none()
+
+    async def find_stored_object(
+            self,
+            content_hash: str,
+            db: AsyncSession,
+            minio_client: MinioClient,
+    ) -> str | None:
+        """
+        Поиск уже сохранённого в бакете архива с тем же содержимым
+
+        Ссылающийся на объект отчёт блокируется FOR SHARE до конца транзакции
+        вызывающего кода: очистка устаревших отчётов (FOR UPDATE SKIP LOCKED)
+        его не удалит, а объект останется, пока не закоммичен новый отчёт,
+        который на него ссылается.
+
+        :param content_hash: SHA-256 архива
+        :param db: Сессия БД
+        :param minio_client: Клиент MinIO
+        :return: str | None: Имя существующего объекта
         """
-        logger.info(f"Создание новой записи отчета для задачи {task_id}")
-        async with db.begin():
+        result = await db.execute(
+            select(Report.object_name)
+            .where(Report.content_hash == content_hash, Report.object_name.is_not(None))
+            .distinct()
+        )
+        for object_name in result.scalars().all():
+            referenced = (await db.execute(
+                select(Report.id).where(Report.object_name == object_name).limit(1).with_for_update(read=True)
+            )).scalar()
+            # Отчёты с этим объектом удалены очисткой после первого запроса
+            if referenced is None:
+                continue
+            if await minio_client.file_exists(object_name):
+                return object_name
+        return None
+
+    async def create_cached_report(self, task_id: str, source: Report, db: AsyncSession):
+        """
+        Создание завершённого отчёта из ранее сгенерированного для того же архива
+
+        :param task_id: ID новой задачи
+        :param source: Готовый отчёт, найденный find_reusable_report в этой же транзакции
+        :param db: Сессия БД
+        """
+        await db.execute(
+            insert(Report)
+            .values(
+                id=task_id,
+                status=ReportStatus.SUCCESS,
+                results=source.results,
+                results_blob=source.results_blob,
+                content_hash=source.content_hash,
+                object_name=source.object_name,
+                uploaded_bytes=source.uploaded_bytes,
+                completed_at=func.now(),
+            )
+        )
+        await report_metrics.copy(task_id, source.id, db)
+        await report_events.publish(db, task_id, ReportStatus.SUCCESS)
+        await db.commit()
+        logger.info("Отчет задачи %s взят из кэша (задача %s)", task_id, source.id)
+
+    async def complete_from_cache(self, task_id: str, source: Report, db: AsyncSession):
+        """
+        Завершение загруженной задачи готовым отчётом для того же архива
+
+        :param task_id: ID задачи
+        :param source: Готовый отчёт с тем же содержимым архива
+        :param db: Сессия БД
+        """
+        await db.execute(
+            update(Report)
+            .where(Report.id == task_id)
+            .values(
+                status=ReportStatus.SUCCESS,
+                results=source.results,
+                results_blob=source.results_blob,
+                completed_at=func.now(),
+            )
+        )
+        await report_metrics.copy(task_id, source.id, db)
+        await report_events.publish(db, task_id, ReportStatus.SUCCESS)
+        await db.commit()
+        logger.info("Отчет задачи %s взят из кэша (задача %s)", task_id, source.id)
+
+    async def update_upload_progress(self, task_id: str, uploaded_bytes: int):
+        """
+        Сохранение прогресса загрузки архива
+
+        Использует отдельную сессию, так как вызывается из потоковой загрузки.
+
+        :param task_id: ID задачи
+        :param uploaded_bytes: Число загруженных байт
+        """
+        async with async_session_maker() as db:
             await db.execute(
-                insert(Report)
-                .values(id=task_id, status="PENDING")
+                update(Report)
+                .where(Report.id == task_id, Report.status == ReportStatus.UPLOADING)
+                .values(uploaded_bytes=uploaded_bytes)
             )
             await db.commit()
-            logger.info(f"Новая запись отчета создана для задачи {task_id}")
+
+    async def finish_upload(
+            self,
+            task_id: str,
+            uploaded_bytes: int,
+            content_hash: str,
+            db: AsyncSession,
+            minio_client: MinioClient,
+            uploaded: bool = True,
+    ) -> Report | None:
+        """
+        Завершение потоковой загрузки архива с дедупликацией
+
+        Если архив с тем же содержимым уже лежит в бакете, новая копия удаляется.
+        Если для него есть свежий отчёт, задача сразу завершается им, иначе
+        ставится в очередь генерации.
+
+        :param task_id: ID задачи
+        :param uploaded_bytes: Размер загруженного архива
+        :param content_hash: SHA-256 архива
+        :param db: Сессия БД
+        :param minio_client: Клиент MinIO
+        :param uploaded: Архив загружен в {task_id}.zip; False — задача использует уже сохранённый архив
+        :return: Report | None: Переиспользованный отчёт, если он найден
+        """
+        uploaded_object = f"{task_id}.zip"
+        object_name = await self.find_stored_object(content_hash, db, minio_client)
+        if object_name is None:
+            if not uploaded:
+                raise RuntimeError(f"Архив с SHA-256 {content_hash} больше не хранится в бакете")
+            object_name = uploaded_object
+        elif uploaded and object_name != uploaded_object:
+            await minio_client.remove_object(uploaded_object)
+            logger.info("Архив задачи %s совпадает с %s, копия удалена", task_id, object_name)
+
+        await db.execute(
+            update(Report)
+            .where(Report.id == task_id)
+            .values(uploaded_bytes=uploaded_bytes, content_hash=content_hash, object_name=object_name)
+        )
+        await db.commit()
+        logger.info("Архив задачи %s загружен (%s байт)", task_id, uploaded_bytes)
+
+        cached = await self.find_reusable_report(content_hash, db)
+        if cached is not None:
+            await self.complete_from_cache(task_id, cached, db)
+            return cached
+
+        await db.execute(
+            update(Report)
+            .where(Report.id == task_id)
+            .values(status=ReportStatus.PENDING, next_run_at=func.now())
+        )
+        await report_events.publish(db, task_id, ReportStatus.PENDING)
+        await db.commit()
+        return None
+
+    async def fail_upload(self, task_id: str, db: AsyncSession):
+        """
+        Отметка задачи как ошибочной, если загрузка архива не удалась
+
+        :param task_id: ID задачи
+        :param db: Сессия БД
+        """
+        await db.rollback()
+        await db.execute(
+            update(Report)
+            .where(Report.id == task_id)
+            .values(status=ReportStatus.ERROR, results=None, results_blob=None)
+        )
+        await report_events.publish(db, task_id, ReportStatus.ERROR)
+        await db.commit()
+        logger.error("Загрузка архива задачи %s не удалась", task_id)
 
 
 reports_service = ReportsService()
\ No newline at end of file
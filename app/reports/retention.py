@@ -0,0 +1,233 @@
+import asyncio
+import gzip
+import io
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from sqlalchemy import delete, exists, func, select, update
+from app.config import settings
+from app.database import async_session_maker
+from app.files.clients import clients
+from app.metrics import register_counter
+from app.reports.events import report_events
+from app.reports.inspection import files_object_name
+from app.reports.models import Report, ReportStatus, UploadSession
+from app.reports.uploads import uploads_service
+from app.serialization import decode_results, dumps
+
+from app.logger_config import app_logger
+
+logger = app_logger.getChild(__name__)
+
+# Ключ advisory-lock Postgres: очистку выполняет только одна реплика
+RETENTION_LOCK_ID = 5_318_008
+
+
+class RetentionService:
+    """
+    Фоновая очистка устаревших отчётов и архивов
+
+    Отчёты удаляются пачками по истечении TTL для своего статуса
+    (RETENTION_TTLS), результаты перед удалением при необходимости
+    архивируются в бакет в виде JSONL.gz. Архив в MinIO удаляется
+    только когда на него не ссылается ни один оставшийся отчёт.
+    Зависшие загрузки (TTL статуса UPLOADING) не удаляются, а переводятся
+    в ERROR с удалением недокачанного архива и дальше очищаются как ошибки.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self.deleted_reports = 0
+        self.deleted_objects = 0
+        self.reclaimed_bytes = 0
+        self.archived_reports = 0
+
+    async def start(self):
+        if settings.RETENTION_ENABLED:
+            self._task = asyncio.create_task(self._loop(), name="retention")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error("Ошибка очистки устаревших отчетов: %s", e)
+            await asyncio.sleep(settings.RETENTION_INTERVAL)
+
+    async def run_once(self):
+        """Один проход очистки по всем статусам из RETENTION_TTLS"""
+        async with async_session_maker() as lock_db:
+            locked = (await lock_db.execute(select(func.pg_try_advisory_lock(RETENTION_LOCK_ID)))).scalar()
+            if not locked:
+                logger.info("Очистка уже выполняется другой репликой")
+                return
+            try:
+                # Сначала отменяются просроченные загрузки частями: их задачи
+                # получают статус ERROR, а части удаляются из бакета
+                await uploads_service.purge_expired(clients.minio)
+                deleted = 0
+                for status, ttl in settings.RETENTION_TTLS.items():
+                    while True:
+                        if status == ReportStatus.UPLOADING.value:
+                            batch = await self._fail_stale_uploads(ttl)
+                        else:
+                            batch = await self._purge_batch(ReportStatus(status), ttl)
+                            deleted += batch
+                        if batch < settings.RETENTION_BATCH_SIZE:
+                            break
+                if deleted:
+                    logger.info(
+                        "Очистка завершена: удалено отчетов %s, всего освобождено %s байт",
+                        deleted,
+                        self.reclaimed_bytes,
+                    )
+            finally:
+                await lock_db.execute(select(func.pg_advisory_unlock(RETENTION_LOCK_ID)))
+                await lock_db.commit()
+
+    async def _fail_stale_uploads(self, ttl: int) -> int:
+        """
+        Перевод в ERROR загрузок, не завершённых за ttl секунд
+
+        Загрузки частями здесь не трогаются: их сессии вместе с multipart-загрузкой
+        отменяет uploads_service.purge_expired. Для остальных (потоковая загрузка
+        прервалась вместе с процессом) удаляется объект {task_id}.zip, если
+        отчёт ещё не сослался на архив через object_name.
+
+        :param ttl: Время жизни загрузки в секундах
+        :return: int: Число отменённых загрузок
+        """
+        async with async_session_maker() as db:
+            rows = (await db.execute(
+                select(Report.id, Report.object_name)
+                .where(
+                    Report.status == ReportStatus.UPLOADING,
+                    Report.created_at < func.now() - timedelta(seconds=ttl),
+                    ~exists().where(UploadSession.id == Report.id),
+                )
+                .limit(settings.RETENTION_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not rows:
+                return 0
+
+            report_ids = [row.id for row in rows]
+            await db.execute(
+                update(Report)
+                .where(Report.id.in_(report_ids))
+                .values(status=ReportStatus.ERROR, last_error="Загрузка архива не завершена")
+            )
+            await report_events.publish_many(db, [{"id": report_id, "status": ReportStatus.ERROR.value} for report_id in report_ids])
+            await db.commit()
+
+        leftovers = [f"{row.id}.zip" for row in rows if row.object_name is None]
+        if leftovers:
+            await clients.minio.remove_objects(leftovers)
+        logger.info("Отменено зависших загрузок: %s", len(rows))
+        return len(rows)
+
+    async def _purge_batch(self, status: ReportStatus, ttl: int) -> int:
+        """
+        Удаление одной пачки устаревших отчётов
+
+        :param status: Статус удаляемых отчётов
+        :param ttl: Время жизни отчёта в секундах
+        :return: int: Число удалённых отчётов
+        """
+        async with async_session_maker() as db:
+            rows = (await db.execute(
+                select(
+                    Report.id,
+                    Report.status,
+                    Report.results,
+                    Report.results_blob,
+                    Report.content_hash,
+                    Report.object_name,
+                    Report.uploaded_bytes,
+                    Report.created_at,
+                    Report.completed_at,
+                )
+                .where(Report.status == status, Report.created_at < func.now() - timedelta(seconds=ttl))
+                .order_by(Report.created_at)
+                .limit(settings.RETENTION_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not rows:
+                return 0
+
+            if settings.RETENTION_ARCHIVE_RESULTS:
+                await self._archive(rows)
+
+            report_ids = [row.id for row in rows]
+            await db.execute(delete(Report).where(Report.id.in_(report_ids)))
+
+            # Отчёты, которые find_stored_object держит FOR SHARE ради повторного использования
+            # архива, в пачку не попадают (SKIP LOCKED), поэтому их объекты остаются в still_used
+            object_sizes = {row.object_name: row.uploaded_bytes or 0 for row in rows if row.object_name}
+            still_used = set()
+            if object_sizes:
+                still_used = set((await db.execute(
+                    select(Report.object_name)
+                    .where(Report.object_name.in_(list(object_sizes)))
+                    .distinct()
+                )).scalars())
+
+            await report_events.publish_many(db, [{"id": report_id, "status": "DELETED"} for report_id in report_ids])
+            await db.commit()
+
+        orphaned = [name for name in object_sizes if name not in still_used]
+        if orphaned:
+            # Вместе с архивом удаляется и список его файлов (если анализатор inspection включён)
+            await clients.minio.remove_objects(orphaned + [files_object_name(name) for name in orphaned])
+            self.deleted_objects += len(orphaned)
+            self.reclaimed_bytes += sum(object_sizes[name] for name in orphaned)
+
+        self.deleted_reports += len(rows)
+        logger.info("Удалено отчетов со статусом %s: %s, архивов: %s", status.value, len(rows), len(orphaned))
+        return len(rows)
+
+    async def _archive(self, rows):
+        """
+        Сохранение результатов отчётов в бакет одним файлом JSONL.gz
+
+        :param rows: Удаляемые отчёты
+        """
+        def pack() -> tuple[int, bytes]:
+            records = [
+                {
+                    "id": row.id,
+                    "status": row.status.value,
+                    "content_hash": row.content_hash,
+                    "created_at": row.created_at.isoformat(),
+                    "completed_at": row.completed_at.isoformat() if row.completed_at else None,
+                    "results": decode_results(row.results, row.results_blob),
+                }
+                for row in rows
+                if row.results is not None or row.results_blob is not None
+            ]
+            return len(records), gzip.compress(b"\n".join(dumps(record) for record in records))
+
+        count, data = await asyncio.to_thread(pack)
+        if not count:
+            return
+
+        now = datetime.now(timezone.utc)
+        object_name = f"{settings.RETENTION_ARCHIVE_PREFIX}/{now:%Y/%m/%d}/{uuid4()}.jsonl.gz"
+        await clients.minio.upload_file(
+            file=io.BytesIO(data),
+            file_name=object_name,
+            metadata={"records": str(count)},
+        )
+        self.archived_reports += count
+
+
+retention_service = RetentionService()
+register_counter("retention_deleted_reports", "Удалённые устаревшие отчёты", lambda: retention_service.deleted_reports)
+register_counter("retention_deleted_objects", "Удалённые из MinIO архивы", lambda: retention_service.deleted_objects)
+register_counter("retention_reclaimed_bytes", "Освобождённый объём хранилища", lambda: retention_service.reclaimed_bytes)
+register_counter("retention_archived_reports", "Отчёты, выгруженные в архив", lambda: retention_service.archived_reports)
@@ -0,0 +1,241 @@
+import asyncio
+from datetime import timedelta
+from sqlalchemy import and_, func, or_, select, update
+from app.config import settings
+from app.database import async_session_maker
+from app.metrics import REPORT_JOBS_IN_FLIGHT
+from app.reports.analyzers import analyzer_registry
+from app.reports.events import report_events
+from app.reports.extraction import extraction_cache
+from app.reports.models import Report, ReportStatus
+from app.reports.process_pool import process_pool
+from app.reports.reports_service import ReportsService, reports_service
+
+from app.logger_config import app_logger, task_id_var
+
+logger = app_logger.getChild(__name__)
+
+
+class ReportScheduler:
+    """
+    Очередь генерации отчётов поверх таблицы reports
+
+    Задачи забираются через SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+    несколько воркеров и реплик API работают с одной очередью без дублей.
+    Взятая задача получает аренду (lease), которую воркер продлевает, пока
+    работает; задачи с истёкшей арендой считаются брошенными и берутся снова.
+    """
+
+    def __init__(self, service: ReportsService):
+        self._service = service
+        self._workers: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+        self._stopping = False
+        # Новые задачи из других реплик приходят через LISTEN/NOTIFY
+        report_events.add_handler(self._on_event)
+
+    async def start(self, workers: int = settings.REPORT_WORKERS):
+        """
+        Восстановление брошенных задач и запуск пула воркеров
+
+        :param workers: Число воркеров (0 - только постановка задач в очередь)
+        """
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        await self.recover()
+        for number in range(workers):
+            self._workers.append(
+                asyncio.create_task(self._worker(number), name=f"report-worker-{number}")
+            )
+        logger.info("Запущено воркеров генерации отчетов: %s", workers)
+
+    async def stop(self):
+        """Остановка воркеров с ожиданием текущих задач (не дольше REPORT_SHUTDOWN_TIMEOUT)"""
+        self._stopping = True
+        self.notify()
+        if not self._workers:
+            return
+        _, pending = await asyncio.wait(self._workers, timeout=settings.REPORT_SHUTDOWN_TIMEOUT)
+        for worker in pending:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        await asyncio.to_thread(process_pool.shutdown)
+        await asyncio.to_thread(extraction_cache.clear)
+        logger.info("Воркеры генерации отчетов остановлены")
+
+    def notify(self):
+        """Разбудить воркеры после постановки новой задачи"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _on_event(self, event: dict):
+        if event["status"] == ReportStatus.PENDING:
+            self.notify()
+
+    async def queue_depth(self) -> dict[str, int]:
+        """
+        Число незавершённых задач по статусам
+
+        :return: dict[str, int]: Статус -> число задач
+        """
+        active = (ReportStatus.UPLOADING, ReportStatus.PENDING, ReportStatus.IN_PROGRESS)
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(Report.status, func.count())
+                .where(Report.status.in_(active))
+                .group_by(Report.status)
+            )
+            counts = dict(result.all())
+        return {status.value: counts.get(status, 0) for status in active}
+
+    async def recover(self):
+        """Вернуть в очередь задачи, оставшиеся IN_PROGRESS после падения процесса"""
+        async with async_session_maker() as db:
+            result = await db.execute(
+                update(Report)
+                .where(
+                    Report.status == ReportStatus.IN_PROGRESS,
+                    or_(Report.lease_expires_at.is_(None), Report.lease_expires_at < func.now()),
+                )
+                .values(status=ReportStatus.PENDING, lease_expires_at=None, next_run_at=func.now())
+            )
+            await db.commit()
+        if result.rowcount:
+            logger.warning("Восстановлено брошенных задач: %s", result.rowcount)
+
+    async def _claim(self) -> tuple[str, int] | None:
+        """
+        Взять следующую готовую задачу из очереди
+
+        :return: ID задачи и номер попытки или None, если очередь пуста
+        """
+        now = func.now()
+        candidate = (
+            select(Report.id)
+            .where(or_(
+                and_(Report.status == ReportStatus.PENDING, Report.next_run_at <= now),
+                and_(Report.status == ReportStatus.IN_PROGRESS, Report.lease_expires_at < now),
+            ))
+            .order_by(Report.next_run_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with async_session_maker() as db:
+            result = await db.execute(
+                update(Report)
+                .where(Report.id == candidate)
+                .values(
+                    status=ReportStatus.IN_PROGRESS,
+                    attempts=Report.attempts + 1,
+                    lease_expires_at=now + timedelta(seconds=settings.REPORT_LEASE_TIMEOUT),
+                )
+                .returning(Report.id, Report.attempts)
+            )
+            row = result.first()
+            if row:
+                await report_events.publish(db, row.id, ReportStatus.IN_PROGRESS)
+            await db.commit()
+        return (row.id, row.attempts) if row else None
+
+    async def _worker(self, number: int):
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error("Воркер %s: ошибка получения задачи: %s", number, e)
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.REPORT_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task_id, attempt = job
+            try:
+                await self._process(task_id, attempt)
+            except Exception as e:
+                # Задача вернётся в очередь по истечении аренды (recover / _claim),
+                # а воркер продолжает работу
+                logger.error("Воркер %s: ошибка обработки задачи %s: %s", number, task_id, e)
+
+    async def _process(self, task_id: str, attempt: int):
+        if attempt > settings.REPORT_MAX_ATTEMPTS:
+            await self._fail(task_id, attempt, "Превышено число попыток (истекла аренда задачи)")
+            return
+
+        token = task_id_var.set(task_id)
+        logger.info("Задача %s взята в работу (попытка %s)", task_id, attempt)
+        heartbeat = asyncio.create_task(self._heartbeat(task_id))
+        REPORT_JOBS_IN_FLIGHT.inc()
+        try:
+            await self._service.run_report_generation(task_id)
+        except Exception as e:
+            logger.error("Ошибка генерации отчета %s: %s", task_id, e)
+            await self._fail(task_id, attempt, str(e))
+        finally:
+            REPORT_JOBS_IN_FLIGHT.dec()
+            heartbeat.cancel()
+            task_id_var.reset(token)
+
+    async def _heartbeat(self, task_id: str):
+        """Продление аренды задачи, пока она выполняется"""
+        interval = settings.REPORT_LEASE_TIMEOUT / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with async_session_maker() as db:
+                    await db.execute(
+                        update(Report)
+                        .where(Report.id == task_id, Report.status == ReportStatus.IN_PROGRESS)
+                        .values(lease_expires_at=func.now() + timedelta(seconds=settings.REPORT_LEASE_TIMEOUT))
+                    )
+                    await db.commit()
+            except Exception as e:
+                logger.warning("Не удалось продлить аренду задачи %s: %s", task_id, e)
+
+    @staticmethod
+    def retry_delay(attempt: int) -> float:
+        """
+        Задержка перед повтором задачи: экспоненциальная, не больше REPORT_RETRY_BACKOFF_MAX
+
+        :param attempt: Номер неудачной попытки (с 1)
+        :return: float: Задержка в секундах
+        """
+        return min(settings.REPORT_RETRY_BACKOFF * 2 ** (attempt - 1), settings.REPORT_RETRY_BACKOFF_MAX)
+
+    async def _fail(self, task_id: str, attempt: int, error: str):
+        """
+        Повтор задачи с экспоненциальной задержкой или окончательное завершение
+
+        :param task_id: ID задачи
+        :param attempt: Номер неудачной попытки
+        :param error: Текст ошибки
+        """
+        async with async_session_maker() as db:
+            if attempt >= settings.REPORT_MAX_ATTEMPTS:
+                logger.error("Задача %s завершилась ошибкой после %s попыток", task_id, attempt)
+                await self._service.fail_report(task_id, error, db)
+                return
+
+            delay = self.retry_delay(attempt)
+            await db.execute(
+                update(Report)
+                .where(Report.id == task_id)
+                .values(
+                    status=ReportStatus.PENDING,
+                    next_run_at=func.now() + timedelta(seconds=delay),
+                    lease_expires_at=None,
+                    last_error=error,
+                )
+            )
+            await report_events.publish(db, task_id, ReportStatus.PENDING)
+            await db.commit()
+            logger.warning("Задача %s будет повторена через %.0f с", task_id, delay)
+
+
+report_scheduler = ReportScheduler(reports_service)
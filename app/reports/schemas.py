@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from app.config import settings
+
+
+class GitHubRepo(BaseModel):
+    repo_url: str = Field(..., description="URL репозитория GitHub")
+    branch: str = Field("main", description="Имя ветки")
+
+
+class BatchGitHubUpload(BaseModel):
+    items: list[GitHubRepo] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+
+
+class UploadInit(BaseModel):
+    filename: str = Field(..., description="Имя ZIP-архива")
+    size: int = Field(..., gt=0, le=settings.UPLOAD_MAX_SIZE, description="Размер архива в байтах")
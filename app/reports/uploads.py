@@ -0,0 +1,377 @@
+import asyncio
+import hashlib
+import math
+from datetime import timedelta
+from typing import AsyncIterator, Dict
+from uuid import uuid4
+from fastapi import HTTPException, status
+from minio.error import S3Error
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import async_session_maker
+from app.files.files_utils import check_zip_structure
+from app.files.minio_client import MinioClient
+from app.reports.models import Report, ReportStatus, UploadPart, UploadSession
+from app.reports.reports_service import reports_service
+
+from app.logger_config import app_logger
+
+logger = app_logger.getChild(__name__)
+
+# Ограничение S3 на число частей multipart-загрузки
+MAX_PARTS = 10_000
+
+
+class UploadsService:
+    """
+    Возобновляемая загрузка архива частями
+
+    Каждая часть сразу передаётся в multipart-загрузку S3 (в памяти держится
+    не больше одной части на запрос, на диск ничего не пишется). Принятые части
+    с их SHA-256 хранятся в uploadparts, поэтому после обрыва клиент запрашивает
+    состояние загрузки и досылает только недостающие части.
+    """
+
+    async def init(self, filename: str, size: int, db: AsyncSession, minio_client: MinioClient) -> Dict:
+        """
+        Создание задачи в статусе UPLOADING и multipart-загрузки
+
+        :param filename: Имя ZIP-архива
+        :param size: Полный размер архива в байтах
+        :param db: Сессия БД
+        :param minio_client: Клиент MinIO
+        :return: Dict: Параметры загрузки
+        """
+        if not filename.lower().endswith(".zip"):
+            raise self._error(status.HTTP_400_BAD_REQUEST, "Поддерживаются только ZIP-архивы")
+        if size <= 0 or size > settings.UPLOAD_MAX_SIZE:
+            raise self._error(
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                f"Размер архива должен быть от 1 до {settings.UPLOAD_MAX_SIZE} байт",
+            )
+
+        task_id = str(uuid4())
+        object_name = f"{task_id}.zip"
+        part_size = max(settings.UPLOAD_PART_SIZE, math.ceil(size / MAX_PARTS))
+        upload_id = await minio_client.create_multipart_upload(object_name, filename)
+
+        await reports_service.create_new_report(task_id, db, status=ReportStatus.UPLOADING)
+        session = UploadSession(
+            id=task_id,
+            upload_id=upload_id,
+            object_name=object_name,
+            filename=filename,
+            total_size=size,
+            part_size=part_size,
+            expires_at=func.now() + timedelta(seconds=settings.UPLOAD_SESSION_TTL),
+        )
+        db.add(session)
+        await db.commit()
+        await db.refresh(session)
+        logger.info("Начата загрузка частями %s: %s байт, части по %s байт", task_id, size, part_size)
+        return self._describe(session, [])
+
+    async def get(self, task_id: str, db: AsyncSession) -> Dict:
+        """
+        Состояние загрузки: принятые и недостающие части
+
+        :param task_id: ID задачи
+        :param db: Сессия БД
+        :return: Dict: Параметры и прогресс загрузки
+        """
+        session = await self._get_session(task_id, db)
+        return self._describe(session, await self._get_parts(task_id, db))
+
+    async def put_part(
+            self,
+            task_id: str,
+            part_number: int,
+            chunks: AsyncIterator[bytes],
+            checksum: str | None,
+            db: AsyncSession,
+            minio_client: MinioClient,
+    ) -> Dict:
+        """
+        Приём одной части с проверкой размера и SHA-256
+
+        Повторная отправка части с тем же номером заменяет прежнюю. Пока часть
+        передаётся в S3 и записывается в uploadparts, сессия заблокирована
+        FOR SHARE, поэтому завершение не соберёт объект без неё, а после
+        взятия аренды завершения части отклоняются с 409.
+
+        :param task_id: ID задачи
+        :param part_number: Номер части (с 1)
+        :param chunks: Тело запроса
+        :param checksum: Ожидаемый SHA-256 части (hex), если клиент его передал
+        :param db: Сессия БД
+        :param minio_client: Клиент MinIO
+        :return: Dict: Размер, SHA-256 и ETag принятой части
+        """
+        session = await self._lock_open_session(task_id, db)
+        parts_count = self._parts_count(session)
+        if not 1 <= part_number <= parts_count:
+            raise self._error(status.HTTP_400_BAD_REQUEST, f"Номер части должен быть от 1 до {parts_count}")
+        expected = self._part_length(session, part_number)
+        # Соединение с БД не нужно, пока читается тело части
+        await db.commit()
+
+        data = bytearray()
+        digest = hashlib.sha256()
+        async for chunk in chunks:
+            if len(data) + len(chunk) > expected:
+                raise self._error(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, f"Размер части {part_number} больше {expected} байт")
+            data += chunk
+            digest.update(chunk)
+        if len(data) != expected:
+            raise self._error(status.HTTP_400_BAD_REQUEST, f"Размер части {part_number} должен быть {expected} байт")
+
+        sha256 = digest.hexdigest()
+        if checksum is not None and checksum.lower() != sha256:
+            raise self._error(status.HTTP_400_BAD_REQUEST, f"Контрольная сумма части {part_number} не совпадает")
+
+        # Пока читалось тело, завершение могло взять аренду
+        session = await self._lock_open_session(task_id, db)
+        etag = await minio_client.upload_part(session.object_name, session.upload_id, part_number, bytes(data))
+        values = dict(size=len(data), sha256=sha256, etag=etag, uploaded_at=func.now())
+        await db.execute(
+            pg_insert(UploadPart)
+            .values(session_id=task_id, part_number=part_number, **values)
+            .on_conflict_do_update(index_elements=[UploadPart.session_id, UploadPart.part_number], set_=values)
+        )
+        await db.execute(
+            update(Report)
+            .where(Report.id == task_id)
+            .values(
+                uploaded_bytes=select(func.coalesce(func.sum(UploadPart.size), 0))
+                .where(UploadPart.session_id == task_id)
+                .scalar_subquery()
+            )
+        )
+        await db.commit()
+        return {"part_number": part_number, "size": len(data), "sha256": sha256, "etag": etag}
+
+    async def complete(self, task_id: str, db: AsyncSession, minio_client: MinioClient) -> Dict:
+        """
+        Сборка объекта из частей, проверка архива и постановка задачи в очередь
+
+        Запрос берёт аренду завершения (completing_until) и сразу фиксирует её,
+        так что сборка, проверка и хэширование архива идут без открытой
+        транзакции и блокировок в БД. Сессия удаляется только после перевода
+        задачи в PENDING или SUCCESS, а при сбое аренда снимается, поэтому
+        завершение можно повторить: собранный объект и посчитанный хэш
+        повторно не обрабатываются.
+
+        :param task_id: ID задачи
+        :param db: Сессия БД
+        :param minio_client: Клиент MinIO
+        :return: Dict: ID задачи, SHA-256 архива и признак готового отчёта из кэша
+        """
+        session = await self._claim(task_id, db)
+        parts = await self._get_parts(task_id, db)
+        missing = self._missing(session, parts)
+        if missing:
+            await db.rollback()
+            raise self._error(status.HTTP_409_CONFLICT, f"Не загружены части: {self._ranges(missing)}")
+        report = (await db.execute(
+            select(Report.status, Report.content_hash).where(Report.id == task_id)
+        )).one()
+        if report.status != ReportStatus.UPLOADING:
+            # Задача уже поставлена в очередь, но сессия не была удалена
+            await self._delete_session(task_id, db)
+            raise self._error(status.HTTP_404_NOT_FOUND, f"Загрузка {task_id} не найдена или уже завершена")
+        content_hash = report.content_hash
+        await db.commit()
+
+        try:
+            if content_hash is None:
+                await self._assemble(session, parts, minio_client)
+
+                def check() -> bool:
+                    with minio_client.open_ranged(session.object_name, session.total_size) as reader:
+                        return check_zip_structure(reader, settings.ZIP_VERIFY_CRC)
+
+                if not await asyncio.to_thread(check):
+                    await minio_client.remove_object(session.object_name)
+                    await reports_service.fail_upload(task_id, db)
+                    await self._delete_session(task_id, db)
+                    raise self._error(status.HTTP_400_BAD_REQUEST, "Файл повреждён или не является ZIP-архивом")
+
+                content_hash = await minio_client.hash_object(session.object_name)
+            cached = await reports_service.finish_upload(task_id, session.total_size, content_hash, db, minio_client)
+        except HTTPException:
+            raise
+        except Exception:
+            await db.rollback()
+            await db.execute(update(UploadSession).where(UploadSession.id == task_id).values(completing_until=None))
+            await db.commit()
+            raise
+
+        await self._delete_session(task_id, db)
+        logger.info("Загрузка частями %s завершена", task_id)
+        return {"task_id": task_id, "content_hash": content_hash, "cached": cached is not None}
+
+    async def abort(self, task_id: str, db: AsyncSession, minio_client: MinioClient):
+        """
+        Отмена загрузки: части удаляются, задача получает статус ERROR
+
+        :param task_id: ID задачи
+        :param db: Сессия БД
+        :param minio_client: Клиент MinIO
+        """
+        # Загрузку, которую сейчас собирает другой запрос, отменить нельзя
+        session = await self._claim(task_id, db)
+        await db.commit()
+        await minio_client.abort_multipart_upload(session.object_name, session.upload_id)
+        await reports_service.fail_upload(task_id, db)
+        await self._delete_session(task_id, db)
+        logger.info("Загрузка частями %s отменена", task_id)
+
+    async def purge_expired(self, minio_client: MinioClient) -> int:
+        """
+        Отмена загрузок, не завершённых за UPLOAD_SESSION_TTL
+
+        :param minio_client: Клиент MinIO
+        :return: int: Число отменённых загрузок
+        """
+        async with async_session_maker() as db:
+            sessions = list((await db.execute(
+                select(UploadSession.id, UploadSession.object_name, UploadSession.upload_id, Report.status)
+                .join(Report, Report.id == UploadSession.id)
+                .where(
+                    UploadSession.expires_at < func.now(),
+                    or_(UploadSession.completing_until.is_(None), UploadSession.completing_until < func.now()),
+                )
+            )).all())
+        for session in sessions:
+            async with async_session_maker() as db:
+                if session.status != ReportStatus.UPLOADING:
+                    # Загрузка завершена, осталась только строка сессии
+                    await self._delete_session(session.id, db)
+                    continue
+                await minio_client.abort_multipart_upload(session.object_name, session.upload_id)
+                await reports_service.fail_upload(session.id, db)
+                await self._delete_session(session.id, db)
+        if sessions:
+            logger.info("Отменено просроченных загрузок частями: %s", len(sessions))
+        return len(sessions)
+
+    async def _get_session(self, task_id: str, db: AsyncSession) -> UploadSession:
+        session = await db.get(UploadSession, task_id)
+        if session is None:
+            raise self._error(status.HTTP_404_NOT_FOUND, f"Загрузка {task_id} не найдена или уже завершена")
+        return session
+
+    async def _lock_open_session(self, task_id: str, db: AsyncSession) -> UploadSession:
+        """Сессия под FOR SHARE до конца транзакции; 409, если её уже завершают или срок истёк"""
+        row = (await db.execute(
+            select(
+                UploadSession,
+                UploadSession.completing_until > func.now(),
+                UploadSession.expires_at < func.now(),
+            )
+            .where(UploadSession.id == task_id)
+            .with_for_update(read=True)
+            .execution_options(populate_existing=True)
+        )).first()
+        if row is None:
+            await db.rollback()
+            raise self._error(status.HTTP_404_NOT_FOUND, f"Загрузка {task_id} не найдена или уже завершена")
+        session, completing, expired = row
+        if completing or expired:
+            await db.rollback()
+            reason = "уже завершается" if completing else "истекла"
+            raise self._error(status.HTTP_409_CONFLICT, f"Загрузка {task_id} {reason}, части не принимаются")
+        return session
+
+    async def _claim(self, task_id: str, db: AsyncSession) -> UploadSession:
+        """Аренда завершения загрузки (без коммита); 409, если её держит другой запрос"""
+        session = (await db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.id == task_id,
+                or_(UploadSession.completing_until.is_(None), UploadSession.completing_until < func.now()),
+            )
+            .values(completing_until=func.now() + timedelta(seconds=settings.UPLOAD_COMPLETE_LEASE))
+            .returning(UploadSession)
+        )).scalar()
+        if session is None:
+            await db.rollback()
+            await self._get_session(task_id, db)
+            raise self._error(status.HTTP_409_CONFLICT, f"Загрузка {task_id} уже завершается")
+        return session
+
+    @staticmethod
+    async def _assemble(session: UploadSession, parts: list[UploadPart], minio_client: MinioClient):
+        """Сборка объекта из частей; уже собранный объект пропускается"""
+        try:
+            await minio_client.complete_multipart_upload(
+                session.object_name, session.upload_id, [(part.part_number, part.etag) for part in parts]
+            )
+        except S3Error as e:
+            if e.code != "NoSuchUpload" or not await minio_client.file_exists(session.object_name):
+                raise
+            logger.info("Объект %s уже собран", session.object_name)
+
+    @staticmethod
+    async def _delete_session(task_id: str, db: AsyncSession):
+        await db.execute(delete(UploadSession).where(UploadSession.id == task_id))
+        await db.commit()
+
+    async def _get_parts(self, task_id: str, db: AsyncSession) -> list[UploadPart]:
+        result = await db.execute(
+            select(UploadPart).where(UploadPart.session_id == task_id).order_by(UploadPart.part_number)
+        )
+        return list(result.scalars())
+
+    @staticmethod
+    def _parts_count(session: UploadSession) -> int:
+        return math.ceil(session.total_size / session.part_size)
+
+    def _part_length(self, session: UploadSession, part_number: int) -> int:
+        if part_number < self._parts_count(session):
+            return session.part_size
+        return session.total_size - (part_number - 1) * session.part_size
+
+    def _missing(self, session: UploadSession, parts: list[UploadPart]) -> list[int]:
+        received = {part.part_number for part in parts}
+        return [number for number in range(1, self._parts_count(session) + 1) if number not in received]
+
+    @staticmethod
+    def _ranges(numbers: list[int]) -> str:
+        """Сжатая запись номеров частей: 1-3,7,9-10"""
+        ranges, start = [], None
+        for index, number in enumerate(numbers):
+            if start is None:
+                start = number
+            if index + 1 == len(numbers) or numbers[index + 1] != number + 1:
+                ranges.append(str(start) if start == number else f"{start}-{number}")
+                start = None
+        return ",".join(ranges)
+
+    def _describe(self, session: UploadSession, parts: list[UploadPart]) -> Dict:
+        missing = self._missing(session, parts)
+        return {
+            "upload_id": session.id,
+            "task_id": session.id,
+            "filename": session.filename,
+            "size": session.total_size,
+            "part_size": session.part_size,
+            "parts_count": self._parts_count(session),
+            "received_bytes": sum(part.size for part in parts),
+            "parts": [
+                {"part_number": part.part_number, "size": part.size, "sha256": part.sha256}
+                for part in parts
+            ],
+            "missing": self._ranges(missing),
+            "expires_at": session.expires_at,
+        }
+
+    @staticmethod
+    def _error(status_code: int, detail: str) -> HTTPException:
+        logger.error(detail)
+        return HTTPException(status_code=status_code, detail=detail)
+
+
+uploads_service = UploadsService()
@@ -0,0 +1,41 @@
+import asyncio
+import signal
+from app.files.clients import clients
+from app.reports.events import report_events
+from app.reports.retention import retention_service
+from app.reports.scheduler import report_scheduler
+
+from app.logger_config import app_logger
+
+logger = app_logger.getChild(__name__)
+
+
+async def main():
+    """
+    Отдельный процесс-воркер генерации отчётов
+
+    Запуск: python -m app.reports.worker
+    Число воркеров задаётся REPORT_WORKERS; у реплик API его можно выставить в 0.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await clients.startup()
+    await report_events.start()
+    await report_scheduler.start()
+    await retention_service.start()
+    logger.info("Воркер генерации отчетов запущен")
+    try:
+        await stop.wait()
+    finally:
+        await retention_service.stop()
+        await report_scheduler.stop()
+        await report_events.stop()
+        await clients.shutdown()
+        logger.info("Воркер генерации отчетов остановлен")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
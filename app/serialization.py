@@ -0,0 +1,78 @@
+from typing import Any, Dict
+import orjson
+import zstandard
+from app.config import settings
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Сериализация в JSON (UTF-8) через orjson
+
+    Понимает Enum, datetime и orjson.Fragment (готовый JSON вставляется без разбора).
+
+    :param obj: Объект
+    :return: bytes: JSON
+    """
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+
+def dumps_str(obj: Any) -> str:
+    """Сериализация в JSON-строку (json_serializer для колонок JSON/JSONB)"""
+    return dumps(obj).decode()
+
+
+loads = orjson.loads
+
+
+def encode_results(results: Dict | None) -> Dict:
+    """
+    Значения полей results и results_blob отчёта
+
+    Небольшие результаты хранятся в JSONB, чтобы их можно было читать запросами.
+    Результаты больше REPORT_RESULTS_COMPRESS_THRESHOLD байт в JSON сжимаются
+    zstd и хранятся в results_blob: строка отчёта остаётся компактной, а при
+    чтении JSON отдаётся клиенту без повторного разбора и кодирования.
+
+    :param results: Результаты отчёта
+    :return: Dict: {"results": ..., "results_blob": ...}
+    """
+    if results is None or not settings.REPORT_RESULTS_COMPRESSION:
+        return {"results": results, "results_blob": None}
+    data = dumps(results)
+    if len(data) < settings.REPORT_RESULTS_COMPRESS_THRESHOLD:
+        return {"results": results, "results_blob": None}
+    blob = zstandard.ZstdCompressor(level=settings.REPORT_RESULTS_COMPRESSION_LEVEL).compress(data)
+    return {"results": None, "results_blob": blob}
+
+
+def results_fragment(results: Dict | str | None, blob: bytes | None) -> Dict | orjson.Fragment | None:
+    """
+    Результаты отчёта для ответа API
+
+    Сжатые результаты возвращаются готовым фрагментом JSON для dumps.
+
+    :param results: Значение поля results
+    :param blob: Значение поля results_blob
+    :return: Dict | orjson.Fragment | None: Результаты
+    """
+    if blob is not None:
+        return orjson.Fragment(zstandard.ZstdDecompressor().decompress(blob))
+    if isinstance(results, str):
+        # Отчёты, сохранённые до отказа от двойного кодирования JSON
+        return loads(results)
+    return results
+
+
+def decode_results(results: Dict | str | None, blob: bytes | None) -> Dict | None:
+    """
+    Результаты отчёта в виде словаря (для выгрузки и анализа)
+
+    :param results: Значение поля results
+    :param blob: Значение поля results_blob
+    :return: Dict | None: Результаты
+    """
+    if blob is not None:
+        return loads(zstandard.ZstdDecompressor().decompress(blob))
+    if isinstance(results, str):
+        return loads(results)
+    return results
@@ -0,0 +1,76 @@
+"""
+Локальная замена GitHub для бенчмарка: отдаёт ZIP-архивы заданного размера
+
+Размер задаётся именем репозитория: /<user>/<size>-<любой суффикс>/archive/refs/heads/<branch>.zip,
+например /bench/16mb-1f2e/archive/refs/heads/main.zip. Архив коммита отдаётся по
+/<user>/<repo>/archive/<sha>.zip, а /repos/<user>/<repo>/commits/<branch> возвращает
+SHA ветки с ETag и отвечает 304 на If-None-Match; POST на тот же адрес сдвигает ветку.
+
+Запуск: python -m bench.fake_github --port 8200
+"""
+import argparse
+import hashlib
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from bench.zips import build_zip, parse_size, unique_copy
+
+CHUNK_SIZE = 64 * 1024
+
+_archives: dict[int, bytes] = {}
+# Число сдвигов ветки: от него зависит SHA головного коммита
+_pushes: dict[str, int] = {}
+
+
+async def archive(request: Request):
+    try:
+        size = parse_size(request.path_params["repo"].split("-", 1)[0])
+    except ValueError:
+        return PlainTextResponse("Not Found", status_code=404)
+
+    if size not in _archives:
+        _archives[size] = build_zip(size)
+    data = unique_copy(_archives[size])
+
+    async def body():
+        view = memoryview(data)
+        for offset in range(0, len(view), CHUNK_SIZE):
+            yield bytes(view[offset:offset + CHUNK_SIZE])
+
+    return StreamingResponse(
+        body(),
+        media_type="application/zip",
+        headers={"Content-Length": str(len(data))},
+    )
+
+
+async def commit(request: Request):
+    key = "{user}/{repo}/{branch}".format(**request.path_params)
+    if request.method == "POST":
+        _pushes[key] = _pushes.get(key, 0) + 1
+    sha = hashlib.sha1(f"{key}@{_pushes.get(key, 0)}".encode()).hexdigest()
+    etag = f'"{sha}"'
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return PlainTextResponse(sha, headers={"ETag": etag})
+
+
+app = Starlette(routes=[
+    Route("/repos/{user}/{repo}/commits/{branch}", commit, methods=["GET", "POST"]),
+    Route("/{user}/{repo}/archive/refs/heads/{branch}.zip", archive),
+    Route("/{user}/{repo}/archive/{sha}.zip", archive),
+])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8200)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
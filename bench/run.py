@@ -0,0 +1,326 @@
+"""
+Бенчмарк конвейера загрузка -> отчёт
+
+Поднимает приложение (bench.server) и локальную замену GitHub (bench.fake_github)
+отдельными процессами, прогоняет сценарии и печатает пропускную способность,
+задержки p50/p99, пиковый RSS приложения и задержку его event loop.
+
+Postgres берётся из POSTGRES_URL (например, из docker-compose), хранилище —
+in-memory (--storage memory) или MinIO из настроек (--storage minio).
+
+Примеры:
+    python -m bench.run --migrate --save baseline
+    python -m bench.run --compare baseline --sizes 1mb,16mb --requests 100
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from uuid import uuid4
+import httpx
+from bench.zips import build_zip, parse_size, unique_copy
+
+BASELINES_DIR = Path(__file__).parent / "baselines"
+SCENARIOS = ("upload", "github", "report", "pipeline")
+TERMINAL_STATUSES = ("SUCCESS", "PARTIAL", "ERROR")
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(math.ceil(q * len(values)) - 1, 0)]
+
+
+async def run_load(requests: int, concurrency: int, call) -> tuple[list[float], int, float]:
+    """
+    Выполнение requests вызовов call(number) не более concurrency одновременно
+
+    :return: tuple: Задержки успешных вызовов, число ошибок и общее время
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(number: int):
+        nonlocal errors
+        async with semaphore:
+            try:
+                latencies.append(await call(number))
+            except Exception as e:
+                errors += 1
+                print(f"  ошибка: {e!r}", file=sys.stderr)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(number) for number in range(requests)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def wait_report(client: httpx.AsyncClient, task_id: str, timeout: float) -> dict:
+    """Long-polling отчёта до завершения"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        response = await client.get(f"/reports/{task_id}", params={"wait": 30})
+        response.raise_for_status()
+        state = response.json()
+        if state["status"] in TERMINAL_STATUSES:
+            return state
+    raise TimeoutError(f"Отчет {task_id} не готов за {timeout} с")
+
+
+class Bench:
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace):
+        self.client = client
+        self.args = args
+        self.finished: list[str] = []
+
+    async def upload(self, archive: bytes) -> str:
+        data = unique_copy(archive)
+        response = await self.client.post("/upload/", files={"file": ("bench.zip", data, "application/zip")})
+        response.raise_for_status()
+        return response.json()["task_id"]
+
+    async def scenario_upload(self, size: str, archive: bytes):
+        async def call(number: int) -> float:
+            data = unique_copy(archive)
+            started = time.perf_counter()
+            response = await self.client.post("/upload/", files={"file": ("bench.zip", data, "application/zip")})
+            response.raise_for_status()
+            return time.perf_counter() - started
+
+        return await run_load(self.args.requests, self.args.concurrency, call)
+
+    async def scenario_github(self, size: str, archive: bytes):
+        async def call(number: int) -> float:
+            started = time.perf_counter()
+            response = await self.client.post(
+                "/upload-from-github/",
+                params={"repo_url": f"https://github.com/bench/{size}-{uuid4().hex}", "branch": "main"},
+            )
+            response.raise_for_status()
+            return time.perf_counter() - started
+
+        return await run_load(self.args.requests, self.args.concurrency, call)
+
+    async def scenario_pipeline(self, size: str, archive: bytes):
+        async def call(number: int) -> float:
+            data = unique_copy(archive)
+            started = time.perf_counter()
+            response = await self.client.post("/upload/", files={"file": ("bench.zip", data, "application/zip")})
+            response.raise_for_status()
+            task_id = response.json()["task_id"]
+            await wait_report(self.client, task_id, self.args.report_timeout)
+            self.finished.append(task_id)
+            return time.perf_counter() - started
+
+        return await run_load(self.args.requests, self.args.concurrency, call)
+
+    async def scenario_report(self, size: str, archive: bytes):
+        if not self.finished:
+            # Готовые отчёты нужны для чтения: создаём их через загрузку
+            task_ids = [await self.upload(archive) for _ in range(min(self.args.concurrency, 8))]
+            for task_id in task_ids:
+                await wait_report(self.client, task_id, self.args.report_timeout)
+            self.finished.extend(task_ids)
+
+        async def call(number: int) -> float:
+            started = time.perf_counter()
+            response = await self.client.get(f"/reports/{self.finished[number % len(self.finished)]}")
+            response.raise_for_status()
+            return time.perf_counter() - started
+
+        return await run_load(self.args.requests * 10, self.args.concurrency, call)
+
+
+async def run_scenarios(args: argparse.Namespace, base_url: str) -> list[dict]:
+    results = []
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.report_timeout, limits=limits) as client:
+        bench = Bench(client, args)
+        for size_name in args.sizes:
+            size = parse_size(size_name)
+            archive = build_zip(size)
+            for scenario in args.scenarios:
+                await client.post("/bench/reset")
+                latencies, errors, elapsed = await getattr(bench, f"scenario_{scenario}")(size_name, archive)
+                stats = (await client.get("/bench/stats")).json()
+
+                moved = len(latencies) * len(archive) if scenario != "report" else 0
+                result = {
+                    "scenario": scenario,
+                    "size": size_name,
+                    "requests": len(latencies) + errors,
+                    "errors": errors,
+                    "rps": len(latencies) / elapsed if elapsed else 0.0,
+                    "mb_per_s": moved / elapsed / (1024 * 1024) if elapsed else 0.0,
+                    "p50_ms": percentile(latencies, 0.5) * 1000,
+                    "p99_ms": percentile(latencies, 0.99) * 1000,
+                    "peak_rss_mb": stats["peak_rss"] / (1024 * 1024),
+                    "loop_lag_p99_ms": stats["loop_lag"]["p99_ms"],
+                    "loop_lag_max_ms": stats["loop_lag"]["max_ms"],
+                }
+                results.append(result)
+                print_row(result)
+    return results
+
+
+# Колонка, ширина, знаков после запятой
+COLUMNS = (
+    ("scenario", 9, None), ("size", 6, None), ("requests", 8, None), ("errors", 6, None),
+    ("rps", 9, 1), ("mb_per_s", 9, 1), ("p50_ms", 9, 1), ("p99_ms", 9, 1),
+    ("peak_rss_mb", 11, 1), ("loop_lag_p99_ms", 15, 1), ("loop_lag_max_ms", 15, 1),
+)
+
+
+def print_header():
+    print(" ".join(f"{name:>{width}}" for name, width, _ in COLUMNS))
+
+
+def print_row(result: dict):
+    print(" ".join(
+        f"{result[name]:>{width}.{digits}f}" if digits is not None else f"{result[name]!s:>{width}}"
+        for name, width, digits in COLUMNS
+    ))
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> bool:
+    """
+    Сравнение с сохранённым прогоном
+
+    Регрессией считается рост p99 или падение rps больше чем на threshold.
+
+    :return: bool: True, если регрессий нет
+    """
+    previous = {(row["scenario"], row["size"]): row for row in baseline["results"]}
+    ok = True
+    print(f"\nСравнение с {baseline['name']} ({baseline['created_at']}, {baseline.get('commit') or '-'}):")
+    for row in results:
+        base = previous.get((row["scenario"], row["size"]))
+        if base is None:
+            continue
+        p99 = (row["p99_ms"] - base["p99_ms"]) / base["p99_ms"] if base["p99_ms"] else 0.0
+        rps = (row["rps"] - base["rps"]) / base["rps"] if base["rps"] else 0.0
+        regressed = p99 > threshold or rps < -threshold
+        ok = ok and not regressed
+        print(
+            f"  {row['scenario']:<9} {row['size']:>6}  p99 {p99:+.1%}  rps {rps:+.1%}"
+            f"  rss {row['peak_rss_mb'] - base['peak_rss_mb']:+.1f}MB"
+            f"{'  РЕГРЕССИЯ' if regressed else ''}"
+        )
+    return ok
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def wait_ready(url: str, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Процесс {process.args} завершился с кодом {process.returncode}")
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise TimeoutError(f"{url} не отвечает за {timeout} с")
+
+
+def spawn(module: str, *args: str, env: dict = None) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", module, *args], env={**os.environ, **(env or {})})
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    if args.migrate:
+        subprocess.run(["alembic", "upgrade", "head"], check=True)
+
+    github = spawn("bench.fake_github", "--port", str(args.github_port))
+    server = spawn(
+        "bench.server", "--port", str(args.port), "--storage", args.storage,
+        env={
+            "GITHUB_ARCHIVE_URL": f"http://127.0.0.1:{args.github_port}",
+            "GITHUB_API_URL": f"http://127.0.0.1:{args.github_port}",
+            "MOCK_DELAY_SCALE": str(args.mock_delay_scale),
+            "RETENTION_ENABLED": "false",
+            # Бенчмарк нагружает приложение с одного адреса
+            "ADMISSION_ENABLED": "false",
+            "LOG_LEVEL": "WARNING",
+        },
+    )
+    try:
+        base_url = f"http://127.0.0.1:{args.port}"
+        await wait_ready(f"http://127.0.0.1:{args.github_port}/", github)
+        await wait_ready(f"{base_url}/bench/stats", server)
+
+        print_header()
+        results = await run_scenarios(args, base_url)
+    finally:
+        for process in (server, github):
+            process.terminate()
+            process.wait(timeout=30)
+
+    run = {
+        "name": args.save,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "params": {
+            "storage": args.storage,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mock_delay_scale": args.mock_delay_scale,
+        },
+        "results": results,
+    }
+    if args.save:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        path = BASELINES_DIR / f"{args.save}.json"
+        path.write_text(json.dumps(run, ensure_ascii=False, indent=2))
+        print(f"\nРезультаты сохранены в {path}")
+
+    if args.compare:
+        baseline = json.loads((BASELINES_DIR / f"{args.compare}.json").read_text())
+        if not compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Сценарии через запятую: {', '.join(SCENARIOS)}")
+    parser.add_argument("--sizes", default="1mb,16mb,64mb", help="Размеры архивов через запятую")
+    parser.add_argument("--requests", type=int, default=50, help="Запросов на сценарий и размер")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--storage", choices=("memory", "minio"), default="memory")
+    parser.add_argument("--mock-delay-scale", type=float, default=0.01, help="Множитель задержек моков анализаторов")
+    parser.add_argument("--report-timeout", type=float, default=300.0)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--github-port", type=int, default=8200)
+    parser.add_argument("--migrate", action="store_true", help="Применить миграции перед запуском")
+    parser.add_argument("--save", metavar="NAME", help="Сохранить результаты в bench/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Сравнить с bench/baselines/NAME.json")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Допустимое ухудшение p99/rps (доля)")
+    args = parser.parse_args()
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+    args.sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Запуск приложения для бенчмарка с замером задержек event loop и пикового RSS
+
+Запуск: python -m bench.server --port 8100 [--storage memory]
+"""
+import argparse
+import asyncio
+import resource
+import time
+import uvicorn
+from app.files.clients import clients
+from app.main import app
+from bench.storage import InMemoryStorage
+
+LAG_INTERVAL = 0.01  # = 10ms
+LAG_SAMPLES = 100_000
+
+
+class LoopLagMonitor:
+    """Замер задержки event loop: насколько позже запланированного просыпается sleep"""
+
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            if len(self.samples) < LAG_SAMPLES:
+                self.samples.append(max(time.perf_counter() - started - self.interval, 0.0))
+
+    def reset(self):
+        self.samples = []
+
+    def stats(self) -> dict:
+        samples = sorted(self.samples)
+        if not samples:
+            return {"p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "p50_ms": samples[len(samples) // 2] * 1000,
+            "p99_ms": samples[min(int(len(samples) * 0.99), len(samples) - 1)] * 1000,
+            "max_ms": samples[-1] * 1000,
+        }
+
+
+def peak_rss() -> int:
+    """Пиковый RSS процесса в байтах (с момента последнего reset_peak_rss на Linux)"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+monitor = LoopLagMonitor()
+
+
+@app.get("/bench/stats", include_in_schema=False)
+async def bench_stats():
+    return {"loop_lag": monitor.stats(), "peak_rss": peak_rss()}
+
+
+@app.post("/bench/reset", include_in_schema=False)
+async def bench_reset():
+    monitor.reset()
+    reset_peak_rss()
+    return {"peak_rss": peak_rss()}
+
+
+async def serve(host: str, port: int):
+    monitor.start()
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    await server.serve()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--storage", choices=("minio", "memory"), default="memory")
+    args = parser.parse_args()
+
+    if args.storage == "memory":
+        clients.minio_factory = InMemoryStorage
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import io
+from uuid import uuid4
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable
+from minio.error import S3Error
+
+
+class InMemoryStorage:
+    """
+    Хранилище объектов в памяти с интерфейсом MinioClient
+
+    Подменяет MinIO в бенчмарке, чтобы измерять само приложение без сети
+    и диска хранилища.
+    """
+
+    def __init__(self, bucket_name: str):
+        self.bucket_name = bucket_name
+        self.objects: dict[str, bytes] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+
+    async def create_bucket(self):
+        pass
+
+    async def upload_file(self, file: io.IOBase | BinaryIO, file_name: str, metadata: dict = None) -> int:
+        def read() -> bytes:
+            file.seek(0)
+            return file.read()
+
+        data = await asyncio.to_thread(read)
+        self.objects[file_name] = data
+        return len(data)
+
+    async def upload_stream(
+            self,
+            chunks: AsyncIterator[bytes],
+            file_name: str,
+            metadata: dict = None,
+            on_progress: Callable[[int], Awaitable[None]] = None,
+    ) -> int:
+        parts = []
+        transferred = 0
+        async for chunk in chunks:
+            parts.append(chunk)
+            transferred += len(chunk)
+        self.objects[file_name] = b"".join(parts)
+        if on_progress is not None:
+            await on_progress(transferred)
+        return transferred
+
+    async def download_file(self, file_name: str, path: str):
+        def write():
+            with open(path, "wb") as file:
+                file.write(self.objects[file_name])
+
+        await asyncio.to_thread(write)
+
+    async def read_object(self, file_name: str) -> bytes:
+        if file_name not in self.objects:
+            raise S3Error(
+                code="NoSuchKey", message="The specified key does not exist", resource=file_name,
+                request_id=None, host_id=None, response=None,
+            )
+        return self.objects[file_name]
+
+    async def object_size(self, file_name: str) -> int:
+        return len(self.objects[file_name])
+
+    def open_ranged(self, file_name: str, size: int) -> io.BytesIO:
+        return io.BytesIO(self.objects[file_name])
+
+    async def hash_object(self, file_name: str) -> str:
+        return await asyncio.to_thread(lambda: hashlib.sha256(self.objects[file_name]).hexdigest())
+
+    async def create_multipart_upload(self, file_name: str, filename: str) -> str:
+        upload_id = uuid4().hex
+        self.uploads[upload_id] = {}
+        return upload_id
+
+    async def upload_part(self, file_name: str, upload_id: str, part_number: int, data: bytes) -> str:
+        self.uploads[upload_id][part_number] = data
+        return hashlib.md5(data).hexdigest()
+
+    async def complete_multipart_upload(self, file_name: str, upload_id: str, parts: list[tuple[int, str]]):
+        if upload_id not in self.uploads:
+            raise S3Error(
+                code="NoSuchUpload", message="The specified upload does not exist", resource=file_name,
+                request_id=None, host_id=None, response=None,
+            )
+        received = self.uploads.pop(upload_id)
+        self.objects[file_name] = b"".join(received[part_number] for part_number, _ in parts)
+
+    async def abort_multipart_upload(self, file_name: str, upload_id: str):
+        self.uploads.pop(upload_id, None)
+
+    async def file_exists(self, file_name: str) -> bool:
+        return file_name in self.objects
+
+    async def remove_object(self, file_name: str):
+        self.objects.pop(file_name, None)
+
+    async def remove_objects(self, file_names: list[str]) -> int:
+        for file_name in file_names:
+            self.objects.pop(file_name, None)
+        return 0
+
+    def close(self):
+        self.objects.clear()
+        self.uploads.clear()
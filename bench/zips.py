@@ -0,0 +1,44 @@
+import io
+import os
+import zipfile
+from uuid import uuid4
+
+# Комментарий в конце архива заменяется на новый UUID, чтобы каждый архив
+# имел уникальный sha256 и не попадал под дедупликацию и повторное использование
+_COMMENT_SIZE = 36
+
+
+def parse_size(value: str) -> int:
+    """
+    Разбор размера вида "512kb", "16mb", "1gb" или числа байт
+
+    :param value: Строка с размером
+    :return: int: Размер в байтах
+    """
+    value = value.strip().lower()
+    for suffix, factor in (("kb", 1024), ("mb", 1024 ** 2), ("gb", 1024 ** 3)):
+        if value.endswith(suffix):
+            return int(float(value[:-len(suffix)]) * factor)
+    return int(value)
+
+
+def build_zip(size: int, files: int = 16) -> bytes:
+    """
+    Архив из несжимаемых файлов общим размером около size байт
+
+    :param size: Суммарный размер содержимого
+    :param files: Число файлов в архиве
+    :return: bytes: ZIP-архив
+    """
+    buffer = io.BytesIO()
+    file_size = max(size // files, 1)
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for number in range(files):
+            archive.writestr(f"bench/src/file_{number}.bin", os.urandom(file_size))
+        archive.comment = b"0" * _COMMENT_SIZE
+    return buffer.getvalue()
+
+
+def unique_copy(base: bytes) -> bytes:
+    """Копия архива с уникальным комментарием (и, значит, уникальным хэшем)"""
+    return base[:-_COMMENT_SIZE] + str(uuid4()).encode()
@@ -0,0 +1,80 @@
+"""initial schema: reports and analyzer results
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+report_status = postgresql.ENUM(
+    "UPLOADING", "PENDING", "IN_PROGRESS", "SUCCESS", "PARTIAL", "ERROR",
+    name="report_status",
+    create_type=False,
+)
+analyzer_status = postgresql.ENUM(
+    "IN_PROGRESS", "SUCCESS", "ERROR", "TIMEOUT",
+    name="analyzer_status",
+    create_type=False,
+)
+
+
+def upgrade() -> None:
+    report_status.create(op.get_bind(), checkfirst=True)
+    analyzer_status.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        "reports",
+        sa.Column("id", postgresql.UUID(as_uuid=False), nullable=False),
+        sa.Column("status", report_status, nullable=False),
+        sa.Column("results", postgresql.JSONB(), nullable=True),
+        sa.Column("uploaded_bytes", sa.BigInteger(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=True),
+        sa.Column("object_name", sa.String(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("next_run_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_reports_status_next_run_at", "reports", ["status", "next_run_at"])
+    op.create_index("ix_reports_status_created_at", "reports", ["status", "created_at"])
+    op.create_index("ix_reports_content_hash_completed_at", "reports", ["content_hash", "completed_at"])
+
+    op.create_table(
+        "analyzerresults",
+        sa.Column("report_id", postgresql.UUID(as_uuid=False), nullable=False),
+        sa.Column("analyzer", sa.String(), nullable=False),
+        sa.Column("status", analyzer_status, nullable=False),
+        sa.Column("results", postgresql.JSONB(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["report_id"], ["reports.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("report_id", "analyzer"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("analyzerresults")
+    op.drop_index("ix_reports_content_hash_completed_at", table_name="reports")
+    op.drop_index("ix_reports_status_created_at", table_name="reports")
+    op.drop_index("ix_reports_status_next_run_at", table_name="reports")
+    op.drop_table("reports")
+    analyzer_status.drop(op.get_bind(), checkfirst=True)
+    report_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,28 @@
+"""compressed report results
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("reports", sa.Column("results_blob", sa.LargeBinary(), nullable=True))
+    # Результаты, сохранённые строкой JSON внутри JSONB, приводятся к объекту
+    op.execute("UPDATE reports SET results = (results #>> '{}')::jsonb WHERE jsonb_typeof(results) = 'string'")
+
+
+def downgrade() -> None:
+    op.drop_column("reports", "results_blob")
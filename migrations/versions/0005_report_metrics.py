@@ -0,0 +1,81 @@
+"""indexed report metrics for search and aggregation
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CATEGORIES = ("bugs", "vulnerabilities", "code_smells")
+SEVERITIES = ("total", "critical", "major", "minor")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "reportmetrics",
+        sa.Column("report_id", postgresql.UUID(as_uuid=False), nullable=False),
+        sa.Column("analyzer", sa.String(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(name="report_status", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("coverage", sa.Float(), nullable=True),
+        *(
+            sa.Column(f"{category}_{severity}", sa.Integer(), nullable=True)
+            for category in CATEGORIES
+            for severity in SEVERITIES
+        ),
+        sa.ForeignKeyConstraint(["report_id"], ["reports.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("report_id", "analyzer"),
+    )
+    op.create_index("ix_reportmetrics_completed_at", "reportmetrics", ["completed_at"])
+    op.create_index("ix_reportmetrics_analyzer_completed_at", "reportmetrics", ["analyzer", "completed_at"])
+    op.create_index(
+        "ix_reportmetrics_vulnerabilities_critical",
+        "reportmetrics",
+        ["vulnerabilities_critical", "completed_at"],
+        postgresql_where=sa.text("vulnerabilities_critical > 0"),
+    )
+
+    # Показатели уже завершённых отчётов (сжатые results_blob здесь не разбираются)
+    counts = [f"{category}_{severity}" for category in CATEGORIES for severity in SEVERITIES]
+    values = [
+        f"CASE WHEN jsonb_typeof(a.value->'{category}'->'{severity}') = 'number' "
+        f"THEN (a.value->'{category}'->>'{severity}')::integer END"
+        for category in CATEGORIES
+        for severity in SEVERITIES
+    ]
+    op.execute(f"""
+        INSERT INTO reportmetrics (report_id, analyzer, status, completed_at, coverage, {", ".join(counts)})
+        SELECT
+            r.id, a.key, r.status, COALESCE(r.completed_at, r.updated_at),
+            CASE WHEN jsonb_typeof(a.value->'overall_coverage') = 'number'
+                THEN (a.value->>'overall_coverage')::double precision END,
+            {", ".join(values)}
+        FROM reports r, jsonb_each(r.results->'results') a
+        WHERE r.status IN ('SUCCESS', 'PARTIAL')
+            AND jsonb_typeof(r.results->'results') = 'object'
+            AND jsonb_typeof(a.value) = 'object'
+            AND (a.value ?| array['overall_coverage', 'bugs', 'vulnerabilities', 'code_smells'])
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reportmetrics_vulnerabilities_critical", table_name="reportmetrics")
+    op.drop_index("ix_reportmetrics_analyzer_completed_at", table_name="reportmetrics")
+    op.drop_index("ix_reportmetrics_completed_at", table_name="reportmetrics")
+    op.drop_table("reportmetrics")
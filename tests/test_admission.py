@@ -0,0 +1,94 @@
+"""
+Допуск запросов: определение клиента, корзины токенов и лимит загружаемых байт
+"""
+import pytest
+from app import admission
+from app.admission import AdmissionMiddleware, RateLimiter, TokenBucket, UploadBudget
+from app.config import settings
+
+
+def make_middleware(monkeypatch, api_keys=(), trust_forwarded=False) -> AdmissionMiddleware:
+    monkeypatch.setattr(settings, "RATE_LIMIT_API_KEYS", list(api_keys))
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED", trust_forwarded)
+    return AdmissionMiddleware(app=None)
+
+
+def test_unknown_api_key_falls_back_to_address(monkeypatch):
+    middleware = make_middleware(monkeypatch, api_keys=["known"])
+    scope = {"client": ("10.0.0.5", 4321)}
+
+    assert middleware._client(scope, {"x-api-key": "known"}) == "key:known"
+    assert middleware._client(scope, {"x-api-key": "random-1"}) == "10.0.0.5"
+    assert middleware._client(scope, {"x-api-key": "random-2"}) == "10.0.0.5"
+
+
+def test_forwarded_for_uses_hop_added_by_proxy(monkeypatch):
+    scope = {"client": ("172.16.0.1", 4321)}
+    headers = {"x-forwarded-for": "1.2.3.4, 203.0.113.7"}
+
+    assert make_middleware(monkeypatch, trust_forwarded=True)._client(scope, headers) == "203.0.113.7"
+    assert make_middleware(monkeypatch)._client(scope, headers) == "172.16.0.1"
+
+
+class Clock:
+    """Управляемое время для корзин токенов"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+def test_token_bucket_refills_up_to_burst(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.take() == 0.0
+    clock.now += 60
+    assert [bucket.take() for _ in range(4)][-1] == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize("rate, burst", [(0, 10), (-1.0, 10), (1.0, 0)])
+def test_invalid_rate_is_rejected(rate, burst):
+    with pytest.raises(ValueError):
+        TokenBucket(rate, burst)
+    with pytest.raises(ValueError):
+        RateLimiter(rate, burst, max_clients=10)
+
+
+def test_rate_limiter_keeps_buckets_per_client_and_evicts_oldest(clock):
+    limiter = RateLimiter(rate=1.0, burst=1, max_clients=2)
+    assert limiter.check("a") == 0.0
+    assert limiter.check("a") == pytest.approx(1.0)
+    assert limiter.check("b") == 0.0
+
+    # "a" обращался последним, поэтому при переполнении вытесняется "b"
+    assert limiter.check("a") > 0
+    assert limiter.check("c") == 0.0
+    assert list(limiter._buckets) == ["a", "c"]
+    assert limiter.check("b") == 0.0
+
+
+def test_upload_budget_admits_single_oversized_upload():
+    budget = UploadBudget(max_bytes=100)
+    assert budget.reserve(60)
+    assert not budget.reserve(50)
+    assert budget.reserve(40)
+    budget.release(60)
+    budget.release(40)
+    assert budget.in_flight == 0
+
+    # Архив больше лимита проходит, но только один
+    assert budget.reserve(500)
+    assert not budget.reserve(1)
+    budget.release(500)
@@ -0,0 +1,162 @@
+"""
+Политика запуска анализаторов: слоты, таймауты и повторы
+"""
+import asyncio
+import os
+import time
+import pytest
+from app.config import settings
+from app.reports import analyzers
+from app.reports.analyzers import Analyzer, AnalyzerRegistry
+from app.reports.extraction import ExtractionCache
+from app.reports.process_pool import process_pool
+
+
+def sleep_report(task_id: str) -> dict:
+    """CPU-bound анализатор для пула процессов: task_id — длительность в секундах"""
+    time.sleep(float(task_id))
+    return {"slept": task_id}
+
+
+def archive_size_report(task_id: str, path: str) -> dict:
+    """CPU-bound анализатор с архивом: путь приходит из кэша основного процесса"""
+    time.sleep(float(task_id))
+    return {"size": os.path.getsize(path)}
+
+
+@pytest.fixture
+def cache(storage, monkeypatch, tmp_path) -> ExtractionCache:
+    """Отдельный кэш архивов в tmp_path; у всех задач один объект archive.zip в хранилище"""
+    monkeypatch.setattr(settings, "EXTRACTION_CACHE_DIR", str(tmp_path))
+    cache = ExtractionCache(max_bytes=0)
+
+    async def object_name(task_id: str) -> str:
+        return "archive.zip"
+
+    monkeypatch.setattr(cache, "object_name", object_name)
+    monkeypatch.setattr(analyzers, "extraction_cache", cache)
+    return cache
+
+
+def test_explicit_zero_is_not_replaced_by_default():
+    assert Analyzer("zero", sleep_report, retries=0).retries == 0
+    assert Analyzer("default", sleep_report).timeout == settings.ANALYZER_DEFAULT_TIMEOUT
+
+
+@pytest.mark.parametrize("options", [
+    {"concurrency": 0}, {"timeout": 0}, {"timeout": -1.0}, {"retries": -1}, {"archive": "tar"},
+])
+def test_invalid_policy_is_rejected(options):
+    with pytest.raises(ValueError):
+        Analyzer("invalid", sleep_report, **options)
+
+
+def test_timeout_is_retried_then_raised(monkeypatch):
+    monkeypatch.setattr(settings, "ANALYZER_RETRY_BACKOFF", 0.01)
+
+    async def scenario():
+        calls = []
+
+        async def hanging(task_id: str) -> dict:
+            calls.append(task_id)
+            await asyncio.sleep(10)
+
+        registry = AnalyzerRegistry()
+        analyzer = registry.register("hanging", hanging, timeout=0.05, retries=2)
+        with pytest.raises(asyncio.TimeoutError):
+            await registry.run(analyzer, "task")
+        assert calls == ["task"] * 3
+        assert analyzer.limit._value == analyzer.concurrency
+
+    asyncio.run(scenario())
+
+
+def test_retry_backoff_does_not_hold_slot(monkeypatch):
+    monkeypatch.setattr(settings, "ANALYZER_RETRY_BACKOFF", 0.2)
+
+    async def scenario():
+        calls = []
+
+        async def flaky(task_id: str) -> dict:
+            calls.append(task_id)
+            if len(calls) == 1:
+                raise RuntimeError("сбой")
+            return {"ok": True}
+
+        registry = AnalyzerRegistry()
+        analyzer = registry.register("flaky", flaky, concurrency=1, retries=1)
+        run = asyncio.create_task(registry.run(analyzer, "task"))
+        await asyncio.sleep(0.1)
+        assert calls == ["task"] and not analyzer.limit.locked()
+        assert await run == {"ok": True}
+
+    asyncio.run(scenario())
+
+
+def test_timed_out_process_job_keeps_slot_until_it_finishes():
+    async def scenario():
+        registry = AnalyzerRegistry()
+        analyzer = registry.register("slow", sleep_report, concurrency=1, timeout=30, retries=0, cpu_bound=True)
+        try:
+            # Первый запуск поднимает процесс пула, чтобы следующий не ждал в очереди
+            await registry.run(analyzer, "0")
+            analyzer.timeout = 0.2
+            with pytest.raises(asyncio.TimeoutError):
+                await registry.run(analyzer, "1")
+            assert analyzer.limit.locked()
+            await asyncio.wait_for(analyzer.limit.acquire(), timeout=5)
+            analyzer.limit.release()
+        finally:
+            process_pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_process_job_gets_archive_held_until_it_finishes(cache, storage, make_zip):
+    storage.objects["archive.zip"] = archive = make_zip()
+
+    async def scenario():
+        registry = AnalyzerRegistry()
+        analyzer = registry.register(
+            "sized", archive_size_report, concurrency=1, timeout=30, retries=0, cpu_bound=True, archive="zip"
+        )
+        try:
+            assert await registry.run(analyzer, "0") == {"size": len(archive)}
+            # Кэш ограничен нулём байт: освобождённый архив сразу вытесняется
+            assert cache.evictions == 1
+
+            analyzer.timeout = 0.2
+            with pytest.raises(asyncio.TimeoutError):
+                await registry.run(analyzer, "1")
+            [entry] = cache._entries.values()
+            assert entry.refs == 1 and os.path.exists(entry.archive_path)
+            await asyncio.wait_for(analyzer.limit.acquire(), timeout=5)
+            await asyncio.sleep(0.1)
+            assert entry.refs == 0 and not cache._entries
+        finally:
+            process_pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_files_analyzers_share_one_extraction(cache, storage, make_zip):
+    storage.objects["archive.zip"] = make_zip({"src/main.py": "print()\n", "README.md": "# readme\n"})
+
+    async def list_files(task_id: str, path: str) -> dict:
+        return {"path": path, "files": sorted(
+            os.path.relpath(os.path.join(root, name), path) for root, _, names in os.walk(path) for name in names
+        )}
+
+    async def scenario():
+        registry = AnalyzerRegistry()
+        first = registry.register("first", list_files, archive="files")
+        second = registry.register("second", list_files, archive="files")
+        results = await asyncio.gather(registry.run(first, "task"), registry.run(second, "task"))
+
+        assert results[0] == results[1]
+        assert results[0]["files"] == ["README.md", os.path.join("src", "main.py")]
+        # Один архив скачан и распакован один раз, после освобождения вытеснен
+        assert (cache.misses, cache.hits, cache.evictions) == (1, 1, 1)
+        assert not os.path.exists(results[0]["path"])
+
+    asyncio.run(scenario())
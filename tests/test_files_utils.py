@@ -0,0 +1,60 @@
+"""
+Проверка структуры ZIP-архива: лимиты числа файлов, объёма и степени сжатия
+"""
+import io
+import zipfile
+import pytest
+from app.config import settings
+from app.files.files_utils import check_zip_structure
+
+
+def make_archive(files: dict[str, bytes]) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def test_valid_archive_passes_and_rewinds():
+    archive = make_archive({"main.py": b"print('hello')\n"})
+    archive.seek(10)
+    assert check_zip_structure(archive, verify_crc=True)
+    assert archive.tell() == 0
+
+
+def test_entry_limit(monkeypatch):
+    monkeypatch.setattr(settings, "ZIP_MAX_ENTRIES", 2)
+    assert check_zip_structure(make_archive({"a": b"1", "b": b"2"}))
+    assert not check_zip_structure(make_archive({"a": b"1", "b": b"2", "c": b"3"}))
+
+
+def test_compression_ratio_limit(monkeypatch):
+    # Мегабайт нулей сжимается примерно в тысячу раз
+    bomb = make_archive({"zeros.bin": b"\0" * 1024 * 1024})
+    monkeypatch.setattr(settings, "ZIP_MAX_COMPRESSION_RATIO", 100.0)
+    assert not check_zip_structure(bomb)
+    monkeypatch.setattr(settings, "ZIP_MAX_COMPRESSION_RATIO", 10_000.0)
+    assert check_zip_structure(bomb)
+
+
+def test_uncompressed_size_limit(monkeypatch):
+    monkeypatch.setattr(settings, "ZIP_MAX_COMPRESSION_RATIO", 10_000.0)
+    monkeypatch.setattr(settings, "ZIP_MAX_UNCOMPRESSED_SIZE", 1000)
+    assert check_zip_structure(make_archive({"big.txt": b"x" * 1000}))
+    assert not check_zip_structure(make_archive({"big.txt": b"x" * 1001}))
+
+
+@pytest.mark.parametrize("data", [b"", b"PK\x03\x04 not really a zip", make_archive({}).getvalue()])
+def test_broken_or_empty_archive_is_rejected(data):
+    assert not check_zip_structure(io.BytesIO(data))
+
+
+def test_crc_mismatch_is_detected_only_when_requested():
+    data = bytearray(make_archive({"main.py": b"print('hello')\n" * 100}).getvalue())
+    # Порча сжатых данных первого файла (сразу после локального заголовка и имени)
+    offset = 30 + len("main.py") + 5
+    data[offset] ^= 0xFF
+    assert check_zip_structure(io.BytesIO(bytes(data)))
+    assert not check_zip_structure(io.BytesIO(bytes(data)), verify_crc=True)
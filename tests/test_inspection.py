@@ -0,0 +1,88 @@
+"""
+Анализатор inspection: включение через settings.ANALYZERS и список файлов отдельным объектом
+"""
+import asyncio
+import gzip
+import uuid
+import httpx
+import orjson
+from sqlalchemy import insert, text
+from app.config import settings
+from app.database import async_session_maker
+from app.main import app
+from app.reports.analyzers import AnalyzerRegistry, analyzer_registry
+from app.reports.extraction import extraction_cache
+from app.reports.inspection import archive_inspector, files_object_name, inspect_archive
+from app.reports.models import Report, ReportStatus
+from app.reports.process_pool import process_pool
+
+
+def test_inspection_is_opt_in(monkeypatch):
+    assert analyzer_registry._optional["inspection"].archive == "zip"
+
+    registry = AnalyzerRegistry()
+    registry.register_optional("inspection", inspect_archive, archive="zip")
+    monkeypatch.setattr(settings, "ANALYZER_ENTRY_POINTS", False)
+    monkeypatch.setattr(settings, "ANALYZERS", {})
+    assert registry.get("inspection") is None
+
+    registry._loaded = False
+    monkeypatch.setattr(settings, "ANALYZERS", {"inspection": {"timeout": 30}})
+    analyzer = registry.get("inspection")
+    assert (analyzer.timeout, analyzer.archive) == (30, "zip")
+
+
+def test_results_hold_summary_and_files_go_to_storage(storage, make_zip, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "INSPECTION_MAX_FILES", 2)
+    path = tmp_path / "archive.zip"
+    path.write_bytes(make_zip({"main.py": "print(1)\nprint(2)\n", "lib.py": "x = 1\n", "README.md": "# readme"}))
+
+    async def object_name(task_id: str) -> str:
+        return f"{task_id}.zip"
+
+    monkeypatch.setattr(extraction_cache, "object_name", object_name)
+
+    async def scenario():
+        try:
+            return await archive_inspector.inspect("task", str(path))
+        finally:
+            process_pool.shutdown()
+
+    results = asyncio.run(scenario())
+    assert set(results) == {"summary", "truncated"} and results["truncated"] is True
+    assert results["summary"]["files"] == 3 and results["summary"]["lines"] == 4
+    assert results["summary"]["languages"]["Python"] == {"files": 2, "lines": 3, "bytes": 24}
+
+    files = orjson.loads(gzip.decompress(storage.objects[files_object_name("task.zip")]))
+    assert [item["path"] for item in files] == ["main.py", "lib.py"]
+
+
+def test_files_endpoint_serves_stored_list(database, storage):
+    task_id = str(uuid.uuid4())
+    files = [{"path": "main.py", "size": 9}]
+
+    async def scenario():
+        async with async_session_maker() as db:
+            await db.execute(insert(Report).values(
+                id=task_id, status=ReportStatus.SUCCESS, object_name=f"{task_id}.zip",
+            ))
+            await db.commit()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # Анализатор inspection не запускался: списка нет
+            assert (await client.get(f"/reports/{task_id}/files")).status_code == 404
+            storage.objects[files_object_name(f"{task_id}.zip")] = gzip.compress(orjson.dumps(files))
+            response = await client.get(f"/reports/{task_id}/files")
+            assert response.status_code == 200 and response.json() == files
+            assert (await client.get(f"/reports/{uuid.uuid4()}/files")).status_code == 404
+
+    async def cleanup():
+        async with async_session_maker() as db:
+            await db.execute(text("DELETE FROM reports WHERE id = :id"), {"id": task_id})
+            await db.commit()
+
+    try:
+        database(scenario)
+    finally:
+        database(cleanup)
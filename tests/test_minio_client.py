@@ -0,0 +1,80 @@
+"""
+MinioClient: потоковые загрузки и закрытый API SDK для загрузки частями
+"""
+import asyncio
+import inspect
+import threading
+import pytest
+from minio import Minio
+from minio.datatypes import Part
+from app.config import settings
+from app.files.minio_client import MinioClient
+
+
+def test_stream_uploads_use_own_pool(monkeypatch):
+    monkeypatch.setattr(settings, "MINIO_MAX_WORKERS", 1)
+    monkeypatch.setattr(settings, "MINIO_STREAM_WORKERS", 2)
+
+    async def scenario():
+        client = MinioClient(bucket_name="test")
+        release = asyncio.Event()
+        started = []
+        stored = {}
+        stored_lock = threading.Lock()
+
+        def put_object(bucket_name, object_name, data, **kwargs):
+            content = data.read()
+            with stored_lock:
+                stored[object_name] = content
+
+        monkeypatch.setattr(client.client, "put_object", put_object)
+
+        async def source(name: str):
+            started.append(name)
+            yield b"first"
+            await release.wait()
+            yield b"second"
+
+        uploads = [
+            asyncio.create_task(client.upload_stream(source(f"{index}.zip"), f"{index}.zip"))
+            for index in range(3)
+        ]
+        await asyncio.sleep(0.2)
+        try:
+            # Третья загрузка ждёт слота и не начинает скачивание источника
+            assert sorted(started) == ["0.zip", "1.zip"]
+            # Общий пул свободен, пока потоковые загрузки ждут данных
+            assert await asyncio.wait_for(client._run(lambda: "ok"), timeout=1) == "ok"
+        finally:
+            release.set()
+        assert await asyncio.gather(*uploads) == [len(b"firstsecond")] * 3
+        assert stored == {f"{index}.zip": b"firstsecond" for index in range(3)}
+        client.close()
+
+    asyncio.run(scenario())
+
+
+# Закрытые методы SDK, на которых построена загрузка частями (minio>=7.2,<7.3),
+# и параметры, которые MinioClient передаёт позиционно
+MULTIPART_API = {
+    "_create_multipart_upload": ["bucket_name", "object_name", "headers"],
+    "_upload_part": ["bucket_name", "object_name", "data", "headers", "upload_id", "part_number"],
+    "_complete_multipart_upload": ["bucket_name", "object_name", "upload_id", "parts"],
+    "_abort_multipart_upload": ["bucket_name", "object_name", "upload_id"],
+}
+
+
+@pytest.mark.parametrize("name, parameters", MULTIPART_API.items())
+def test_private_multipart_api_is_compatible(name, parameters):
+    signature = inspect.signature(getattr(Minio, name))
+    required = [
+        parameter.name for parameter in signature.parameters.values()
+        if parameter.name != "self" and parameter.default is inspect.Parameter.empty
+    ]
+    assert list(signature.parameters)[1:len(parameters) + 1] == parameters
+    assert required == parameters
+
+
+def test_part_accepts_number_and_etag():
+    part = Part(3, "etag")
+    assert (part.part_number, part.etag) == (3, "etag")
@@ -0,0 +1,97 @@
+"""
+Загрузка частями (PUT /uploads/{id}/parts, POST /uploads/{id}/complete) на настоящем Postgres
+"""
+import httpx
+import pytest
+from sqlalchemy import select, text, update
+from app.database import async_session_maker
+from app.main import app
+from app.reports.models import Report, ReportStatus, UploadSession
+from app.reports.reports_service import reports_service
+
+
+def test_complete_is_retryable_after_failure(database, storage, make_zip, monkeypatch):
+    finish_upload = reports_service.finish_upload
+    archive = make_zip()
+    task_ids = []
+
+    async def failing_finish_upload(*args, **kwargs):
+        monkeypatch.setattr(reports_service, "finish_upload", finish_upload)
+        raise RuntimeError("сбой после сборки архива")
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/uploads", json={"filename": "code.zip", "size": len(archive)})
+            assert response.status_code == 200, response.text
+            task_id = response.json()["upload_id"]
+            task_ids.append(task_id)
+            response = await client.put(f"/uploads/{task_id}/parts/1", content=archive)
+            assert response.status_code == 200, response.text
+
+            monkeypatch.setattr(reports_service, "finish_upload", failing_finish_upload)
+            with pytest.raises(RuntimeError):
+                await client.post(f"/uploads/{task_id}/complete")
+
+            # Сессия и аренда не мешают повтору, объект уже собран
+            async with async_session_maker() as db:
+                session = await db.get(UploadSession, task_id)
+                assert session is not None and session.completing_until is None
+                assert (await db.get(Report, task_id)).status == ReportStatus.UPLOADING
+            assert f"{task_id}.zip" in storage.objects
+
+            response = await client.post(f"/uploads/{task_id}/complete")
+            assert response.status_code == 200, response.text
+            assert response.json()["cached"] is False
+            async with async_session_maker() as db:
+                assert (await db.get(Report, task_id)).status == ReportStatus.PENDING
+                assert (await db.execute(select(UploadSession).where(UploadSession.id == task_id))).scalar() is None
+            assert (await client.get(f"/uploads/{task_id}")).status_code == 404
+
+    async def cleanup():
+        async with async_session_maker() as db:
+            await db.execute(text("DELETE FROM reports WHERE id = ANY(CAST(:ids AS uuid[]))"), {"ids": task_ids})
+            await db.commit()
+
+    try:
+        database(scenario)
+    finally:
+        database(cleanup)
+
+
+def test_parts_are_rejected_once_completion_started(database, storage, make_zip):
+    archive = make_zip()
+    task_ids = []
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/uploads", json={"filename": "code.zip", "size": len(archive)})
+            task_id = response.json()["upload_id"]
+            task_ids.append(task_id)
+
+            async def set_session(**values):
+                async with async_session_maker() as db:
+                    await db.execute(update(UploadSession).where(UploadSession.id == task_id).values(**values))
+                    await db.commit()
+
+            # Аренду завершения держит другой запрос
+            await set_session(completing_until=text("now() + interval '1 minute'"))
+            response = await client.put(f"/uploads/{task_id}/parts/1", content=archive)
+            assert response.status_code == 409, response.text
+
+            # Истёкшая аренда не мешает, истёкшая сессия — мешает
+            await set_session(completing_until=text("now() - interval '1 minute'"))
+            assert (await client.put(f"/uploads/{task_id}/parts/1", content=archive)).status_code == 200
+            await set_session(expires_at=text("now() - interval '1 minute'"))
+            assert (await client.put(f"/uploads/{task_id}/parts/1", content=archive)).status_code == 409
+
+    async def cleanup():
+        async with async_session_maker() as db:
+            await db.execute(text("DELETE FROM reports WHERE id = ANY(CAST(:ids AS uuid[]))"), {"ids": task_ids})
+            await db.commit()
+
+    try:
+        database(scenario)
+    finally:
+        database(cleanup)
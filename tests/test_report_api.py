@@ -0,0 +1,69 @@
+"""
+Получение отчёта и подписка на него (GET /reports/{id}, WebSocket) на настоящем Postgres
+"""
+import asyncio
+import uuid
+import httpx
+from sqlalchemy import insert, text
+from app.database import async_session_maker
+from app.main import app, report_events_websocket
+from app.reports.events import report_events
+from app.reports.models import Report, ReportStatus
+
+
+class FakeWebSocket:
+    """Клиент WebSocket, который отключается после первого сообщения"""
+
+    def __init__(self):
+        self.sent = []
+        self.closed_with = None
+        self._received = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        self.sent.append(data)
+        self._received.set()
+
+    async def receive(self) -> dict:
+        await self._received.wait()
+        return {"type": "websocket.disconnect", "code": 1001}
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+def test_missing_report_is_404(database):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(f"/reports/{uuid.uuid4()}")
+        assert response.status_code == 404, response.text
+
+    database(scenario)
+
+
+def test_websocket_disconnect_releases_subscription(database):
+    task_id = str(uuid.uuid4())
+
+    async def scenario():
+        async with async_session_maker() as db:
+            await db.execute(insert(Report).values(id=task_id, status=ReportStatus.PENDING))
+            await db.commit()
+
+        websocket = FakeWebSocket()
+        # Отчёт не меняется: без чтения сокета обработчик ждал бы keep-alive
+        await asyncio.wait_for(report_events_websocket(websocket, task_id), timeout=5)
+        assert len(websocket.sent) == 1 and websocket.closed_with is None
+        assert task_id not in report_events._subscribers
+
+    async def cleanup():
+        async with async_session_maker() as db:
+            await db.execute(text("DELETE FROM reports WHERE id = :id"), {"id": task_id})
+            await db.commit()
+
+    try:
+        database(scenario)
+    finally:
+        database(cleanup)
@@ -0,0 +1,50 @@
+"""
+Кэш сериализованных ответов завершённых отчётов
+"""
+import uuid
+import pytest
+from app.reports import cache
+from app.reports.cache import ReportCache, report_cache
+from app.reports.events import report_events
+
+
+@pytest.fixture
+def clock(monkeypatch) -> list[float]:
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_byte_bound_evicts_least_recently_used(clock):
+    reports = ReportCache(max_bytes=10, ttl=60)
+    reports.put("a", b"1234")
+    reports.put("b", b"1234")
+    assert reports.get("a") == b"1234"
+
+    reports.put("c", b"1234")
+    assert reports.get("b") is None
+    assert (reports.get("a"), reports.get("c")) == (b"1234", b"1234")
+    assert reports.stats() == {"entries": 2, "bytes": 8, "hits": 3, "misses": 1, "evictions": 1}
+
+    # Ответ больше всего кэша не сохраняется и ничего не вытесняет
+    reports.put("huge", b"x" * 11)
+    assert reports.get("huge") is None and reports.stats()["entries"] == 2
+
+
+def test_put_replaces_entry_and_ttl_expires(clock):
+    reports = ReportCache(max_bytes=100, ttl=60)
+    reports.put("a", b"old")
+    reports.put("a", b"new body")
+    assert reports.get("a") == b"new body"
+    assert reports.stats()["bytes"] == len(b"new body")
+
+    clock[0] += 61
+    assert reports.get("a") is None
+    assert reports.stats()["bytes"] == 0
+
+
+def test_report_event_invalidates_entry():
+    report_id = str(uuid.uuid4())
+    report_cache.put(report_id, b'{"status": "SUCCESS"}')
+    report_events.dispatch({"id": report_id, "status": "DELETED"})
+    assert report_cache.get(report_id) is None
@@ -0,0 +1,43 @@
+"""
+Сохранение показателей отчёта в reportmetrics на настоящем Postgres
+"""
+import uuid
+from sqlalchemy import insert, select, text
+from app.database import async_session_maker
+from app.reports.models import Report, ReportMetric, ReportStatus
+from app.reports.report_metrics import report_metrics
+
+
+def test_save_analyzers_with_different_metrics(database):
+    task_id = str(uuid.uuid4())
+    # У анализаторов разный набор показателей: только покрытие, только проблемы
+    results = {"results": {
+        "coverage_service": {"overall_coverage": 87.5},
+        "sonarqube": {"bugs": {"total": 3, "critical": 1}, "vulnerabilities": {"total": 2, "critical": 2}},
+    }}
+
+    async def scenario():
+        async with async_session_maker() as db:
+            await db.execute(insert(Report).values(id=task_id, status=ReportStatus.SUCCESS))
+            await report_metrics.save(task_id, ReportStatus.SUCCESS, results, db)
+            await db.commit()
+
+            rows = {
+                row.analyzer: row
+                for row in (await db.execute(select(ReportMetric).where(ReportMetric.report_id == task_id))).scalars()
+            }
+        assert rows["coverage_service"].coverage == 87.5
+        assert rows["coverage_service"].bugs_total is None
+        assert rows["sonarqube"].coverage is None
+        assert (rows["sonarqube"].bugs_critical, rows["sonarqube"].vulnerabilities_critical) == (1, 2)
+        assert rows["sonarqube"].code_smells_total is None
+
+    async def cleanup():
+        async with async_session_maker() as db:
+            await db.execute(text("DELETE FROM reports WHERE id = :id"), {"id": task_id})
+            await db.commit()
+
+    try:
+        database(scenario)
+    finally:
+        database(cleanup)
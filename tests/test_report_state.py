@@ -0,0 +1,51 @@
+"""
+Сборка отчёта и его состояние в API на настоящем Postgres
+"""
+import uuid
+from sqlalchemy import insert, select, text
+from app.database import async_session_maker
+from app.reports.analyzers import analyzer_registry
+from app.reports.models import AnalyzerResult, AnalyzerStatus, Report, ReportStatus
+from app.reports.reports_service import reports_service
+
+
+def test_assembled_report_clears_analyzer_results(database):
+    task_id = str(uuid.uuid4())
+    names = [analyzer.name for analyzer in analyzer_registry]
+
+    async def scenario():
+        async with async_session_maker() as db:
+            await db.execute(insert(Report).values(id=task_id, status=ReportStatus.IN_PROGRESS))
+            # Все анализаторы уже отработали: generate_report только собирает отчёт
+            await db.execute(insert(AnalyzerResult), [
+                {"report_id": task_id, "analyzer": name, "status": AnalyzerStatus.SUCCESS, "results": {"name": name}}
+                for name in names
+            ])
+            await db.commit()
+
+            in_progress = await reports_service.get_report_state(task_id, db)
+            assert in_progress["results"]["results"] == {name: {"name": name} for name in names}
+
+            await reports_service.generate_report(task_id, db)
+            stored = (await db.execute(
+                select(AnalyzerResult.results).where(AnalyzerResult.report_id == task_id)
+            )).scalars().all()
+            assert stored == [None] * len(names)
+
+            state = await reports_service.get_report_state(task_id, db)
+            assert state["status"] == ReportStatus.SUCCESS
+            assert state["results"]["results"] == {name: {"name": name} for name in names}
+            assert {name: service["status"] for name, service in state["services"].items()} == {
+                name: AnalyzerStatus.SUCCESS for name in names
+            }
+            assert (await reports_service.get_report_states([task_id], db))[task_id] == state
+
+    async def cleanup():
+        async with async_session_maker() as db:
+            await db.execute(text("DELETE FROM reports WHERE id = :id"), {"id": task_id})
+            await db.commit()
+
+    try:
+        database(scenario)
+    finally:
+        database(cleanup)
@@ -0,0 +1,119 @@
+"""
+Очистка устаревших отчётов не удаляет архив или отчёт, который переиспользуется в этот момент
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert, text
+from app.config import settings
+from app.database import async_session_maker
+from app.reports.models import Report, ReportStatus, UploadSession
+from app.reports.reports_service import reports_service
+from app.reports.retention import retention_service
+
+# Отчёт старше любого разумного TTL, чтобы очистка не задела другие строки
+TTL = 3000 * 24 * 60 * 60
+EXPIRED = timedelta(days=3650)
+
+
+async def delete_reports(*report_ids: str):
+    async with async_session_maker() as db:
+        await db.execute(text("DELETE FROM reports WHERE id = ANY(CAST(:ids AS uuid[]))"), {"ids": list(report_ids)})
+        await db.commit()
+
+
+def test_reused_object_survives_concurrent_purge(database, storage, monkeypatch):
+    monkeypatch.setattr(settings, "RETENTION_ARCHIVE_RESULTS", False)
+    content_hash = uuid.uuid4().hex * 2
+    object_name = f"{uuid.uuid4()}.zip"
+    storage.objects[object_name] = b"archive"
+    expired_id, reused_id = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def scenario():
+        async with async_session_maker() as db:
+            await db.execute(insert(Report).values(
+                id=expired_id, status=ReportStatus.ERROR, content_hash=content_hash, object_name=object_name,
+                created_at=datetime.now(timezone.utc) - EXPIRED,
+            ))
+            await db.commit()
+
+        async with async_session_maker() as db:
+            # Новая загрузка нашла архив, но ещё не закоммитила свой отчёт
+            assert await reports_service.find_stored_object(content_hash, db, storage) == object_name
+            assert await retention_service._purge_batch(ReportStatus.ERROR, TTL) == 0
+            assert object_name in storage.objects
+
+            await db.execute(insert(Report).values(
+                id=reused_id, status=ReportStatus.PENDING, content_hash=content_hash, object_name=object_name,
+            ))
+            await db.commit()
+
+        # Устаревший отчёт удаляется, а архив нужен новому
+        assert await retention_service._purge_batch(ReportStatus.ERROR, TTL) == 1
+        assert object_name in storage.objects
+
+    try:
+        database(scenario)
+    finally:
+        database(lambda: delete_reports(expired_id, reused_id))
+
+
+def test_reused_report_survives_concurrent_purge(database, storage, monkeypatch):
+    monkeypatch.setattr(settings, "RETENTION_ARCHIVE_RESULTS", False)
+    content_hash = uuid.uuid4().hex * 2
+    object_name = f"{uuid.uuid4()}.zip"
+    storage.objects[object_name] = b"archive"
+    source_id, cached_id = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def scenario():
+        async with async_session_maker() as db:
+            # Отчёт давно создан, но завершён недавно: его можно переиспользовать
+            await db.execute(insert(Report).values(
+                id=source_id, status=ReportStatus.SUCCESS, content_hash=content_hash, object_name=object_name,
+                results={"results": {}}, created_at=datetime.now(timezone.utc) - EXPIRED,
+                completed_at=datetime.now(timezone.utc),
+            ))
+            await db.commit()
+
+        async with async_session_maker() as db:
+            source = await reports_service.find_reusable_report(content_hash, db)
+            assert source.id == source_id
+            assert await retention_service._purge_batch(ReportStatus.SUCCESS, TTL) == 0
+            await reports_service.create_cached_report(cached_id, source, db)
+
+        assert await retention_service._purge_batch(ReportStatus.SUCCESS, TTL) == 1
+        assert object_name in storage.objects
+
+    try:
+        database(scenario)
+    finally:
+        database(lambda: delete_reports(source_id, cached_id))
+
+
+def test_stale_upload_becomes_error_and_drops_partial_archive(database, storage):
+    stale_id, multipart_id = str(uuid.uuid4()), str(uuid.uuid4())
+    storage.objects[f"{stale_id}.zip"] = b"partial"
+    created_at = datetime.now(timezone.utc) - EXPIRED
+
+    async def scenario():
+        async with async_session_maker() as db:
+            await db.execute(insert(Report), [
+                {"id": stale_id, "status": ReportStatus.UPLOADING, "created_at": created_at},
+                {"id": multipart_id, "status": ReportStatus.UPLOADING, "created_at": created_at},
+            ])
+            # Загрузку частями отменяет purge_expired, когда истечёт её сессия
+            await db.execute(insert(UploadSession).values(
+                id=multipart_id, upload_id="upload", object_name=f"{multipart_id}.zip", filename="code.zip",
+                total_size=1, part_size=1, expires_at=datetime.now(timezone.utc) + timedelta(hours=1),
+            ))
+            await db.commit()
+
+        assert await retention_service._fail_stale_uploads(TTL) == 1
+        async with async_session_maker() as db:
+            assert (await db.get(Report, stale_id)).status == ReportStatus.ERROR
+            assert (await db.get(Report, multipart_id)).status == ReportStatus.UPLOADING
+        assert f"{stale_id}.zip" not in storage.objects
+
+    try:
+        database(scenario)
+    finally:
+        database(lambda: delete_reports(stale_id, multipart_id))
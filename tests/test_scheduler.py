@@ -0,0 +1,54 @@
+"""
+Воркеры очереди генерации отчётов (без БД)
+"""
+import asyncio
+import pytest
+from app.config import settings
+from app.reports.scheduler import ReportScheduler
+
+
+@pytest.mark.parametrize("attempt, delay", [(1, 5.0), (2, 10.0), (3, 20.0), (7, 300.0)])
+def test_retry_delay_is_exponential_and_capped(monkeypatch, attempt, delay):
+    monkeypatch.setattr(settings, "REPORT_RETRY_BACKOFF", 5.0)
+    monkeypatch.setattr(settings, "REPORT_RETRY_BACKOFF_MAX", 300.0)
+    assert ReportScheduler.retry_delay(attempt) == delay
+
+
+def test_worker_survives_failure_to_record_error(monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_POLL_INTERVAL", 0.01)
+
+    class FailingService:
+        def __init__(self):
+            self.processed = []
+
+        async def run_report_generation(self, task_id: str):
+            self.processed.append(task_id)
+            raise RuntimeError("анализатор упал")
+
+    async def scenario():
+        service = FailingService()
+        scheduler = ReportScheduler(service)
+        # Вторая задача исчерпала попытки: _fail вызывается до генерации
+        jobs = [("first", 1), ("exhausted", settings.REPORT_MAX_ATTEMPTS + 1), ("second", 1)]
+        failed = []
+
+        async def claim():
+            return jobs.pop(0) if jobs else None
+
+        async def fail(task_id: str, attempt: int, error: str):
+            failed.append(task_id)
+            raise ConnectionError("БД недоступна")
+
+        monkeypatch.setattr(scheduler, "_claim", claim)
+        monkeypatch.setattr(scheduler, "_fail", fail)
+        scheduler._wakeup = asyncio.Event()
+        worker = asyncio.create_task(scheduler._worker(0))
+        await asyncio.sleep(0.2)
+
+        assert failed == ["first", "exhausted", "second"]
+        assert service.processed == ["first", "second"]
+        assert not worker.done()
+        scheduler._stopping = True
+        await asyncio.wait_for(worker, timeout=1)
+
+    asyncio.run(scenario())
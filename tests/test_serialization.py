@@ -0,0 +1,49 @@
+"""
+Хранение результатов отчёта: JSONB для небольших, zstd для больших
+"""
+import orjson
+import pytest
+from app.config import settings
+from app.serialization import decode_results, dumps, encode_results, results_fragment
+
+SMALL = {"results": {"sonarqube": {"bugs": {"total": 3}}}}
+LARGE = {"results": {"lint": {"issues": [{"path": f"src/module_{i}.py", "line": i} for i in range(2000)]}}}
+
+
+def stored(encoded: dict) -> tuple:
+    """Поля results и results_blob строки отчёта"""
+    return encoded["results"], encoded["results_blob"]
+
+
+@pytest.fixture(autouse=True)
+def compression(monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_RESULTS_COMPRESSION", True)
+    monkeypatch.setattr(settings, "REPORT_RESULTS_COMPRESS_THRESHOLD", 1024)
+
+
+def test_small_results_stay_in_jsonb():
+    encoded = encode_results(SMALL)
+    assert encoded == {"results": SMALL, "results_blob": None}
+    assert decode_results(*stored(encoded)) == SMALL
+    assert results_fragment(*stored(encoded)) is SMALL
+
+
+def test_large_results_are_compressed():
+    encoded = encode_results(LARGE)
+    assert encoded["results"] is None
+    assert len(encoded["results_blob"]) < len(dumps(LARGE))
+    assert decode_results(*stored(encoded)) == LARGE
+    # Сжатый JSON вставляется в ответ без разбора
+    assert orjson.loads(dumps({"results": results_fragment(*stored(encoded))})) == {"results": LARGE}
+
+
+def test_compression_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_RESULTS_COMPRESSION", False)
+    assert encode_results(LARGE) == {"results": LARGE, "results_blob": None}
+    assert encode_results(None) == {"results": None, "results_blob": None}
+
+
+def test_legacy_string_results_are_decoded():
+    legacy = dumps(SMALL).decode()
+    assert decode_results(legacy, None) == SMALL
+    assert results_fragment(legacy, None) == SMALL
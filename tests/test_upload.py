@@ -0,0 +1,98 @@
+"""
+Загрузка архива через POST /upload/ на настоящем Postgres
+"""
+import hashlib
+import uuid
+import httpx
+from sqlalchemy import insert, select, text, update
+from app.database import async_session_maker
+from app.main import app
+from app.reports.models import Report, ReportStatus
+from app.reports.reports_service import reports_service
+
+
+async def get_report(task_id: str) -> Report:
+    async with async_session_maker() as db:
+        return (await db.execute(select(Report).where(Report.id == task_id))).scalar_one()
+
+
+def test_upload_same_archive_twice(database, storage, make_zip):
+    archive = make_zip()
+    content_hash = hashlib.sha256(archive).hexdigest()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def upload() -> str:
+                response = await client.post("/upload/", files={"file": ("code.zip", archive, "application/zip")})
+                assert response.status_code == 200, response.text
+                return response.json()["task_id"]
+
+            # Первая загрузка кладёт архив в хранилище, вторая переиспользует объект
+            first = await upload()
+            second = await upload()
+            first_report, second_report = await get_report(first), await get_report(second)
+            assert first_report.status == second_report.status == ReportStatus.PENDING
+            assert first_report.content_hash == content_hash
+            assert second_report.object_name == first_report.object_name == f"{first}.zip"
+            assert list(storage.objects) == [f"{first}.zip"]
+
+            # Готовый отчёт для того же архива отдаётся сразу
+            async with async_session_maker() as db:
+                await db.execute(
+                    update(Report)
+                    .where(Report.id == first)
+                    .values(status=ReportStatus.SUCCESS, results={"results": {}}, completed_at=text("now()"))
+                )
+                await db.commit()
+            cached = await get_report(await upload())
+            assert cached.status == ReportStatus.SUCCESS
+            assert cached.object_name == first_report.object_name
+
+    async def cleanup():
+        async with async_session_maker() as db:
+            await db.execute(text("DELETE FROM reports WHERE content_hash = :hash"), {"hash": content_hash})
+            await db.commit()
+
+    try:
+        database(scenario)
+    finally:
+        database(cleanup)
+
+
+def test_reused_github_archive_is_not_removed(database, storage, monkeypatch):
+    content_hash = uuid.uuid4().hex * 2
+    source_id, task_id = str(uuid.uuid4()), str(uuid.uuid4())
+    storage.objects[f"{source_id}.zip"] = b"archive"
+    removed = []
+
+    async def remove_object(file_name: str):
+        removed.append(file_name)
+
+    monkeypatch.setattr(storage, "remove_object", remove_object)
+
+    async def scenario():
+        async with async_session_maker() as db:
+            await db.execute(insert(Report).values(
+                id=source_id, status=ReportStatus.PENDING, content_hash=content_hash, object_name=f"{source_id}.zip",
+            ))
+            await db.execute(insert(Report).values(id=task_id, status=ReportStatus.UPLOADING))
+            await db.commit()
+
+            # Архив коммита не скачивался: объекта {task_id}.zip нет, удалять нечего
+            await reports_service.finish_upload(task_id, 7, content_hash, db, storage, uploaded=False)
+        report = await get_report(task_id)
+        assert (report.status, report.object_name) == (ReportStatus.PENDING, f"{source_id}.zip")
+        assert removed == []
+
+    async def cleanup():
+        async with async_session_maker() as db:
+            await db.execute(
+                text("DELETE FROM reports WHERE id = ANY(CAST(:ids AS uuid[]))"), {"ids": [source_id, task_id]}
+            )
+            await db.commit()
+
+    try:
+        database(scenario)
+    finally:
+        database(cleanup)